@@ -0,0 +1,103 @@
+"""
+Measure the cold-start import cost of every Lambda entry point (pps/*/app.py) with `python -X importtime`, reporting
+the total import time per function, the time spent per top-level package and the most expensive modules.
+
+    python benchmarks/importtime.py                       # every function
+    python benchmarks/importtime.py -a gallery tasks -t 5 # some functions, top 5 modules
+    python benchmarks/importtime.py --save imports.json   # store the totals
+    python benchmarks/importtime.py --baseline imports.json
+
+Each function is imported in a fresh interpreter --repeat times and the fastest run is kept.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+CORE_LAYER = ROOT.joinpath('pps', 'core-layer', 'python')
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def entry_points() -> List[str]:
+    return sorted(path.parent.name for path in ROOT.joinpath('pps').glob('*/app.py'))
+
+
+def import_profile(app: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Import the handler module of a function in a new interpreter, returning (module, self us, cumulative us, depth)
+    """
+    env = {**os.environ, 'PYTHONPATH': str(CORE_LAYER)}
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=ROOT.joinpath('pps', app),
+                             env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"Could not import {app}: {process.stderr.strip().splitlines()[-1]}")
+    modules = []
+    for line in process.stderr.splitlines():
+        match = _LINE.match(line)
+        if match is not None:
+            modules.append((match.group(4), int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2))
+    return modules
+
+
+def summarize(modules: List[Tuple[str, int, int, int]], top: int) -> dict:
+    packages = defaultdict(int)
+    for name, self_us, _, _ in modules:
+        packages[name.split('.')[0]] += self_us
+    total = next(cumulative for name, _, cumulative, depth in modules if name == 'app' and depth == 0)
+    return {
+        'total_ms': total / 1000,
+        'modules': len(modules),
+        'packages': {name: us / 1000 for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]},
+        'slowest': [(name, self_us / 1000) for name, self_us, _, _ in sorted(modules, key=lambda m: -m[1])[:top]]
+    }
+
+
+def profile(app: str, repeat: int, top: int) -> dict:
+    runs = [summarize(import_profile(app), top) for _ in range(repeat)]
+    return min(runs, key=lambda run: run['total_ms'])
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Profile the import time of the Lambda entry points")
+    parser.add_argument('-a', '--apps', nargs='*', help="Functions to profile, all of them by default")
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    parser.add_argument('-t', '--top', type=int, default=8)
+    parser.add_argument('--baseline', help="JSON totals of a previous run to compare with")
+    parser.add_argument('--save', help="Write the totals as JSON to this path")
+    args = parser.parse_args(argv)
+
+    baseline: Dict[str, float] = {}
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    totals = {}
+    for app in args.apps or entry_points():
+        try:
+            result = profile(app, args.repeat, args.top)
+        except RuntimeError as e:
+            print(f"{app}: {e}\n")
+            continue
+        totals[app] = result['total_ms']
+        previous = baseline.get(app)
+        change = f" ({(result['total_ms'] - previous) / previous:+.0%} vs baseline)" if previous else ''
+        print(f"{app}: {result['total_ms']:.1f} ms, {result['modules']} modules{change}")
+        print('  packages: ' + ', '.join(f"{name} {ms:.1f}" for name, ms in result['packages'].items()))
+        print('  slowest:  ' + ', '.join(f"{name} {ms:.1f}" for name, ms in result['slowest']))
+        print()
+
+    if args.save is not None:
+        with open(args.save, 'w') as f:
+            json.dump(totals, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
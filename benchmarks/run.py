@@ -0,0 +1,226 @@
+"""
+Replay API Gateway events through the Lambda handlers of pps/*/app.py against the in-memory database backend and
+report, per route, the latency percentiles, the peak memory allocated and the database calls of one request.
+
+    python benchmarks/run.py                                  # run every route in scenarios.json
+    python benchmarks/run.py -r tasks.list -n 500             # a single route, more iterations
+    python benchmarks/run.py --save benchmarks/baseline.json  # store a baseline
+    python benchmarks/run.py --baseline benchmarks/baseline.json --max-regression 0.15
+
+Cognito and S3 are answered with the canned responses under "stubs" in scenarios.json. A route can list "setup"
+routes, sent before each of its requests and left out of the measurements (e.g. starting the task a request
+completes), and "{n}" in its parameters, body or user claims is replaced by a number unique to each request (e.g. a
+new group code per request). A route answering with an error status on purpose gives it as "status".
+
+When a baseline is given the deltas are printed, and the exit status is 1 if a route's p95 latency grows more than
+--max-regression or if it makes more database calls than before.
+"""
+import argparse
+import importlib.util
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+BENCHMARKS = Path(__file__).resolve().parent
+
+sys.path.insert(0, str(ROOT.joinpath('pps', 'core-layer', 'python')))
+sys.path.insert(0, str(BENCHMARKS))
+os.environ['PPS_DB_BACKEND'] = 'memory'
+# the client-side rate limit is sized for provisioned tables and would dominate in-memory latencies
+os.environ.setdefault('PPS_DB_MAX_RATE', '1e9')
+os.environ.setdefault('PPS_DB_MEMORY_TEMPLATE', str(ROOT.joinpath('template.yaml')))
+
+import seed  # noqa: E402
+import stubs  # noqa: E402
+
+
+def load_handler(app: str) -> Callable:
+    spec = importlib.util.spec_from_file_location(f'pps_{app}_app', ROOT.joinpath('pps', app, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.handler
+
+
+def build_event(route: dict, users: dict) -> dict:
+    with open(ROOT.joinpath('events', route['event'])) as f:
+        event = json.load(f)
+    event['resource'] = route['resource']
+    event['path'] = route.get('path', route['resource'])
+    event['httpMethod'] = route['method']
+    event['pathParameters'] = route.get('pathParameters')
+    event['queryStringParameters'] = route.get('queryStringParameters')
+    event['body'] = json.dumps(route['body']) if 'body' in route else None
+    event['requestContext'] = {**event.get('requestContext', {}), 'httpMethod': route['method']}
+    if route.get('user') is not None:
+        event['requestContext']['authorizer'] = {'claims': users[route['user']]}
+    return event
+
+
+def instantiate(event: dict, number: int) -> dict:
+    """
+    Copy of an event with every {n} replaced by the given number
+    """
+    return json.loads(json.dumps(event).replace('{n}', str(number)))
+
+
+def context(app: str) -> SimpleNamespace:
+    return SimpleNamespace(function_name=f'{app}-function', aws_request_id=str(uuid.uuid4()),
+                           get_remaining_time_in_millis=lambda: 3000)
+
+
+def percentile(values: List[float], p: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[p - 1]
+
+
+def run_route(route: dict, handlers: Dict[str, Callable], routes: Dict[str, dict], users: dict, resource,
+              iterations: int, warmup: int, allocation_iterations: int) -> dict:
+    handler = handlers[route['app']]
+    event = build_event(route, users)
+    setup = [(routes[name], build_event(routes[name], users)) for name in route.get('setup', [])]
+    numbers = itertools.count()
+
+    def prepare() -> dict:
+        # the setup responses are not checked, e.g. dismissing a task fails when none is active
+        for step, step_event in setup:
+            handlers[step['app']](instantiate(step_event, next(numbers)), context(step['app']))
+        return instantiate(event, next(numbers))
+
+    try:
+        response = handler(prepare(), context(route['app']))
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+    status = response.get('statusCode')
+    expected = route.get('status')
+    if status is None or (status >= 400 if expected is None else status != expected):
+        return {'error': f"status {status}: {response.get('body')}"}
+
+    for _ in range(warmup):
+        handler(prepare(), context(route['app']))
+
+    latencies = []
+    calls = 0
+    for _ in range(iterations):
+        request = prepare()
+        calls_before = sum(resource.calls.values())
+        start = time.perf_counter()
+        handler(request, context(route['app']))
+        latencies.append((time.perf_counter() - start) * 1000)
+        calls += sum(resource.calls.values()) - calls_before
+    db_calls = calls / iterations
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(allocation_iterations):
+            request = prepare()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            handler(request, context(route['app']))
+            peaks.append((tracemalloc.get_traced_memory()[1] - before) / 1024)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'peak_kib': statistics.median(peaks),
+        'db_calls': db_calls
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], max_regression: float) -> List[str]:
+    failures = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None or 'error' in result or 'error' in previous:
+            continue
+        if result['p95'] > previous['p95'] * (1 + max_regression):
+            failures.append(f"{name}: p95 {previous['p95']:.3f} ms -> {result['p95']:.3f} ms")
+        if result['db_calls'] > previous['db_calls']:
+            failures.append(f"{name}: database calls {previous['db_calls']:g} -> {result['db_calls']:g}")
+    return failures
+
+
+def delta(value: float, previous: Optional[float]) -> str:
+    if previous is None or previous == 0:
+        return ''
+    return f' ({(value - previous) / previous:+.0%})'
+
+
+def report(results: Dict[str, dict], baseline: Dict[str, dict]):
+    print(f"{'route':<28}{'p50 ms':>16}{'p95 ms':>16}{'p99 ms':>16}{'peak KiB':>16}{'db calls':>10}")
+    for name, result in results.items():
+        if 'error' in result:
+            print(f"{name:<28}  error: {result['error'][:100]}")
+            continue
+        previous = baseline.get(name, {})
+        columns = [f"{result[key]:.3f}{delta(result[key], previous.get(key))}" for key in ('p50', 'p95', 'p99')]
+        columns.append(f"{result['peak_kib']:.1f}{delta(result['peak_kib'], previous.get('peak_kib'))}")
+        print(f"{name:<28}" + ''.join(f'{column:>16}' for column in columns) + f"{result['db_calls']:>10g}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Lambda handlers with recorded API Gateway events")
+    parser.add_argument('-s', '--scenarios', default=str(BENCHMARKS.joinpath('scenarios.json')))
+    parser.add_argument('-r', '--routes', nargs='*', help="Names of the routes to run, all of them by default")
+    parser.add_argument('-n', '--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--allocation-iterations', type=int, default=20)
+    parser.add_argument('--baseline', help="JSON results of a previous run to compare with")
+    parser.add_argument('--max-regression', type=float, default=0.2)
+    parser.add_argument('--save', help="Write the results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    with open(args.scenarios) as f:
+        scenarios = json.load(f)
+    all_routes = {route['name']: route for route in scenarios['routes']}
+    routes = [route for route in scenarios['routes'] if not args.routes or route['name'] in args.routes]
+
+    apps = {route['app'] for route in routes}
+    apps.update(all_routes[name]['app'] for route in routes for name in route.get('setup', []))
+    handlers = {app: load_handler(app) for app in sorted(apps)}
+    stubs.install(scenarios.get('stubs', {}))
+
+    from core import ModelService
+    from core.db import db
+    resource = db.resource
+    for service in ModelService.__subclasses__():
+        resource.ensure_table(service.__table_name__, service.__partition_key__, service.__sort_key__,
+                              service.__indices__)
+    seed.seed(resource)
+
+    results = {}
+    for route in routes:
+        results[route['name']] = run_route(route, handlers, all_routes, scenarios['users'], resource,
+                                           args.iterations, args.warmup, args.allocation_iterations)
+
+    baseline = {}
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    report(results, baseline)
+
+    if args.save is not None:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    failures = compare(results, baseline, args.max_regression)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if len(failures) > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Deterministic fixture data for the handler benchmarks. Ids follow the pattern used by the scenarios:
+districts `district-<d>`, groups `group-<g>` and beneficiary subs `beneficiary-<d>-<g>-<n>`. The write routes use
+the `beneficiary-writer` of the last group, who has no active task and enough score to buy any item many times
+"""
+import random
+from typing import Dict, Iterator, List
+
+AREAS = ['corporality', 'creativity', 'character', 'affectivity', 'sociability', 'spirituality']
+UNITS = ['scouts', 'guides']
+
+
+def beneficiary_sub(district: int, group: int, number: int) -> str:
+    return f'beneficiary-{district}-{group}-{number}'
+
+
+def districts(n_districts: int) -> Iterator[dict]:
+    for district in range(n_districts):
+        yield {'code': f'district-{district}', 'name': f'District {district}'}
+
+
+def groups(n_districts: int, n_groups: int, rosters: Dict[str, dict]) -> Iterator[dict]:
+    for district in range(n_districts):
+        for group in range(n_groups):
+            roster = rosters.get(f'district-{district}::group-{group}', {})
+            yield {
+                'district': f'district-{district}',
+                'code': f'group-{group}',
+                'name': f'Group {group}',
+                'beneficiary_code': f'{district:04}{group:04}',
+                'scouters_code': f'scouters-{district}-{group}',
+                'creator': 'scouter-0',
+                'scouters': {'scouter-0': {'name': 'Scouter', 'role': 'creator'}}
+            }
+            # the roster of a group is an item of its own, see GroupsService.roster_district
+            yield {
+                'district': f'district-{district}::roster',
+                'code': f'group-{group}',
+                'roster': roster,
+                'roster-version': len(roster)
+            }
+
+
+def active_task(number: int) -> dict:
+    area = AREAS[number % len(AREAS)]
+    return {
+        'completed': False,
+        'created': 1600000000 + number,
+        'objective': f'puberty::{area}::2.1',
+        'original-objective': f'Original objective of {area}',
+        'personal-objective': f'Personal objective {number}',
+        'score': 80,
+        'tasks': [{'completed': index == 0, 'description': f'Task {index}'} for index in range(3)]
+    }
+
+
+def beneficiaries(rng: random.Random, n_districts: int, n_groups: int, n_beneficiaries: int) -> Iterator[dict]:
+    for district in range(n_districts):
+        for group in range(n_groups):
+            for number in range(n_beneficiaries):
+                sub = beneficiary_sub(district, group, number)
+                score = {area: rng.randint(0, 500) for area in AREAS}
+                yield {
+                    'user': sub,
+                    'group': f'district-{district}::group-{group}',
+                    'unit-user': f'{UNITS[number % 2]}::{sub}',
+                    'full-name': f'Beneficiary {number}',
+                    'nickname': f'Nick {number}',
+                    'birthdate': f'{1 + number % 28:02}-{1 + number % 12:02}-{2006 + number % 6}',
+                    'target': active_task(number) if number % 4 == 0 else None,
+                    'completed': None,
+                    'score': score,
+                    'score-total': sum(score.values()),
+                    'n_tasks': {area: rng.randint(0, 10) for area in AREAS},
+                    'bought_items': {}
+                }
+
+
+def writer(n_districts: int, n_groups: int) -> dict:
+    return {
+        'user': 'beneficiary-writer',
+        'group': f'district-{n_districts - 1}::group-{n_groups - 1}',
+        'unit-user': 'scouts::beneficiary-writer',
+        'full-name': 'Beneficiary Writer',
+        'nickname': 'Writer',
+        'birthdate': '01-01-2008',
+        'target': None,
+        'completed': None,
+        'score': {area: 10 ** 9 for area in AREAS},
+        'score-total': 10 ** 9 * len(AREAS),
+        'n_tasks': {area: 0 for area in AREAS},
+        'bought_items': {}
+    }
+
+
+def tasks(rng: random.Random, n_districts: int, n_groups: int, n_beneficiaries: int,
+          n_tasks: int) -> Iterator[dict]:
+    for district in range(n_districts):
+        for group in range(n_groups):
+            for number in range(n_beneficiaries):
+                for task in range(n_tasks):
+                    area = AREAS[task % len(AREAS)]
+                    yield {
+                        'user': beneficiary_sub(district, group, number),
+                        'objective': f'puberty::{area}::{1 + task // len(AREAS)}.{1 + task % 3}',
+                        'objective-description': f'Objective {task}',
+                        'completed': rng.random() < 0.7,
+                        'tasks': [{'completed': True, 'description': f'Task {index}'} for index in range(3)],
+                        'score': 80
+                    }
+
+
+def items(n_items: int) -> Iterator[dict]:
+    for area in AREAS:
+        for number in range(n_items):
+            yield {
+                'category': area,
+                'release-id': 100000 + number,
+                'name': f'Item {number}',
+                'description': f'Reward {number} for {area}',
+                'price': 10 + number
+            }
+
+
+def rosters(rows: List[dict]) -> Dict[str, dict]:
+    result = {}
+    for row in rows:
+        unit, sub = row['unit-user'].split('::')
+        result.setdefault(row['group'], {})[sub] = {
+            'unit': unit,
+            'nickname': row['nickname'],
+            'birthdate': row['birthdate'],
+            'score': row['score-total'],
+            'active-task': row['target'] is not None
+        }
+    return result
+
+
+def seed(resource, n_districts: int = 2, n_groups: int = 3, n_beneficiaries: int = 40, n_tasks: int = 6,
+         n_items: int = 20, seed_value: int = 0) -> Dict[str, int]:
+    """
+    Write the fixture data into a database resource, returning the number of items per table
+    """
+    rng = random.Random(seed_value)
+    beneficiary_rows = list(beneficiaries(rng, n_districts, n_groups, n_beneficiaries))
+    beneficiary_rows.append(writer(n_districts, n_groups))
+    tables = {
+        'districts': districts(n_districts),
+        'groups': groups(n_districts, n_groups, rosters(beneficiary_rows)),
+        'beneficiaries': beneficiary_rows,
+        'tasks': tasks(rng, n_districts, n_groups, n_beneficiaries, n_tasks),
+        'items': items(n_items)
+    }
+    counts = {}
+    for name, rows in tables.items():
+        table = resource.Table(name)
+        counts[name] = 0
+        for row in rows:
+            table.put_item(Item=row)
+            counts[name] += 1
+    return counts
@@ -0,0 +1,37 @@
+"""
+Canned responses for the AWS services the handlers call besides DynamoDB, so that the routes that sign users up,
+log them in or store files can be benchmarked without credentials or network. The responses are answered from the
+botocore before-call event, after the parameters of the call are validated
+"""
+from copy import deepcopy
+from types import SimpleNamespace
+from typing import Dict
+
+
+class NotStubbedError(Exception):
+    pass
+
+
+def responder(service_name: str, responses: Dict[str, dict]):
+    def respond(model, **_):
+        if model.name not in responses:
+            raise NotStubbedError(f"{service_name} {model.name} has no stubbed response")
+        return SimpleNamespace(status_code=200, headers={}), deepcopy(responses[model.name])
+    return respond
+
+
+def install(stubs: Dict[str, Dict[str, dict]]):
+    """
+    Answer the calls of the shared clients of core.aws.clients with the responses in `stubs`, given per service
+    name and operation name (e.g. {'cognito-idp': {'SignUp': {...}}}). Operations without a response raise
+    NotStubbedError instead of reaching AWS
+    """
+    from core.aws import clients
+    for service_name, responses in stubs.items():
+        targets = [clients.client(service_name)]
+        if service_name == 's3':
+            # the Bucket helpers go through the resource, which has a client of its own
+            targets.append(clients.resource(service_name).meta.client)
+        for client in targets:
+            service_id = client.meta.service_model.service_id.hyphenize()
+            client.meta.events.register(f'before-call.{service_id}', responder(service_name, responses))
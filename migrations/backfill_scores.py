@@ -0,0 +1,58 @@
+"""
+Set score-total to the sum of the area scores for the beneficiaries created before the ByGroupScore index existed, so
+that they show up in BeneficiariesService.top_scores and get_rank with the right total. Totals started from 0 by a
+purchase or a task made before the backfill are repaired too. It is safe to run more than once: beneficiaries whose
+total is already right are not written, and the ones whose score changes while they are backfilled are left for the
+next run.
+
+    python migrations/backfill_scores.py                        # every group of every district
+    python migrations/backfill_scores.py -d district-0          # the groups of one district
+    python migrations/backfill_scores.py -d district-0 -g group-0
+
+It uses the default AWS credentials and region; run it once after the deploy that creates the index is complete.
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT.joinpath('pps', 'core-layer', 'python')))
+
+
+def groups(district: str = None) -> Iterator[Tuple[str, str]]:
+    from core.services.groups import GroupsService
+    from core.utils.key import split_key
+    interface = GroupsService.get_interface()
+    if district is not None:
+        items = interface.query_all(district, attributes=['district', 'code']).items
+    else:
+        items = interface.iter_scan(attributes=['district', 'code'])
+    for item in items:
+        # the scan also returns the roster items, kept under their own partition keys
+        if item['district'] == GroupsService.roster_district(split_key(item['district'])[0]):
+            continue
+        yield item['district'], item['code']
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Backfill the score-total attribute of the beneficiaries")
+    parser.add_argument('-d', '--district', help="Only backfill the groups of this district")
+    parser.add_argument('-g', '--group', help="Only backfill this group, requires --district")
+    args = parser.parse_args(argv)
+    if args.group is not None and args.district is None:
+        parser.error("--group requires --district")
+
+    from core.services.beneficiaries import BeneficiariesService
+    targets = [(args.district, args.group)] if args.group is not None else groups(args.district)
+    total = 0
+    for district, group in targets:
+        updated = BeneficiariesService.backfill_scores(district, group)
+        print(f"{district}/{group}: {updated} beneficiaries updated")
+        total += updated
+    print(f"{total} beneficiaries updated")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
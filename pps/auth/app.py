@@ -1,9 +1,9 @@
-import json
-
 from botocore.exceptions import ParamValidationError
 
 from core import HTTPEvent, JSONResponse
 from core.aws.errors import HTTPError
+from core.aws.invocation import lambda_handler
+from core.router.router import Router
 from core.services.groups import GroupsService
 from core.services.users import UsersCognito
 
@@ -17,7 +17,7 @@ def process_group(item: dict, event: HTTPEvent):
 
 
 def validate_beneficiary_code(event: HTTPEvent):
-    code = json.loads(event.body)["code"]
+    code = event.json["code"]
     group = GroupsService.get_by_code(code)
     if group is None:
         return JSONResponse.generate_error(HTTPError.INVALID_CONTENT, "Invalid code")
@@ -28,7 +28,7 @@ def validate_beneficiary_code(event: HTTPEvent):
 
 
 def confirm_user(event: HTTPEvent):
-    data = json.loads(event.body)
+    data = event.json
     try:
         return UsersCognito.confirm(data['email'], data['code'])
     except UsersCognito.get_client().exceptions.UserNotFoundException:
@@ -38,7 +38,7 @@ def confirm_user(event: HTTPEvent):
 
 
 def refresh_token(event: HTTPEvent):
-    data = json.loads(event.body)
+    data = event.json
     try:
         token = UsersCognito.refresh(data['token'])
         if token is None:
@@ -54,7 +54,7 @@ def refresh_token(event: HTTPEvent):
 
 
 def login(event: HTTPEvent):
-    data = json.loads(event.body)
+    data = event.json
     try:
         token = UsersCognito.log_in(data['email'], data['password'])
         if token is None:
@@ -73,18 +73,15 @@ def login(event: HTTPEvent):
 """Handlers"""
 
 
+router = Router()
+
+router.post("/api/auth/login/", login)
+router.post("/api/auth/confirm/", confirm_user)
+router.post("/api/auth/refresh/", refresh_token)
+
+
+@lambda_handler
 def handler(event: dict, _) -> dict:
     event = HTTPEvent(event)
-
-    if event.method == "POST":
-        if event.resource == "/api/auth/login":
-            result = login(event)
-        elif event.resource == "/api/auth/confirm":
-            result = confirm_user(event)
-        elif event.resource == "/api/auth/refresh":
-            result = refresh_token(event)
-        else:
-            result = JSONResponse.generate_error(HTTPError.UNKNOWN_RESOURCE, f"Resource {event.resource} unknown")
-    else:
-        result = JSONResponse.generate_error(HTTPError.NOT_IMPLEMENTED, f"Method {event.method} is not valid")
-    return result.as_dict()
+    response = router.route(event)
+    return response.as_dict()
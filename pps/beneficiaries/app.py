@@ -1,17 +1,20 @@
-import json
 from datetime import datetime
+from typing import List
 
 from botocore.exceptions import ParamValidationError
 
 from core import HTTPEvent, JSONResponse
 from core.aws.errors import HTTPError
+from core.aws.invocation import lambda_handler
 from core.router.router import Router
 from core.services.beneficiaries import BeneficiariesService
 from core.services.users import UsersCognito
 from core.utils.consts import VALID_UNITS
+from core.utils.cursor import InvalidCursorError, Page
+from core.utils.stages import calculate_stage, classify_stages
 
 
-def process_beneficiary(beneficiary: dict, event: HTTPEvent):
+def process_beneficiary(beneficiary: dict, event: HTTPEvent, stage: str = None):
     try:
         district, group, unit = beneficiary["unit"].split("::")
 
@@ -19,9 +22,7 @@ def process_beneficiary(beneficiary: dict, event: HTTPEvent):
         beneficiary["url"] = event.concat_url('beneficiaries', beneficiary["user-sub"])
         beneficiary["group"] = event.concat_url('districts', district, 'groups', group)
         beneficiary["unit"] = event.concat_url('districts', district, 'groups', group, 'beneficiaries', unit)
-        beneficiary["stage"] = BeneficiariesService.calculate_stage(
-            datetime.strptime(beneficiary["birthdate"], "%d-%m-%Y")
-        )
+        beneficiary["stage"] = stage if stage is not None else calculate_stage(beneficiary["birthdate"])
 
         del beneficiary["user-sub"]
         del beneficiary["code"]
@@ -29,6 +30,12 @@ def process_beneficiary(beneficiary: dict, event: HTTPEvent):
         pass
 
 
+def process_beneficiaries(beneficiaries: List[dict], event: HTTPEvent):
+    stages = classify_stages([beneficiary.get("birthdate") for beneficiary in beneficiaries])
+    for beneficiary, stage in zip(beneficiaries, stages):
+        process_beneficiary(beneficiary, event, stage)
+
+
 def get_beneficiary(event: HTTPEvent):
     if event.authorizer.sub != event.params["sub"]:
         return JSONResponse.generate_error(HTTPError.FORBIDDEN, "You can not access data from this beneficiary")
@@ -45,10 +52,13 @@ def get_beneficiary(event: HTTPEvent):
 def list_beneficiaries_group(event: HTTPEvent):
     district = event.params["district"]
     group = event.params["group"]
-    result = BeneficiariesService.query_group(district, group)
-    for obj in result.items:
-        process_beneficiary(obj, event)
-    return JSONResponse(result.as_dict())
+    try:
+        page = Page.from_event(event)
+    except InvalidCursorError as e:
+        return JSONResponse.generate_error(HTTPError.INVALID_CONTENT, str(e))
+    result = BeneficiariesService.query_group(district, group, page.limit, page.start_key)
+    process_beneficiaries(result.items, event)
+    return JSONResponse(page.body(result))
 
 
 def list_beneficiaries_unit(event: HTTPEvent):
@@ -58,14 +68,17 @@ def list_beneficiaries_unit(event: HTTPEvent):
     if unit not in VALID_UNITS:
         return JSONResponse.generate_error(HTTPError.NOT_FOUND, f"Unknown unit: {unit}")
 
-    result = BeneficiariesService.query_unit(district, group, unit)
-    for obj in result.items:
-        process_beneficiary(obj, event)
-    return JSONResponse(result.as_dict())
+    try:
+        page = Page.from_event(event)
+    except InvalidCursorError as e:
+        return JSONResponse.generate_error(HTTPError.INVALID_CONTENT, str(e))
+    result = BeneficiariesService.query_unit(district, group, unit, page.limit, page.start_key)
+    process_beneficiaries(result.items, event)
+    return JSONResponse(page.body(result))
 
 
 def signup_beneficiary(event: HTTPEvent):
-    data = json.loads(event.body)
+    data = event.json
     try:
         attrs = {
             'name': data['name'],
@@ -111,6 +124,7 @@ router.get("/api/beneficiaries/{sub}/", get_beneficiary)
 router.post("/api/auth/beneficiaries-signup/", signup_beneficiary)
 
 
+@lambda_handler
 def handler(event: dict, _) -> dict:
     event = HTTPEvent(event)
     response = router.route(event)
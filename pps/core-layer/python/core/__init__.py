@@ -1,2 +1,17 @@
-from .db import db, ModelService
-from .aws import HTTPEvent, JSONResponse
+from typing import TYPE_CHECKING
+
+from .utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .db import ModelService
+    from .aws import HTTPEvent, JSONResponse
+
+# the Database instance is not exported here: `core.db` is also the name of the package, so `from core import db`
+# would give either of them depending on the import order. Import it from core.db.db
+__all__ = ['ModelService', 'HTTPEvent', 'JSONResponse']
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'ModelService': '.db',
+    'HTTPEvent': '.aws',
+    'JSONResponse': '.aws'
+})
@@ -1 +1,12 @@
-from .cognito import CognitoService
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+from ..utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .cognito import CognitoService
+
+__all__ = ['CognitoService']
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'CognitoService': '.cognito'
+})
@@ -2,9 +2,8 @@ import os
 from abc import ABC
 from typing import Dict
 
-import boto3
-
 from core import JSONResponse
+from core.aws import clients
 from core.aws.errors import HTTPError
 
 
@@ -40,7 +39,7 @@ class User:
 
 class CognitoService(ABC):
     __user_pool_id__: str
-    _client: boto3.client = None
+    _client = None
 
     @classmethod
     def get_client_id(cls):
@@ -49,7 +48,7 @@ class CognitoService(ABC):
     @classmethod
     def get_client(cls):
         if cls._client is None:
-            cls._client = boto3.client('cognito-idp', region_name='us-west-2')
+            cls._client = clients.client('cognito-idp')
         return cls._client
 
     @classmethod
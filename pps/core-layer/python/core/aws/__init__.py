@@ -1,2 +1,14 @@
-from .event import HTTPEvent
-from .response import JSONResponse
+from typing import TYPE_CHECKING
+
+from ..utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .event import HTTPEvent
+    from .response import JSONResponse
+
+__all__ = ['HTTPEvent', 'JSONResponse']
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'HTTPEvent': '.event',
+    'JSONResponse': '.response'
+})
@@ -0,0 +1,86 @@
+import threading
+import time
+from typing import Dict, Any
+
+REGION = 'us-west-2'
+
+_lock = threading.RLock()
+_session = None
+_clients: Dict[str, Any] = {}
+_resources: Dict[str, Any] = {}
+_configs: Dict[str, dict] = {}
+_timings: Dict[str, float] = {}
+
+
+def _timed(name: str, fn):
+    start = time.perf_counter()
+    value = fn()
+    _timings[name] = time.perf_counter() - start
+    return value
+
+
+def get_session():
+    """
+    Get the boto3 session shared by every client and resource, importing boto3 on first use
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                boto3 = _timed('import:boto3', lambda: __import__('boto3'))
+                _session = _timed('session', lambda: boto3.session.Session(region_name=REGION))
+    return _session
+
+
+def configure(service_name: str, **options):
+    """
+    Set the botocore Config options used when the client and resource of a service are created
+    """
+    _configs[service_name] = options
+
+
+def _config(service_name: str):
+    options = _configs.get(service_name)
+    if options is None:
+        return None
+    from botocore.config import Config
+    return Config(**options)
+
+
+def client(service_name: str):
+    """
+    Get the shared low-level client for an AWS service, creating it on first use
+    """
+    value = _clients.get(service_name)
+    if value is None:
+        with _lock:
+            value = _clients.get(service_name)
+            if value is None:
+                session = get_session()
+                config = _config(service_name)
+                value = _timed(f'client:{service_name}', lambda: session.client(service_name, config=config))
+                _clients[service_name] = value
+    return value
+
+
+def resource(service_name: str):
+    """
+    Get the shared resource for an AWS service, creating it on first use
+    """
+    value = _resources.get(service_name)
+    if value is None:
+        with _lock:
+            value = _resources.get(service_name)
+            if value is None:
+                session = get_session()
+                config = _config(service_name)
+                value = _timed(f'resource:{service_name}', lambda: session.resource(service_name, config=config))
+                _resources[service_name] = value
+    return value
+
+
+def timings() -> Dict[str, float]:
+    """
+    Seconds spent importing boto3 and creating each client and resource in this container
+    """
+    return dict(_timings)
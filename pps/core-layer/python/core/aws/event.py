@@ -1,33 +1,67 @@
+import base64
 import json
 import os
-from datetime import datetime, date
+from datetime import datetime
 from json import JSONDecodeError
 
+from core.utils.stages import calculate_age, calculate_stage, parse_birthdate
+
+_UNSET = object()
+
+
+class _Claim:
+    """
+    Authorizer attribute read from its token claim on access
+    """
+    __slots__ = ('claim',)
+
+    def __init__(self, claim: str):
+        self.claim = claim
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return instance.claims.get(self.claim)
+
 
 class Authorizer:
+    __slots__ = ('claims', '_birth_date', '_age', '_stage', '_full_name')
+
+    sub: str = _Claim("sub")
+    groups: str = _Claim("cognito:groups")
+    email_verified: str = _Claim("email_verified")
+    iss: str = _Claim("iss")
+    aud: str = _Claim("aud")
+    event_id: str = _Claim("event_id")
+    token_use: str = _Claim("token_use")
+    auth_time: str = _Claim("auth_time")
+    exp: str = _Claim("exp")
+    iat: str = _Claim("iat")
+
+    email: str = _Claim("email")
+    username: str = _Claim("cognito:username")
+    name: str = _Claim("name")
+    middle_name: str = _Claim("middle_name")
+    family_name: str = _Claim("family_name")
+    nickname: str = _Claim("nickname")
+    unit: str = _Claim("gender")
+
     def __init__(self, authorizer: dict):
-        claims = authorizer["claims"]
-        self.sub: str = claims.get("sub")
-        self.groups: str = claims.get("cognito:groups")
-        self.email_verified: str = claims.get("email_verified")
-        self.iss: str = claims.get("iss")
-        self.aud: str = claims.get("aud")
-        self.event_id: str = claims.get("event_id")
-        self.token_use: str = claims.get("token_use")
-        self.auth_time: str = claims.get("auth_time")
-        self.exp: str = claims.get("exp")
-        self.iat: str = claims.get("iat")
-
-        self.email: str = claims.get("email")
-        self.username: str = claims.get("cognito:username")
-        self.name: str = claims.get("name")
-        self.middle_name: str = claims.get("middle_name")
-        self.family_name: str = claims.get("family_name")
-        self.nickname: str = claims.get("nickname")
-        self.unit: str = claims.get("gender")
-
-        birth_date = claims.get("birthdate")
-        self.birth_date: datetime = datetime.strptime(birth_date, "%d-%m-%Y") if birth_date is not None else None
+        self.claims: dict = authorizer["claims"]
+        self._birth_date = _UNSET
+        self._age = _UNSET
+        self._stage = _UNSET
+        self._full_name = _UNSET
+
+    @property
+    def birth_date(self) -> datetime:
+        if self._birth_date is _UNSET:
+            birth_date = self.claims.get("birthdate")
+            if birth_date is not None:
+                birth_date = parse_birthdate(birth_date)
+                birth_date = datetime(birth_date.year, birth_date.month, birth_date.day)
+            self._birth_date = birth_date
+        return self._birth_date
 
     @property
     def is_beneficiary(self):
@@ -39,24 +73,26 @@ class Authorizer:
 
     @property
     def age(self):
-        if self.birth_date is None:
-            raise ValueError()
-        today = date.today()
-        return today.year - self.birth_date.year - (
-                    (today.month, today.day) < (self.birth_date.month, self.birth_date.day))
+        if self._age is _UNSET:
+            if self.birth_date is None:
+                raise ValueError()
+            self._age = calculate_age(self.birth_date)
+        return self._age
 
     @property
     def stage(self):
-        from core.services.beneficiaries import BeneficiariesService
-        return BeneficiariesService.calculate_stage(self.birth_date)
+        if self._stage is _UNSET:
+            self._stage = calculate_stage(self.birth_date)
+        return self._stage
 
     @property
     def full_name(self):
-        if self.middle_name is None:
-            return self.base_name
-        else:
-            names = [self.name, self.middle_name, self.family_name]
-        return ' '.join(names)
+        if self._full_name is _UNSET:
+            if self.middle_name is None:
+                self._full_name = self.base_name
+            else:
+                self._full_name = ' '.join([self.name, self.middle_name, self.family_name])
+        return self._full_name
 
     @property
     def base_name(self):
@@ -65,22 +101,61 @@ class Authorizer:
 
 
 class HTTPEvent:
+    """
+    API Gateway proxy event. The body, its JSON content and the authorizer are decoded on first access and cached
+    """
+    __slots__ = ('event', 'resource', 'path', 'method', 'headers', 'context', 'params', 'queryParams', '_body',
+                 '_json', '_authorizer')
+
     def __init__(self, event: dict):
-        self.body = event.get("body")
+        self.event = event
         self.resource: str = event.get("resource")
+        self.path: str = event.get("path")
         self.method: str = event.get("httpMethod")
         self.headers: dict = event.get("headers")
         self.context: dict = event.get("requestContext", {})
 
-        authorizer_data = self.context.get("authorizer")
-        self.authorizer = Authorizer(authorizer_data) if authorizer_data else None
-
         params = event.get("pathParameters", {})
         self.params: dict = {} if params is None else params
 
         query_params = event.get("queryStringParameters", {})
         self.queryParams: dict = {} if query_params is None else query_params
 
+        self._body = _UNSET
+        self._json = _UNSET
+        self._authorizer = _UNSET
+
+    @property
+    def body(self) -> str:
+        if self._body is _UNSET:
+            body = self.event.get("body")
+            if body is not None and self.event.get("isBase64Encoded"):
+                body = base64.b64decode(body).decode('utf-8')
+            self._body = body
+        return self._body
+
+    @property
+    def authorizer(self) -> Authorizer:
+        if self._authorizer is _UNSET:
+            authorizer_data = self.context.get("authorizer") if self.context is not None else None
+            self._authorizer = Authorizer(authorizer_data) if authorizer_data else None
+        return self._authorizer
+
+    def header(self, name: str, default: str = None) -> str:
+        """
+        Get a request header, ignoring the case of its name
+        """
+        if self.headers is None:
+            return default
+        value = self.headers.get(name)
+        if value is not None:
+            return value
+        name = name.lower()
+        for key, value in self.headers.items():
+            if key.lower() == name:
+                return value
+        return default
+
     @property
     def url(self) -> str:
         if self.headers is None or self.context is None:
@@ -89,10 +164,15 @@ class HTTPEvent:
 
     @property
     def json(self):
-        try:
-            return json.loads(self.body)
-        except JSONDecodeError:
-            return {}
+        """
+        JSON content of the body, parsed once; an empty dict when the body is missing or is not valid JSON
+        """
+        if self._json is _UNSET:
+            try:
+                self._json = json.loads(self.body) if self.body is not None else {}
+            except JSONDecodeError:
+                self._json = {}
+        return self._json
 
     def concat_url(self, *args):
         url = self.url
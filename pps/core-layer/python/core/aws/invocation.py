@@ -0,0 +1,46 @@
+import functools
+from contextlib import contextmanager
+from typing import Callable, List, Any
+
+_start_hooks: List[Callable[[dict, Any], None]] = []
+_end_hooks: List[Callable[[], None]] = []
+
+
+def on_start(hook: Callable[[dict, Any], None]):
+    """
+    Register a function called with the raw event and the Lambda context when an invocation starts
+    """
+    _start_hooks.append(hook)
+    return hook
+
+
+def on_end(hook: Callable[[], None]):
+    """
+    Register a function called when an invocation ends, even if the handler raised
+    """
+    _end_hooks.append(hook)
+    return hook
+
+
+@contextmanager
+def invocation(event: dict = None, context: Any = None):
+    for hook in _start_hooks:
+        hook(event, context)
+    try:
+        yield
+    finally:
+        for hook in reversed(_end_hooks):
+            hook()
+
+
+def lambda_handler(fn):
+    """
+    Decorator for Lambda entry points that runs the registered per-invocation hooks around the handler
+    """
+
+    @functools.wraps(fn)
+    def wrapper(event: dict, context: Any = None):
+        with invocation(event, context):
+            return fn(event, context)
+
+    return wrapper
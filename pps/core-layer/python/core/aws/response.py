@@ -1,34 +1,134 @@
+import base64
+import gzip
+import hashlib
 import json
+from datetime import date, datetime
 from decimal import Decimal
 
 from .errors import HTTPError, ERROR_CODES
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(o):
+    if isinstance(o, Decimal):
+        return int(o) if o == o.to_integral_value() else float(o)
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    # database results and records are serialized through their own as_dict, without an intermediate copy
+    as_dict = getattr(o, 'as_dict', None)
+    if as_dict is not None:
+        return as_dict()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class JSONEncoder(json.JSONEncoder):
+    """
+    Encoder for DynamoDB items: Decimals become ints or floats and dates ISO strings, at any depth
+    """
+    def default(self, o):
+        try:
+            return _default(o)
+        except TypeError:
+            return super().default(o)
+
+
+_encoder = JSONEncoder()
+_compact_encoder = JSONEncoder(separators=(',', ':'))
+
+
+def dumps(body, compact: bool = False) -> str:
+    """
+    Serialize a response body in a single pass. Compact output has no whitespace after the separators and is
+    written with orjson when it is installed
+    """
+    if compact and orjson is not None:
+        return orjson.dumps(body, default=_default, option=orjson.OPT_NON_STR_KEYS).decode()
+    return (_compact_encoder if compact else _encoder).encode(body)
+
+
+# bodies smaller than this are not worth the gzip header and the base64 overhead
+MIN_COMPRESSED_SIZE = 1024
+CONDITIONAL_METHODS = ('GET', 'HEAD')
+
+
+def generate_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """
+    Check an If-None-Match header against the ETag of the uncompressed body, ignoring the gzip suffix and weak tags
+    """
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*':
+            return True
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag.replace('-gzip"', '"') == etag:
+            return True
+    return False
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    for coding in accept_encoding.split(','):
+        name, _, params = coding.partition(';')
+        if name.strip().lower() in ('gzip', '*'):
+            quality = params.strip()
+            if not quality.startswith('q='):
+                return True
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+    return False
+
 
 class JSONResponse:
-    def __init__(self, body: dict, status: int = 200):
+    def __init__(self, body: dict, status: int = 200, compact: bool = False):
         self.body = body
         self.status = status
+        self.compact = compact
 
-    @staticmethod
-    def clean_for_json(item):
-        if type(item) is dict:
-            for key, value in item.items():
-                item[key] = JSONResponse.clean_for_json(value)
-        elif type(item) is Decimal:
-            if float(item) == int(item):
-                return int(item)
-            else:
-                return float(item)
-        return item
-
-    def as_dict(self):
-        return {
+    def as_dict(self, event=None):
+        """
+        Build the API Gateway proxy response. When the request event is given, successful responses carry a strong
+        ETag, return 304 for a matching If-None-Match and are gzip compressed if the client accepts it
+        """
+        body = dumps(self.body, self.compact)
+        response = {
             "statusCode": self.status,
             "headers": {
                 "Content-Type": "application/json"
             },
-            "body": json.dumps(JSONResponse.clean_for_json(self.body))
+            "body": body
         }
+        if event is None or self.status != 200:
+            return response
+
+        headers = response["headers"]
+        data = body.encode('utf-8')
+        etag = generate_etag(data)
+        accept_encoding = event.header("Accept-Encoding")
+        compress = accept_encoding is not None and len(data) >= MIN_COMPRESSED_SIZE and accepts_gzip(accept_encoding)
+        headers["ETag"] = etag[:-1] + '-gzip"' if compress else etag
+        headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = event.header("If-None-Match")
+        if if_none_match is not None and event.method in CONDITIONAL_METHODS and etag_matches(etag, if_none_match):
+            response["statusCode"] = 304
+            response["body"] = ""
+        elif compress:
+            headers["Content-Encoding"] = "gzip"
+            response["body"] = base64.b64encode(gzip.compress(data, mtime=0)).decode('ascii')
+            response["isBase64Encoded"] = True
+        return response
 
     @staticmethod
     def generate_error(code: HTTPError, message: str):
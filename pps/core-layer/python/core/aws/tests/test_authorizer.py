@@ -33,3 +33,10 @@ def beneficiary_authorizer():
 
 def test_age(beneficiary_authorizer: Authorizer):
     assert beneficiary_authorizer.age == 10
+
+
+def test_cached_names(beneficiary_authorizer: Authorizer):
+    assert beneficiary_authorizer.full_name == "Name Middle LastName"
+    assert beneficiary_authorizer.full_name is beneficiary_authorizer.full_name
+    assert beneficiary_authorizer.base_name == "Name LastName"
+    assert beneficiary_authorizer.username == "cognito-username"
@@ -0,0 +1,12 @@
+from .. import clients
+
+
+def test_shared_clients():
+    assert clients.resource('dynamodb') is clients.resource('dynamodb')
+    assert clients.client('cognito-idp') is clients.client('cognito-idp')
+    assert clients.resource('dynamodb').meta.client.meta.region_name == clients.REGION
+
+    timings = clients.timings()
+    assert 'session' in timings
+    assert 'resource:dynamodb' in timings
+    assert 'client:cognito-idp' in timings
@@ -0,0 +1,21 @@
+import base64
+
+from ..event import HTTPEvent
+
+
+def test_lazy_parsing():
+    event = HTTPEvent({
+        'httpMethod': 'POST',
+        'body': base64.b64encode('{"amount": 2}'.encode()).decode(),
+        'isBase64Encoded': True,
+        'requestContext': {'authorizer': {'claims': {'sub': 'u-sub', 'birthdate': 'not a date'}}}
+    })
+    assert event.body == '{"amount": 2}'
+    assert event.json is event.json and event.json == {'amount': 2}
+    assert event.authorizer is event.authorizer and event.authorizer.sub == 'u-sub'
+
+
+def test_missing_body():
+    event = HTTPEvent({'httpMethod': 'GET', 'requestContext': {}})
+    assert event.body is None and event.json == {} and event.authorizer is None
+    assert HTTPEvent({'body': 'not json'}).json == {}
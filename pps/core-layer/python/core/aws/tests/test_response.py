@@ -1,22 +1,56 @@
+import base64
+import gzip
+import json
+from datetime import date, datetime
 from decimal import Decimal
 
-from .. import JSONResponse
-
-
-def test_clean():
-    cleaned = JSONResponse.clean_for_json({
-        'a': Decimal('12.0'),
-        'b': Decimal('12.3'),
-        'c': 'qwerty',
-        'd': {
-            'c.a': Decimal('123'),
-            'c.b': 'asdf'
-        }
-    })
-    assert cleaned['a'] == 12 and type(cleaned['a']) is int
-    assert cleaned['b'] == 12.3 and type(cleaned['b']) is float
-    assert cleaned['c'] == 'qwerty'
-    assert cleaned['d'] == {
-        'c.a': 123,
-        'c.b': 'asdf'
+import pytest
+
+from .. import HTTPEvent, JSONResponse
+from ..response import dumps
+
+
+def test_as_dict():
+    body = {
+        'a': [Decimal('1'), {'b': Decimal('1.5')}],
+        'c': datetime(2020, 1, 2, 3, 4, 5),
+        'd': date(2020, 1, 2)
     }
+    response = JSONResponse(body).as_dict()
+    assert response['body'] == '{"a": [1, {"b": 1.5}], "c": "2020-01-02T03:04:05", "d": "2020-01-02"}'
+    assert type(body['a'][0]) is Decimal
+    compact = JSONResponse(body, compact=True).as_dict()
+    assert compact['body'] == '{"a":[1,{"b":1.5}],"c":"2020-01-02T03:04:05","d":"2020-01-02"}'
+    assert json.loads(compact['body']) == json.loads(response['body'])
+
+
+def test_dumps_unknown_type():
+    with pytest.raises(TypeError):
+        dumps({'a': object()})
+
+
+def test_conditional_get():
+    response = JSONResponse({'a': 1}).as_dict(HTTPEvent({'httpMethod': 'GET', 'headers': {}}))
+    etag = response['headers']['ETag']
+    assert etag.startswith('"') and response['body'] == '{"a": 1}'
+
+    event = HTTPEvent({'httpMethod': 'GET', 'headers': {'if-none-match': f'W/{etag}, "other"'}})
+    not_modified = JSONResponse({'a': 1}).as_dict(event)
+    assert not_modified['statusCode'] == 304 and not_modified['body'] == ''
+    assert not_modified['headers']['ETag'] == etag
+    assert JSONResponse({'a': 2}).as_dict(event)['statusCode'] == 200
+
+
+def test_compression():
+    body = {'items': [{'name': f'item {i}', 'price': Decimal(i)} for i in range(100)]}
+    event = HTTPEvent({'httpMethod': 'GET', 'headers': {'Accept-Encoding': 'br, gzip;q=0.8'}})
+    response = JSONResponse(body).as_dict(event)
+    assert response['isBase64Encoded'] and response['headers']['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(base64.b64decode(response['body'])).decode() == JSONResponse(body).as_dict()['body']
+    assert response['headers']['ETag'].endswith('-gzip"')
+
+    event = HTTPEvent({'httpMethod': 'GET', 'headers': {'Accept-Encoding': 'gzip;q=0',
+                                                        'If-None-Match': response['headers']['ETag']}})
+    assert JSONResponse(body).as_dict(event)['statusCode'] == 304
+    small = JSONResponse({'a': 1}).as_dict(HTTPEvent({'httpMethod': 'GET', 'headers': {'Accept-Encoding': 'gzip'}}))
+    assert 'isBase64Encoded' not in small
@@ -1,2 +1,16 @@
+from typing import TYPE_CHECKING
+
+from ..utils.lazy import lazy_exports
 from .db import db
-from .service import ModelService, ModelIndex
+
+if TYPE_CHECKING:
+    from .service import ModelService, ModelIndex
+    from .transaction import Transaction
+
+__all__ = ['db', 'ModelService', 'ModelIndex', 'Transaction']
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'ModelService': '.service',
+    'ModelIndex': '.service',
+    'Transaction': '.transaction'
+})
@@ -1,4 +1,12 @@
-from typing import Dict
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple, Any, Union, List
+
+from ..aws import invocation
+
+READ_OPERATIONS = ('GetItem', 'Query', 'Scan', 'BatchGetItem')
 
 
 class CapacityUnits:
@@ -8,17 +16,19 @@ class CapacityUnits:
         self.write = write
 
     @staticmethod
-    def from_dict(d: Dict):
-        return CapacityUnits(d['CapacityUnits'], d['ReadCapacityUnits'], d['WriteCapacityUnits'])
+    def from_dict(d: Optional[Dict]):
+        if d is None:
+            return None
+        return CapacityUnits(d.get('CapacityUnits', 0), d.get('ReadCapacityUnits'), d.get('WriteCapacityUnits'))
 
 
 class ConsumedCapacity:
     def __init__(self,
                  table_name: str,
                  total: CapacityUnits,
-                 table: CapacityUnits,
-                 local_secondary_indexes: CapacityUnits,
-                 global_secondary_indexes: CapacityUnits,
+                 table: Optional[CapacityUnits],
+                 local_secondary_indexes: Dict[str, CapacityUnits],
+                 global_secondary_indexes: Dict[str, CapacityUnits],
                  ):
         self.table_name = table_name
         self.total = total
@@ -26,6 +36,12 @@ class ConsumedCapacity:
         self.local_secondary_indexes = local_secondary_indexes
         self.global_secondary_indexes = global_secondary_indexes
 
+    @staticmethod
+    def _indexes_from_dict(d: Optional[Dict]) -> Dict[str, CapacityUnits]:
+        if d is None:
+            return {}
+        return {name: CapacityUnits.from_dict(units) for name, units in d.items()}
+
     @staticmethod
     def from_dict(d: Dict):
         if d is None:
@@ -34,6 +50,98 @@ class ConsumedCapacity:
             table_name=d['TableName'],
             total=CapacityUnits.from_dict(d),
             table=CapacityUnits.from_dict(d.get('Table')),
-            local_secondary_indexes=CapacityUnits.from_dict(d.get('LocalSecondaryIndexes')),
-            global_secondary_indexes=CapacityUnits.from_dict(d.get('GlobalSecondaryIndexes'))
+            local_secondary_indexes=ConsumedCapacity._indexes_from_dict(d.get('LocalSecondaryIndexes')),
+            global_secondary_indexes=ConsumedCapacity._indexes_from_dict(d.get('GlobalSecondaryIndexes'))
         )
+
+
+class CapacityAccumulator:
+    """
+    Sums the capacity consumed during one invocation by table and index. Capacity is only returned by DynamoDB
+    when mode is set, either to TOTAL or INDEXES, e.g. through the PPS_DB_CAPACITY environment variable
+    """
+
+    def __init__(self, mode: str = None):
+        self.mode = mode
+        self.function_name: Optional[str] = None
+        self.units: Dict[Tuple[str, Optional[str]], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        self.units = {}
+
+    def _add_units(self, table: str, index: Optional[str], units: CapacityUnits, is_read: bool):
+        read = units.read if units.read is not None else (units.all if is_read else 0)
+        write = units.write if units.write is not None else (0 if is_read else units.all)
+        with self._lock:
+            totals = self.units.setdefault((table, index), [0.0, 0.0])
+            totals[0] += read
+            totals[1] += write
+
+    def add(self, operation: str, consumed: Union[Dict, List[Dict], None]):
+        if consumed is None:
+            return
+        if isinstance(consumed, list):
+            for item in consumed:
+                self.add(operation, item)
+            return
+
+        is_read = operation in READ_OPERATIONS
+        capacity = ConsumedCapacity.from_dict(consumed)
+        sections = {**capacity.local_secondary_indexes, **capacity.global_secondary_indexes}
+        if capacity.table is None and len(sections) == 0:
+            self._add_units(capacity.table_name, None, capacity.total, is_read)
+            return
+        if capacity.table is not None:
+            self._add_units(capacity.table_name, None, capacity.table, is_read)
+        for index, units in sections.items():
+            self._add_units(capacity.table_name, index, units, is_read)
+
+    def metrics(self) -> List[dict]:
+        """
+        One CloudWatch embedded metric format record per table and index
+        """
+        timestamp = int(time.time() * 1000)
+        namespace = os.environ.get('PPS_METRICS_NAMESPACE', 'PPS')
+        dimensions = ['Table', 'Index'] + (['Function'] if self.function_name is not None else [])
+        records = []
+        for (table, index), (read, write) in self.units.items():
+            record = {
+                '_aws': {
+                    'Timestamp': timestamp,
+                    'CloudWatchMetrics': [{
+                        'Namespace': namespace,
+                        'Dimensions': [dimensions],
+                        'Metrics': [{'Name': 'ConsumedRCU', 'Unit': 'Count'},
+                                    {'Name': 'ConsumedWCU', 'Unit': 'Count'}]
+                    }]
+                },
+                'Table': table,
+                'Index': index if index is not None else '-',
+                'ConsumedRCU': read,
+                'ConsumedWCU': write
+            }
+            if self.function_name is not None:
+                record['Function'] = self.function_name
+            records.append(record)
+        return records
+
+    def emit(self):
+        for record in self.metrics():
+            print(json.dumps(record, separators=(',', ':')))
+
+
+capacity = CapacityAccumulator(os.environ.get('PPS_DB_CAPACITY'))
+
+
+@invocation.on_start
+def _reset_capacity(_event: dict, context: Any):
+    capacity.reset()
+    capacity.function_name = getattr(context, 'function_name', None)
+
+
+@invocation.on_end
+def _emit_capacity():
+    if capacity.mode is not None:
+        capacity.emit()
+    capacity.reset()
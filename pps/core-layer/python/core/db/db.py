@@ -1,14 +1,29 @@
-import boto3
-
 __all__ = ['db']
 
+import os
+
+from ..aws import clients
 from .model import create_model, AbstractModel
 
+# throttling and transient errors are retried by core.db.retry, which knows the invocation deadline
+# (max_attempts counts retries in botocore, total_max_attempts counts the first call too)
+clients.configure('dynamodb', retries={'mode': 'standard', 'total_max_attempts': 1})
+
 
 class Database:
-    def __init__(self):
-        self._db = boto3.resource('dynamodb', region_name='us-west-2')
-        self.Model: AbstractModel = create_model(self._db)
+    def __init__(self, backend: str = None):
+        self.Model: AbstractModel = create_model(self)
+        self.backend = backend if backend is not None else os.environ.get('PPS_DB_BACKEND', 'dynamodb')
+        self._memory = None
+
+    @property
+    def resource(self):
+        if self.backend == 'memory':
+            if self._memory is None:
+                from .memory import MemoryResource
+                self._memory = MemoryResource.from_environment()
+            return self._memory
+        return clients.resource('dynamodb')
 
 
 db = Database()
@@ -0,0 +1,60 @@
+import json
+import logging
+import os
+import random
+from typing import Any, Optional
+
+from ..aws import invocation
+
+logger = logging.getLogger('core.db')
+logger.setLevel(os.environ.get('PPS_DB_LOG_LEVEL', 'WARNING').upper())
+
+
+class DebugConfig:
+    """
+    Database logging settings. Per-call metrics are logged at INFO; raw responses are logged at DEBUG for a
+    sample of the calls and truncated to max_size characters
+    """
+    sample_rate: float = float(os.environ.get('PPS_DB_LOG_SAMPLE_RATE', '0.01'))
+    max_size: int = int(os.environ.get('PPS_DB_LOG_MAX_SIZE', '2048'))
+    request_id: Optional[str] = None
+
+
+def log_result(operation: str, table: str, result: dict, index: str = None):
+    """
+    Log compact metadata of a database response and, when sampled, a truncated copy of the raw payload
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
+
+    items = result.get('Items')
+    capacity = result.get('ConsumedCapacity')
+    metrics = {
+        'op': operation,
+        'table': table,
+        'index': index,
+        'count': result.get('Count', len(items) if items is not None else int('Item' in result)),
+        'scanned': result.get('ScannedCount'),
+        'more': 'LastEvaluatedKey' in result,
+        'capacity': capacity.get('CapacityUnits') if capacity is not None else None,
+        'request_id': DebugConfig.request_id
+    }
+    logger.info(json.dumps({key: value for key, value in metrics.items() if value is not None},
+                           separators=(',', ':')))
+
+    if logger.isEnabledFor(logging.DEBUG) and random.random() < DebugConfig.sample_rate:
+        payload = json.dumps(result, default=str, separators=(',', ':'))
+        if len(payload) > DebugConfig.max_size:
+            payload = payload[:DebugConfig.max_size] + '...'
+        logger.debug(json.dumps({'op': operation, 'table': table, 'request_id': DebugConfig.request_id,
+                                 'payload': payload}, separators=(',', ':')))
+
+
+@invocation.on_start
+def _set_request_id(_event: dict, context: Any):
+    DebugConfig.request_id = getattr(context, 'aws_request_id', None)
+
+
+@invocation.on_end
+def _clear_request_id():
+    DebugConfig.request_id = None
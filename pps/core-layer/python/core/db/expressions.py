@@ -0,0 +1,140 @@
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple, Optional
+
+RESERVED_KEYWORDS = ['name', 'unit', 'sub', 'user', 'group']
+
+UPDATE_SET = 'set'
+UPDATE_APPEND = 'append'
+UPDATE_ADD = 'add'
+UPDATE_CONDITION = 'condition'
+
+
+def clean_for_exp(text: str):
+    return text.replace('-', '_').replace('.', '_')
+
+
+def add_to_attribute_names(attribute: str, attribute_names: dict, prefix: str = None) -> str:
+    dot_splitted = attribute.split('.')
+    if len(dot_splitted) > 1:
+        exp = []
+        for attr in dot_splitted:
+            pref = '_'.join(exp).replace('#attr_', '')
+            exp.append(add_to_attribute_names(attr, attribute_names, pref))
+        name_exp = '.'.join(exp)
+    else:
+        name = (prefix + '_' if prefix else '') + attribute
+        name_exp = clean_for_exp(f"#attr_{name}")
+        attribute_names[name_exp] = attribute
+    return name_exp
+
+
+def value_placeholder(attribute: str) -> str:
+    return f":val_{attribute}".replace('-', '_').replace('.', '_')
+
+
+def replace_keyword_attributes(attributes: List[str]):
+    attr_expression = {}
+    for attr_idx in range(len(attributes)):
+        exp = attributes[attr_idx]
+        if exp in RESERVED_KEYWORDS or '-' in exp:
+            model_exp = f"#model_{exp}".replace('-', '_')
+            attr_expression[model_exp] = exp
+            exp = model_exp
+        attributes[attr_idx] = exp
+    if len(attr_expression) == 0:
+        attr_expression = None
+    return attr_expression
+
+
+class CompiledUpdate:
+    """
+    A rendered update expression for a given update shape, where only the values change between calls
+    """
+
+    def __init__(self, expression: Optional[str], condition: Optional[str], names: Dict[str, str],
+                 placeholders: Tuple[Tuple[str, str, str], ...]):
+        self.expression = expression
+        self.condition = condition
+        self.names = names
+        self.placeholders = placeholders
+
+    def bind(self, updates: dict = None, append_to: dict = None, add_to: dict = None,
+             condition_equals: dict = None) -> Dict[str, Any]:
+        sources = {
+            UPDATE_SET: updates,
+            UPDATE_APPEND: append_to,
+            UPDATE_ADD: add_to,
+            UPDATE_CONDITION: condition_equals
+        }
+        return {placeholder: sources[source][attribute] for source, attribute, placeholder in self.placeholders}
+
+
+def render_update(set_keys: Tuple[str, ...] = (), append_keys: Tuple[str, ...] = (), add_keys: Tuple[str, ...] = (),
+                  condition_keys: Tuple[str, ...] = ()) -> CompiledUpdate:
+    """
+    Render the UpdateExpression, ConditionExpression and ExpressionAttributeNames of an update shape. Shapes with
+    attribute paths that change per item, like the entries of a map keyed by user, are rendered with this directly:
+    they would never be reused from the compile_update cache and would only evict the shapes that are
+    """
+    names = {}
+    placeholders = []
+    update_expressions = []
+    for key in set_keys:
+        key_ = add_to_attribute_names(key, names)
+        value_ = value_placeholder(key)
+        placeholders.append((UPDATE_SET, key, value_))
+        update_expressions.append(f"{key_}={value_}")
+    for key in append_keys:
+        key_ = add_to_attribute_names(key, names)
+        value_ = value_placeholder(key)
+        placeholders.append((UPDATE_APPEND, key, value_))
+        update_expressions.append(f"{key_}=list_append({key_}, {value_})")
+    expression = "SET " + ', '.join(update_expressions) if len(update_expressions) > 0 else None
+
+    add_expressions = []
+    for key in add_keys:
+        key_ = add_to_attribute_names(key, names)
+        value_ = value_placeholder(key)
+        placeholders.append((UPDATE_ADD, key, value_))
+        add_expressions.append(f"{key_} {value_}")
+    if len(add_expressions) > 0:
+        expression = ("" if expression is None else expression + " ") + "ADD " + ', '.join(add_expressions)
+
+    eq_conditions = []
+    for key in condition_keys:
+        key_ = add_to_attribute_names(key, names)
+        value_ = value_placeholder(key + '_condition')
+        placeholders.append((UPDATE_CONDITION, key, value_))
+        eq_conditions.append(f"{key_} = {value_}")
+    condition = ' AND '.join(eq_conditions) if len(eq_conditions) > 0 else None
+
+    return CompiledUpdate(expression, condition, names, tuple(placeholders))
+
+
+@lru_cache(maxsize=256)
+def compile_update(set_keys: Tuple[str, ...] = (), append_keys: Tuple[str, ...] = (), add_keys: Tuple[str, ...] = (),
+                   condition_keys: Tuple[str, ...] = ()) -> CompiledUpdate:
+    """
+    Render an update shape once, for the shapes that repeat between calls
+    """
+    return render_update(set_keys, append_keys, add_keys, condition_keys)
+
+
+@lru_cache(maxsize=256)
+def compile_projection(attributes: Tuple[str, ...]) -> Tuple[str, Dict[str, str]]:
+    """
+    Render a ProjectionExpression using #attr_ names for every (possibly nested) attribute
+    """
+    names = {}
+    projection = ', '.join([add_to_attribute_names(attr, names) for attr in attributes])
+    return projection, names
+
+
+@lru_cache(maxsize=256)
+def compile_keyword_projection(attributes: Tuple[str, ...]) -> Tuple[str, Optional[Dict[str, str]]]:
+    """
+    Render a ProjectionExpression replacing only reserved or hyphenated attribute names with #model_ names
+    """
+    attributes = list(attributes)
+    names = replace_keyword_attributes(attributes)
+    return ', '.join(attributes), names
@@ -0,0 +1,112 @@
+from typing import Dict, List, Optional, Tuple, Any
+
+from ..aws import invocation
+from .results import GetResult
+from .types import DynamoDBKey
+
+
+def _is_covered(path: str, attributes: Optional[List[str]]) -> bool:
+    if attributes is None:
+        return True
+    return any(path == attribute or path.startswith(attribute + '.') for attribute in attributes)
+
+
+def merge_projections(*projections: Optional[List[str]]) -> Optional[List[str]]:
+    """
+    Merge projections into one without overlapping document paths. None stands for the whole item
+    """
+    merged = []
+    for projection in projections:
+        if projection is None:
+            return None
+        for path in projection:
+            if path not in merged:
+                merged.append(path)
+    return [path for path in merged if not any(path.startswith(other + '.') for other in merged)]
+
+
+def project(item: Optional[dict], attributes: Optional[List[str]]) -> Optional[dict]:
+    """
+    The given document paths of an item. The projected values are shared with the item, not copied
+    """
+    if item is None or attributes is None:
+        return item
+    projected = {}
+    for path in attributes:
+        source, target = item, projected
+        parts = path.split('.')
+        for part in parts[:-1]:
+            source = source.get(part) if isinstance(source, dict) else None
+            if source is None:
+                break
+            target = target.setdefault(part, {})
+        else:
+            if isinstance(source, dict) and parts[-1] in source:
+                target[parts[-1]] = source[parts[-1]]
+    return projected
+
+
+class _Entry:
+    def __init__(self, item: Optional[dict], attributes: Optional[List[str]]):
+        self.item = item
+        self.attributes = attributes
+
+    def covers(self, attributes: Optional[List[str]]) -> bool:
+        if attributes is None:
+            return self.attributes is None
+        return all(_is_covered(path, self.attributes) for path in attributes)
+
+
+class IdentityMap:
+    """
+    Request-scoped cache of the items read by primary key. Reads of the same key are served once, projections
+    of later reads are merged with the earlier ones, and writes through ModelIndex invalidate the key.
+    Results share the raw item with the cache instead of copying it: their item is a new cleaned copy that can be
+    modified, their as_dict must not be
+    """
+
+    def __init__(self):
+        self.active = False
+        self._entries: Dict[Tuple[str, tuple], _Entry] = {}
+
+    def begin(self):
+        self._entries = {}
+        self.active = True
+
+    def end(self):
+        self._entries = {}
+        self.active = False
+
+    @staticmethod
+    def _entry_key(model, key: DynamoDBKey):
+        return model.__table_name__, tuple(sorted(key.items()))
+
+    def get(self, model, key: DynamoDBKey, attributes: List[str] = None) -> GetResult:
+        entry_key = self._entry_key(model, key)
+        entry = self._entries.get(entry_key)
+        if entry is not None and entry.covers(attributes):
+            return GetResult({'Item': project(entry.item, attributes)})
+
+        read_attributes = attributes if entry is None else merge_projections(entry.attributes, attributes)
+        # entries keep the raw item, so cached results are cleaned lazily and as_dict still gives the Decimals
+        item = model.get(key=key, attributes=read_attributes).as_dict()
+        self._entries[entry_key] = _Entry(item, read_attributes)
+        if read_attributes != attributes:
+            item = project(item, attributes)
+        return GetResult({'Item': item})
+
+    def invalidate(self, model, key: DynamoDBKey):
+        self._entries.pop(self._entry_key(model, key), None)
+
+
+identity_map = IdentityMap()
+
+
+@invocation.on_start
+def _begin_identity_map(_event: dict, _context: Any):
+    identity_map.begin()
+
+
+@invocation.on_end
+def _end_identity_map():
+    identity_map.end()
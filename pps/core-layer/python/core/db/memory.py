@@ -0,0 +1,1174 @@
+import bisect
+import collections
+import math
+import os
+import re
+import threading
+import zlib
+from decimal import Decimal
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple, Iterable
+
+from boto3.dynamodb.conditions import ConditionBase, AttributeBase
+from boto3.dynamodb.types import Binary, TypeDeserializer
+from botocore.exceptions import ClientError
+
+_MISSING = object()
+_deserializer = TypeDeserializer()
+
+
+class _Top:
+    """
+    Compares greater than any key, used to find the end of a run of equal sort keys
+    """
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+_TOP = _Top()
+
+
+class MemoryExceptions:
+    """
+    Mirror of the client.exceptions namespace for the error codes the in-memory backend raises
+    """
+    ClientError = ClientError
+    ConditionalCheckFailedException = type('ConditionalCheckFailedException', (ClientError,), {})
+    TransactionCanceledException = type('TransactionCanceledException', (ClientError,), {})
+    ResourceNotFoundException = type('ResourceNotFoundException', (ClientError,), {})
+    ResourceInUseException = type('ResourceInUseException', (ClientError,), {})
+    ValidationException = type('ValidationException', (ClientError,), {})
+
+
+def _raise(code: str, message: str, operation: str, **extra):
+    raise getattr(MemoryExceptions, code)({'Error': {'Code': code, 'Message': message}, **extra}, operation)
+
+
+# Values
+
+def to_store(value):
+    """
+    Normalize a Python value the way boto3 serializes it: ints become Decimal and floats are rejected
+    """
+    t = type(value)
+    if t is str or t is bool or value is None or t is Decimal or t is Binary:
+        return value
+    if t is int:
+        return Decimal(value)
+    if t is float:
+        raise TypeError("Float types are not supported. Use Decimal types instead.")
+    if isinstance(value, dict):
+        return {key: to_store(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_store(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return {to_store(item) for item in value}
+    if isinstance(value, (bytes, bytearray)):
+        return Binary(value)
+    raise TypeError(f"Unsupported type {t} for value {value}")
+
+
+def _copy(value):
+    t = type(value)
+    if t is dict:
+        return {key: _copy(item) for key, item in value.items()}
+    if t is list:
+        return [_copy(item) for item in value]
+    if t is set:
+        return set(value)
+    return value
+
+
+def _type(value) -> str:
+    t = type(value)
+    if t is str:
+        return 'S'
+    if t is Decimal:
+        return 'N'
+    if t is bool:
+        return 'BOOL'
+    if value is None:
+        return 'NULL'
+    if t is dict:
+        return 'M'
+    if t is list:
+        return 'L'
+    if t is Binary:
+        return 'B'
+    if t is set:
+        first = next(iter(value), '')
+        return {'S': 'SS', 'N': 'NS', 'B': 'BS'}[_type(first)]
+    raise TypeError(f"Unsupported type {t}")
+
+
+def _size(value) -> int:
+    t = type(value)
+    if t is str:
+        return len(value.encode())
+    if t is Decimal:
+        return len(str(value)) // 2 + 1
+    if t is Binary:
+        return len(value.value)
+    if t is dict:
+        return 3 + sum(len(key) + _size(item) for key, item in value.items())
+    if t is list:
+        return 3 + sum(1 + _size(item) for item in value)
+    if t is set:
+        return sum(_size(item) for item in value)
+    return 1
+
+
+# Document paths
+
+_NAME_SEGMENT = re.compile(r'([^\[\]]+)|\[(\d+)\]')
+
+
+def _parse_name_path(name: str) -> Tuple:
+    path = []
+    for part in name.split('.'):
+        for key, index in _NAME_SEGMENT.findall(part):
+            path.append(key if key else int(index))
+    return tuple(path)
+
+
+def _get(item, path: Tuple):
+    value = item
+    for segment in path:
+        if type(segment) is int:
+            if type(value) is not list or segment >= len(value):
+                return _MISSING
+        elif type(value) is not dict or segment not in value:
+            return _MISSING
+        value = value[segment]
+    return value
+
+
+def _set(item: dict, path: Tuple, value):
+    parent = _get(item, path[:-1])
+    last = path[-1]
+    if type(last) is int and type(parent) is list:
+        if last < len(parent):
+            parent[last] = value
+        else:
+            parent.append(value)
+    elif type(last) is str and type(parent) is dict:
+        parent[last] = value
+    else:
+        _raise('ValidationException', "The document path provided in the update expression is invalid for update",
+               'UpdateItem')
+
+
+def _remove(item: dict, path: Tuple):
+    parent = _get(item, path[:-1])
+    last = path[-1]
+    if type(last) is int and type(parent) is list and last < len(parent):
+        del parent[last]
+    elif type(last) is str and type(parent) is dict:
+        parent.pop(last, None)
+
+
+def _project(item: dict, paths: Iterable[Tuple]) -> dict:
+    projected = {}
+    for path in paths:
+        value = _get(item, path)
+        if value is _MISSING:
+            continue
+        target = projected
+        for segment in path[:-1]:
+            if type(segment) is int:
+                break
+            target = target.setdefault(segment, {})
+        else:
+            target[path[-1]] = _copy(value)
+    return projected
+
+
+# Expressions
+
+_TOKEN = re.compile(r'\s*(?:(?P<number>\d+)|(?P<name>#\w+)|(?P<value>:\w+)|(?P<op><>|<=|>=|[=<>()\[\],.+-])'
+                    r'|(?P<word>[A-Za-z_]\w*))')
+_COMPARATORS = ('=', '<>', '<', '<=', '>', '>=')
+_CONDITION_FUNCTIONS = ('attribute_exists', 'attribute_not_exists', 'attribute_type', 'begins_with', 'contains')
+
+
+class _Parser:
+    """
+    Recursive descent parser of condition, key condition, update and projection expressions. Attribute names are
+    resolved while parsing, while value placeholders are kept as references to be bound on evaluation
+    """
+
+    def __init__(self, text: str, names: Dict[str, str]):
+        self.names = names
+        self.tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            match = _TOKEN.match(text, position)
+            if match is None or match.end() == position:
+                raise ValueError(f"Invalid expression: {text}")
+            self.tokens.append((match.lastgroup, match.group(match.lastgroup)))
+            position = match.end()
+        self.position = 0
+
+    def peek(self, offset: int = 0) -> Tuple[Optional[str], Optional[str]]:
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def next(self) -> Tuple[str, str]:
+        token = self.peek()
+        if token[0] is None:
+            raise ValueError("Unexpected end of expression")
+        self.position += 1
+        return token
+
+    def expect(self, text: str):
+        kind, value = self.next()
+        if value != text:
+            raise ValueError(f"Expected '{text}' but found '{value}'")
+
+    def keyword(self, *words: str) -> Optional[str]:
+        kind, value = self.peek()
+        if kind == 'word' and value.upper() in words:
+            self.position += 1
+            return value.upper()
+        return None
+
+    def done(self) -> bool:
+        return self.position >= len(self.tokens)
+
+    def path(self) -> Tuple:
+        segments = [self.segment()]
+        while True:
+            kind, value = self.peek()
+            if value == '.':
+                self.next()
+                segments.append(self.segment())
+            elif value == '[':
+                self.next()
+                kind, number = self.next()
+                if kind != 'number':
+                    raise ValueError(f"Invalid list index {number}")
+                segments.append(int(number))
+                self.expect(']')
+            else:
+                return tuple(segments)
+
+    def segment(self) -> str:
+        kind, value = self.next()
+        if kind == 'name':
+            if value not in self.names:
+                raise ValueError(f"Undefined attribute name {value}")
+            return self.names[value]
+        if kind == 'word':
+            return value
+        raise ValueError(f"Expected an attribute name but found '{value}'")
+
+    def operand(self):
+        kind, value = self.peek()
+        if kind == 'value':
+            self.next()
+            return 'ref', value
+        if kind == 'word' and value.lower() == 'size' and self.peek(1)[1] == '(':
+            self.position += 2
+            path = self.path()
+            self.expect(')')
+            return 'size', ('path', path)
+        return 'path', self.path()
+
+    def condition(self):
+        node = self.conjunction()
+        while self.keyword('OR'):
+            node = ('or', node, self.conjunction())
+        return node
+
+    def conjunction(self):
+        node = self.negation()
+        while self.keyword('AND'):
+            node = ('and', node, self.negation())
+        return node
+
+    def negation(self):
+        if self.keyword('NOT'):
+            return 'not', self.negation()
+        return self.comparison()
+
+    def comparison(self):
+        kind, value = self.peek()
+        if value == '(':
+            self.next()
+            node = self.condition()
+            self.expect(')')
+            return node
+        if kind == 'word' and value.lower() in _CONDITION_FUNCTIONS and self.peek(1)[1] == '(':
+            self.position += 2
+            arguments = [self.operand()]
+            while self.peek()[1] == ',':
+                self.next()
+                arguments.append(self.operand())
+            self.expect(')')
+            return 'func', value.lower(), tuple(arguments)
+
+        left = self.operand()
+        kind, value = self.peek()
+        if value in _COMPARATORS:
+            self.next()
+            return 'cmp', value, left, self.operand()
+        if self.keyword('BETWEEN'):
+            low = self.operand()
+            if self.keyword('AND') is None:
+                raise ValueError("Expected AND in BETWEEN")
+            return 'between', left, low, self.operand()
+        if self.keyword('IN'):
+            self.expect('(')
+            options = [self.operand()]
+            while self.peek()[1] == ',':
+                self.next()
+                options.append(self.operand())
+            self.expect(')')
+            return 'in', left, tuple(options)
+        raise ValueError(f"Unexpected token '{value}'")
+
+    def set_operand(self):
+        kind, value = self.peek()
+        if kind == 'word' and self.peek(1)[1] == '(' and value.lower() in ('list_append', 'if_not_exists'):
+            self.position += 2
+            function = value.lower()
+            first = ('path', self.path()) if function == 'if_not_exists' else self.set_operand()
+            self.expect(',')
+            second = self.set_operand()
+            self.expect(')')
+            return function, first, second
+        return self.operand()
+
+    def set_value(self):
+        node = self.set_operand()
+        kind, value = self.peek()
+        if value in ('+', '-'):
+            self.next()
+            return value, node, self.set_operand()
+        return node
+
+    def update(self) -> Tuple:
+        actions = []
+        while not self.done():
+            clause = self.keyword('SET', 'REMOVE', 'ADD', 'DELETE')
+            if clause is None:
+                raise ValueError(f"Unexpected token '{self.peek()[1]}' in update expression")
+            while True:
+                path = self.path()
+                if clause == 'SET':
+                    self.expect('=')
+                    actions.append((clause, path, self.set_value()))
+                elif clause == 'REMOVE':
+                    actions.append((clause, path, None))
+                else:
+                    actions.append((clause, path, self.operand()))
+                if self.peek()[1] != ',':
+                    break
+                self.next()
+        return tuple(actions)
+
+    def projection(self) -> Tuple:
+        paths = [self.path()]
+        while self.peek()[1] == ',':
+            self.next()
+            paths.append(self.path())
+        return tuple(paths)
+
+
+@lru_cache(maxsize=1024)
+def _parse(kind: str, text: str, names: Tuple[Tuple[str, str], ...]):
+    parser = _Parser(text, dict(names))
+    node = getattr(parser, kind)()
+    if not parser.done():
+        raise ValueError(f"Unexpected token '{parser.peek()[1]}' in expression {text}")
+    return node
+
+
+def parse(kind: str, text: str, names: Optional[Dict[str, str]]):
+    try:
+        return _parse(kind, text, tuple(sorted((names or {}).items())))
+    except ValueError as e:
+        _raise('ValidationException', f"Invalid {kind} expression: {e}", kind)
+
+
+def _from_operand(value):
+    if isinstance(value, ConditionBase):
+        return from_condition(value)
+    if isinstance(value, AttributeBase):
+        return 'path', _parse_name_path(value.name)
+    return 'value', to_store(value)
+
+
+def from_condition(condition):
+    """
+    Translate a boto3 condition object (Key, Attr and their combinations) into the parsed expression tree
+    """
+    expression = condition.get_expression()
+    operator, values = expression['operator'], expression['values']
+    if operator in ('AND', 'OR'):
+        return operator.lower(), from_condition(values[0]), from_condition(values[1])
+    if operator == 'NOT':
+        return 'not', from_condition(values[0])
+    if operator in _COMPARATORS:
+        return 'cmp', operator, _from_operand(values[0]), _from_operand(values[1])
+    if operator == 'BETWEEN':
+        return 'between', _from_operand(values[0]), _from_operand(values[1]), _from_operand(values[2])
+    if operator == 'IN':
+        return 'in', _from_operand(values[0]), tuple(_from_operand(value) for value in values[1])
+    if operator == 'size':
+        return 'size', _from_operand(values[0])
+    if operator in _CONDITION_FUNCTIONS:
+        return 'func', operator, tuple(_from_operand(value) for value in values)
+    raise ValueError(f"Unsupported condition operator {operator}")
+
+
+def _condition(expression, names: Optional[Dict[str, str]], kind: str = 'condition'):
+    if expression is None:
+        return None
+    if isinstance(expression, str):
+        return parse(kind, expression, names)
+    return from_condition(expression)
+
+
+def _value(node, item: dict, values: Dict[str, Any]):
+    kind = node[0]
+    if kind == 'path':
+        return _get(item, node[1])
+    if kind == 'ref':
+        if node[1] not in values:
+            _raise('ValidationException', f"Undefined attribute value {node[1]}", 'Expression')
+        return values[node[1]]
+    if kind == 'value':
+        return node[1]
+    if kind == 'size':
+        value = _value(node[1], item, values)
+        if value is _MISSING:
+            return _MISSING
+        if type(value) is str:
+            return Decimal(len(value))
+        if type(value) is Binary:
+            return Decimal(len(value.value))
+        if type(value) in (dict, list, set):
+            return Decimal(len(value))
+        return _MISSING
+    if kind == 'if_not_exists':
+        value = _get(item, node[1][1])
+        return _value(node[2], item, values) if value is _MISSING else value
+    if kind == 'list_append':
+        first, second = _value(node[1], item, values), _value(node[2], item, values)
+        if type(first) is not list or type(second) is not list:
+            _raise('ValidationException', "An operand in the update expression has an incorrect data type",
+                   'UpdateItem')
+        return first + second
+    if kind in ('+', '-'):
+        first, second = _value(node[1], item, values), _value(node[2], item, values)
+        if type(first) is not Decimal or type(second) is not Decimal:
+            _raise('ValidationException', "An operand in the update expression has an incorrect data type",
+                   'UpdateItem')
+        return first + second if kind == '+' else first - second
+    raise ValueError(f"Unknown operand {kind}")
+
+
+def _compare(operator: str, first, second) -> bool:
+    if first is _MISSING or second is _MISSING:
+        return operator == '<>'
+    same_type = _type(first) == _type(second)
+    if operator == '=':
+        return same_type and first == second
+    if operator == '<>':
+        return not same_type or first != second
+    if not same_type or type(first) not in (str, Decimal):
+        return False
+    if operator == '<':
+        return first < second
+    if operator == '<=':
+        return first <= second
+    if operator == '>':
+        return first > second
+    return first >= second
+
+
+def evaluate(node, item: dict, values: Dict[str, Any]) -> bool:
+    kind = node[0]
+    if kind == 'and':
+        return evaluate(node[1], item, values) and evaluate(node[2], item, values)
+    if kind == 'or':
+        return evaluate(node[1], item, values) or evaluate(node[2], item, values)
+    if kind == 'not':
+        return not evaluate(node[1], item, values)
+    if kind == 'cmp':
+        return _compare(node[1], _value(node[2], item, values), _value(node[3], item, values))
+    if kind == 'between':
+        value = _value(node[1], item, values)
+        return _compare('>=', value, _value(node[2], item, values)) and \
+            _compare('<=', value, _value(node[3], item, values))
+    if kind == 'in':
+        value = _value(node[1], item, values)
+        return any(_compare('=', value, _value(option, item, values)) for option in node[2])
+    if kind == 'func':
+        function, arguments = node[1], node[2]
+        value = _value(arguments[0], item, values)
+        if function == 'attribute_exists':
+            return value is not _MISSING
+        if function == 'attribute_not_exists':
+            return value is _MISSING
+        if value is _MISSING:
+            return False
+        operand = _value(arguments[1], item, values)
+        if function == 'attribute_type':
+            return _type(value) == operand
+        if function == 'begins_with':
+            return type(value) is type(operand) and type(value) is str and value.startswith(operand)
+        if function == 'contains':
+            if type(value) is str:
+                return type(operand) is str and operand in value
+            if type(value) in (set, list):
+                return any(_compare('=', element, operand) for element in value)
+            return False
+    raise ValueError(f"Unknown condition {kind}")
+
+
+# Storage
+
+class _Index:
+    """
+    Sorted (sort key, item key) entries per partition value, for the table itself or a secondary index
+    """
+
+    def __init__(self, name: Optional[str], hash_key: str, range_key: Optional[str], projection: dict = None):
+        self.name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        projection = projection or {'ProjectionType': 'ALL'}
+        self.projection_type = projection.get('ProjectionType', 'ALL')
+        self.non_key_attributes = tuple(projection.get('NonKeyAttributes', ()))
+        self.partitions: Dict[Any, list] = {}
+
+    def entry(self, key: tuple, item: dict) -> Optional[tuple]:
+        if self.hash_key not in item or (self.range_key is not None and self.range_key not in item):
+            return None
+        return item[self.hash_key], (item[self.range_key] if self.range_key is not None else None, key)
+
+    def add(self, key: tuple, item: dict):
+        entry = self.entry(key, item)
+        if entry is not None:
+            bisect.insort(self.partitions.setdefault(entry[0], []), entry[1])
+
+    def remove(self, key: tuple, item: dict):
+        entry = self.entry(key, item)
+        if entry is None:
+            return
+        entries = self.partitions.get(entry[0], [])
+        position = bisect.bisect_left(entries, entry[1])
+        if position < len(entries) and entries[position] == entry[1]:
+            del entries[position]
+            if len(entries) == 0:
+                del self.partitions[entry[0]]
+
+
+class MemoryTable:
+    """
+    In-memory stand-in for a boto3 Table resource
+    """
+
+    def __init__(self, resource: 'MemoryResource', name: str):
+        self._resource = resource
+        self.name = name
+        self.table_name = name
+        self.meta = SimpleNamespace(client=resource.meta.client)
+
+    @property
+    def _data(self) -> '_TableData':
+        data = self._resource.tables.get(self.name)
+        if data is None:
+            _raise('ResourceNotFoundException', f"Requested resource not found: Table: {self.name} not found",
+                   'DescribeTable')
+        return data
+
+    def put_item(self, **kwargs):
+        with self._resource.lock:
+            self._resource.calls['PutItem'] += 1
+            return self._data.put_item(**kwargs)
+
+    def get_item(self, **kwargs):
+        with self._resource.lock:
+            self._resource.calls['GetItem'] += 1
+            return self._data.get_item(**kwargs)
+
+    def update_item(self, **kwargs):
+        with self._resource.lock:
+            self._resource.calls['UpdateItem'] += 1
+            return self._data.update_item(**kwargs)
+
+    def delete_item(self, **kwargs):
+        with self._resource.lock:
+            self._resource.calls['DeleteItem'] += 1
+            return self._data.delete_item(**kwargs)
+
+    def query(self, **kwargs):
+        with self._resource.lock:
+            self._resource.calls['Query'] += 1
+            return self._data.query(**kwargs)
+
+    def scan(self, **kwargs):
+        with self._resource.lock:
+            self._resource.calls['Scan'] += 1
+            return self._data.scan(**kwargs)
+
+
+class _TableData:
+    def __init__(self, name: str, key_schema: List[dict], global_indexes: List[dict] = None,
+                 local_indexes: List[dict] = None):
+        self.name = name
+        hash_key, range_key = self._keys(key_schema)
+        self.primary = _Index(None, hash_key, range_key)
+        self.indexes: Dict[str, _Index] = {}
+        self.items: Dict[tuple, dict] = {}
+        for index in (global_indexes or []) + (local_indexes or []):
+            self.add_index(index['IndexName'], index['KeySchema'], index.get('Projection'))
+
+    @staticmethod
+    def _keys(key_schema: List[dict]) -> Tuple[str, Optional[str]]:
+        hash_key = next(key['AttributeName'] for key in key_schema if key['KeyType'] == 'HASH')
+        range_key = next((key['AttributeName'] for key in key_schema if key['KeyType'] == 'RANGE'), None)
+        return hash_key, range_key
+
+    def add_index(self, name: str, key_schema: List[dict], projection: dict = None):
+        hash_key, range_key = self._keys(key_schema)
+        index = _Index(name, hash_key, range_key, projection)
+        for key, item in self.items.items():
+            index.add(key, item)
+        self.indexes[name] = index
+
+    @property
+    def key_names(self) -> Tuple[str, ...]:
+        return tuple(name for name in (self.primary.hash_key, self.primary.range_key) if name is not None)
+
+    def _key(self, key: dict, operation: str) -> tuple:
+        if set(key) != set(self.key_names):
+            _raise('ValidationException', "The provided key element does not match the schema", operation)
+        key = to_store(key)
+        return key[self.primary.hash_key], key.get(self.primary.range_key) if self.primary.range_key else None
+
+    def _item_key(self, item: dict) -> dict:
+        return {name: item[name] for name in self.key_names}
+
+    def _write(self, key: tuple, old: Optional[dict], new: Optional[dict]) -> List[str]:
+        changed = []
+        for index in [self.primary, *self.indexes.values()]:
+            old_entry = index.entry(key, old) if old is not None else None
+            new_entry = index.entry(key, new) if new is not None else None
+            if old_entry is not None:
+                index.remove(key, old)
+            if new_entry is not None:
+                index.add(key, new)
+            if index.name is not None and (old_entry is not None or new_entry is not None):
+                changed.append(index.name)
+        if new is None:
+            self.items.pop(key, None)
+        else:
+            self.items[key] = new
+        return changed
+
+    def _check(self, operation: str, item: Optional[dict], condition, names, values):
+        node = _condition(condition, names)
+        if node is not None and not evaluate(node, item if item is not None else {}, values):
+            _raise('ConditionalCheckFailedException', "The conditional request failed", operation)
+
+    @staticmethod
+    def _values(values: Optional[dict]) -> dict:
+        return to_store(values) if values is not None else {}
+
+    def _capacity(self, mode: Optional[str], units: float, indexes: Dict[str, float] = None) -> Optional[dict]:
+        if mode is None or mode == 'NONE':
+            return None
+        indexes = indexes or {}
+        capacity = {'TableName': self.name, 'CapacityUnits': units + sum(indexes.values())}
+        if mode == 'INDEXES':
+            capacity['Table'] = {'CapacityUnits': units}
+            if len(indexes) > 0:
+                capacity['GlobalSecondaryIndexes'] = {name: {'CapacityUnits': value}
+                                                      for name, value in indexes.items()}
+        return capacity
+
+    def _write_capacity(self, mode: Optional[str], old: Optional[dict], new: Optional[dict],
+                        indexes: List[str]) -> Optional[dict]:
+        if mode is None:
+            return None
+        size = max(_size(old) if old is not None else 0, _size(new) if new is not None else 0)
+        units = float(max(1, math.ceil(size / 1024)))
+        return self._capacity(mode, units, {name: units for name in indexes})
+
+    @staticmethod
+    def _read_units(size: int) -> float:
+        return max(1, math.ceil(size / 4096)) * 0.5
+
+    @staticmethod
+    def _response(response: dict, capacity: Optional[dict]) -> dict:
+        if capacity is not None:
+            response['ConsumedCapacity'] = capacity
+        return response
+
+    def _returned(self, return_values: str, old: Optional[dict], new: Optional[dict],
+                  updated_paths: List[Tuple] = None) -> dict:
+        if return_values in (None, 'NONE'):
+            return {}
+        if return_values == 'ALL_OLD':
+            return {'Attributes': _copy(old)} if old is not None else {}
+        if return_values == 'ALL_NEW':
+            return {'Attributes': _copy(new)}
+        source = old if return_values == 'UPDATED_OLD' else new
+        attributes = _project(source or {}, updated_paths or [])
+        return {'Attributes': attributes} if len(attributes) > 0 else {}
+
+    # single item operations
+
+    def put_item(self, Item: dict, ConditionExpression=None, ExpressionAttributeNames=None,
+                 ExpressionAttributeValues=None, ReturnValues=None, ReturnConsumedCapacity=None, **_):
+        item = to_store(Item)
+        for name in self.key_names:
+            if name not in item:
+                _raise('ValidationException',
+                       f"One or more parameter values were invalid: Missing the key {name} in the item", 'PutItem')
+        key = self._key(self._item_key(item), 'PutItem')
+        old = self.items.get(key)
+        self._check('PutItem', old, ConditionExpression, ExpressionAttributeNames,
+                    self._values(ExpressionAttributeValues))
+        indexes = self._write(key, old, item)
+        return self._response(self._returned(ReturnValues, old, item),
+                              self._write_capacity(ReturnConsumedCapacity, old, item, indexes))
+
+    def get_item(self, Key: dict, ProjectionExpression: str = None, ExpressionAttributeNames=None,
+                 AttributesToGet: List[str] = None, ReturnConsumedCapacity=None, **_):
+        item = self.items.get(self._key(Key, 'GetItem'))
+        capacity = self._capacity(ReturnConsumedCapacity, self._read_units(_size(item) if item else 0))
+        if item is None:
+            return self._response({}, capacity)
+        return self._response({'Item': self._select(item, ProjectionExpression, ExpressionAttributeNames,
+                                                    AttributesToGet)}, capacity)
+
+    def update_item(self, Key: dict, UpdateExpression: str, ConditionExpression=None,
+                    ExpressionAttributeNames=None, ExpressionAttributeValues=None, ReturnValues=None,
+                    ReturnConsumedCapacity=None, **_):
+        key = self._key(Key, 'UpdateItem')
+        old = self.items.get(key)
+        values = self._values(ExpressionAttributeValues)
+        self._check('UpdateItem', old, ConditionExpression, ExpressionAttributeNames, values)
+        new, paths = self._apply_update(old if old is not None else to_store(Key), UpdateExpression,
+                                        ExpressionAttributeNames, values)
+        indexes = self._write(key, old, new)
+        return self._response(self._returned(ReturnValues, old, new, paths),
+                              self._write_capacity(ReturnConsumedCapacity, old, new, indexes))
+
+    def _apply_update(self, item: dict, expression: str, names, values) -> Tuple[dict, List[Tuple]]:
+        actions = parse('update', expression, names)
+        resolved = []
+        for clause, path, operand in actions:
+            if path[0] in self.key_names:
+                _raise('ValidationException', f"Cannot update attribute {path[0]}. This attribute is part of the key",
+                       'UpdateItem')
+            value = None
+            if operand is not None:
+                value = _value(operand, item, values)
+                if value is _MISSING:
+                    _raise('ValidationException',
+                           "The provided expression refers to an attribute that does not exist in the item",
+                           'UpdateItem')
+            resolved.append((clause, path, value))
+
+        new = _copy(item)
+        for clause, path, value in resolved:
+            if clause == 'SET':
+                _set(new, path, _copy(value))
+            elif clause == 'REMOVE':
+                _remove(new, path)
+            elif clause == 'ADD':
+                current = _get(new, path)
+                if current is _MISSING:
+                    _set(new, path, _copy(value))
+                elif type(current) is Decimal and type(value) is Decimal:
+                    _set(new, path, current + value)
+                elif type(current) is set and type(value) is set:
+                    _set(new, path, current | value)
+                else:
+                    _raise('ValidationException', "An operand in the update expression has an incorrect data type",
+                           'UpdateItem')
+            elif clause == 'DELETE':
+                current = _get(new, path)
+                if type(current) is set and type(value) is set:
+                    remaining = current - value
+                    if len(remaining) > 0:
+                        _set(new, path, remaining)
+                    else:
+                        _remove(new, path)
+        return new, [path for _, path, _ in resolved]
+
+    def delete_item(self, Key: dict, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues=None, ReturnConsumedCapacity=None, **_):
+        key = self._key(Key, 'DeleteItem')
+        old = self.items.get(key)
+        self._check('DeleteItem', old, ConditionExpression, ExpressionAttributeNames,
+                    self._values(ExpressionAttributeValues))
+        indexes = self._write(key, old, None) if old is not None else []
+        return self._response(self._returned(ReturnValues, old, None),
+                              self._write_capacity(ReturnConsumedCapacity, old, None, indexes))
+
+    # reads
+
+    def _select(self, item: dict, projection: Optional[str], names, attributes_to_get: List[str] = None) -> dict:
+        if projection is not None:
+            return _project(item, parse('projection', projection, names))
+        if attributes_to_get is not None:
+            return _project(item, [(name,) for name in attributes_to_get])
+        return _copy(item)
+
+    def _index(self, name: Optional[str], operation: str) -> _Index:
+        if name is None:
+            return self.primary
+        index = self.indexes.get(name)
+        if index is None:
+            _raise('ValidationException', f"The table does not have the specified index: {name}", operation)
+        return index
+
+    def _index_item(self, index: _Index, item: dict) -> dict:
+        if index.name is None or index.projection_type == 'ALL':
+            return item
+        names = set(self.key_names) | {index.hash_key, index.range_key}
+        if index.projection_type == 'INCLUDE':
+            names |= set(index.non_key_attributes)
+        return {name: value for name, value in item.items() if name in names}
+
+    def _last_key(self, index: _Index, item: dict) -> dict:
+        names = set(self.key_names) | ({index.hash_key, index.range_key} - {None})
+        return {name: item[name] for name in names}
+
+    def _page(self, index: _Index, keys: Iterable[tuple], operation: str, limit: Optional[int], filter_expression,
+              projection: Optional[str], names, values: dict, select: Optional[str], capacity_mode: Optional[str],
+              attributes_to_get: List[str] = None) -> dict:
+        node = _condition(filter_expression, names)
+        items, scanned, size, last, more = [], 0, 0, None, False
+        for key in keys:
+            if limit is not None and scanned >= limit:
+                more = True
+                break
+            last = self.items[key]
+            item = self._index_item(index, last)
+            scanned += 1
+            size += _size(item)
+            if node is None or evaluate(node, item, values):
+                items.append(item)
+
+        response = {'Count': len(items), 'ScannedCount': scanned}
+        if select != 'COUNT':
+            response['Items'] = [self._select(item, projection, names, attributes_to_get) for item in items]
+        if more:
+            response['LastEvaluatedKey'] = self._last_key(index, last)
+        units = self._read_units(size)
+        capacity = self._capacity(capacity_mode, units if index.name is None else 0,
+                                  {index.name: units} if index.name is not None else None)
+        return self._response(response, capacity)
+
+    def _key_range(self, index: _Index, entries: list, node, values: dict) -> Tuple[int, int]:
+        if node is None:
+            return 0, len(entries)
+        low, high = 0, len(entries)
+        if node[0] == 'cmp':
+            operator, value = node[1], _value(node[3], {}, values)
+            if operator == '=':
+                low, high = bisect.bisect_left(entries, (value,)), bisect.bisect_right(entries, (value, _TOP))
+            elif operator == '<':
+                high = bisect.bisect_left(entries, (value,))
+            elif operator == '<=':
+                high = bisect.bisect_right(entries, (value, _TOP))
+            elif operator == '>':
+                low = bisect.bisect_right(entries, (value, _TOP))
+            elif operator == '>=':
+                low = bisect.bisect_left(entries, (value,))
+        elif node[0] == 'between':
+            low = bisect.bisect_left(entries, (_value(node[2], {}, values),))
+            high = bisect.bisect_right(entries, (_value(node[3], {}, values), _TOP))
+        elif node[0] == 'func' and node[1] == 'begins_with':
+            prefix = _value(node[2][1], {}, values)
+            low = high = bisect.bisect_left(entries, (prefix,))
+            while high < len(entries) and type(entries[high][0]) is str and entries[high][0].startswith(prefix):
+                high += 1
+        return low, high
+
+    def query(self, KeyConditionExpression, IndexName: str = None, FilterExpression=None,
+              ProjectionExpression: str = None, ExpressionAttributeNames=None, ExpressionAttributeValues=None,
+              Limit: int = None, ExclusiveStartKey: dict = None, ScanIndexForward: bool = True, Select: str = None,
+              ReturnConsumedCapacity=None, **_):
+        index = self._index(IndexName, 'Query')
+        values = self._values(ExpressionAttributeValues)
+        node = _condition(KeyConditionExpression, ExpressionAttributeNames, 'condition')
+        conditions = []
+        while node[0] == 'and':
+            conditions.append(node[2])
+            node = node[1]
+        conditions.append(node)
+
+        hash_value, sort_node = _MISSING, None
+        for condition in conditions:
+            target = {'cmp': lambda: condition[2], 'between': lambda: condition[1],
+                      'func': lambda: condition[2][0]}.get(condition[0], lambda: None)()
+            if target == ('path', (index.hash_key,)) and condition[0] == 'cmp' and condition[1] == '=':
+                hash_value = _value(condition[3], {}, values)
+            elif target == ('path', (index.range_key,)):
+                sort_node = condition
+            else:
+                _raise('ValidationException', "Query key condition not supported", 'Query')
+        if hash_value is _MISSING:
+            _raise('ValidationException', "Query condition missed key schema element", 'Query')
+
+        entries = index.partitions.get(hash_value, [])
+        low, high = self._key_range(index, entries, sort_node, values)
+        if ExclusiveStartKey is not None:
+            start = to_store(ExclusiveStartKey)
+            start_entry = index.entry(self._key(self._item_key(start), 'Query'), start)[1]
+            if ScanIndexForward:
+                low = max(low, bisect.bisect_right(entries, start_entry))
+            else:
+                high = min(high, bisect.bisect_left(entries, start_entry))
+        selected = entries[low:high] if ScanIndexForward else entries[low:high][::-1]
+        return self._page(index, [key for _, key in selected], 'Query', Limit, FilterExpression,
+                          ProjectionExpression, ExpressionAttributeNames, values, Select, ReturnConsumedCapacity)
+
+    def scan(self, IndexName: str = None, FilterExpression=None, ProjectionExpression: str = None,
+             ExpressionAttributeNames=None, ExpressionAttributeValues=None, Limit: int = None,
+             ExclusiveStartKey: dict = None, Segment: int = None, TotalSegments: int = None, Select: str = None,
+             AttributesToGet: List[str] = None, ReturnConsumedCapacity=None, **_):
+        index = self._index(IndexName, 'Scan')
+        keys = []
+        for hash_value, entries in index.partitions.items():
+            if TotalSegments is not None and zlib.crc32(repr(hash_value).encode()) % TotalSegments != Segment:
+                continue
+            keys.extend(key for _, key in entries)
+        if ExclusiveStartKey is not None:
+            start = to_store(ExclusiveStartKey)
+            start_key = self._key(self._item_key(start), 'Scan')
+            keys = keys[keys.index(start_key) + 1:] if start_key in keys else []
+        return self._page(index, keys, 'Scan', Limit, FilterExpression, ProjectionExpression,
+                          ExpressionAttributeNames, self._values(ExpressionAttributeValues), Select,
+                          ReturnConsumedCapacity, AttributesToGet)
+
+
+class MemoryClient:
+    """
+    Low-level client of the in-memory backend. Only the calls made through a client by this package are supported
+    """
+
+    exceptions = MemoryExceptions
+
+    def __init__(self, resource: 'MemoryResource'):
+        self._resource = resource
+
+    @staticmethod
+    def _deserialize(values: Optional[dict]) -> Optional[dict]:
+        if values is None:
+            return None
+        return {name: _deserializer.deserialize(value) for name, value in values.items()}
+
+    def transact_write_items(self, TransactItems: List[dict], ReturnConsumedCapacity=None, **_):
+        operations = []
+        seen = set()
+        for request in TransactItems:
+            (operation, arguments), = request.items()
+            table = self._resource.table_data(arguments['TableName'], 'TransactWriteItems')
+            item = self._deserialize(arguments.get('Item'))
+            key = self._deserialize(arguments.get('Key')) or table._item_key(to_store(item))
+            key_id = (table.name, table._key(key, 'TransactWriteItems'))
+            if key_id in seen:
+                _raise('ValidationException',
+                       "Transaction request cannot include multiple operations on one item", 'TransactWriteItems')
+            seen.add(key_id)
+            operations.append((operation, table, key, item, arguments))
+
+        with self._resource.lock:
+            self._resource.calls['TransactWriteItems'] += 1
+            reasons, failed = [], False
+            for operation, table, key, item, arguments in operations:
+                node = _condition(arguments.get('ConditionExpression'), arguments.get('ExpressionAttributeNames'))
+                current = table.items.get(table._key(key, 'TransactWriteItems'))
+                values = table._values(self._deserialize(arguments.get('ExpressionAttributeValues')))
+                if node is not None and not evaluate(node, current if current is not None else {}, values):
+                    reasons.append({'Code': 'ConditionalCheckFailed', 'Message': "The conditional request failed"})
+                    failed = True
+                else:
+                    reasons.append({'Code': 'None'})
+            if failed:
+                codes = ', '.join(reason['Code'] for reason in reasons)
+                _raise('TransactionCanceledException', f"Transaction cancelled, please refer cancellation reasons "
+                                                        f"for specific reasons [{codes}]", 'TransactWriteItems',
+                       CancellationReasons=reasons)
+
+            capacity = {}
+            for operation, table, key, item, arguments in operations:
+                names = arguments.get('ExpressionAttributeNames')
+                values = self._deserialize(arguments.get('ExpressionAttributeValues'))
+                mode = 'TOTAL' if ReturnConsumedCapacity not in (None, 'NONE') else None
+                if operation == 'Put':
+                    result = table.put_item(Item=item, ReturnConsumedCapacity=mode)
+                elif operation == 'Update':
+                    result = table.update_item(Key=key, UpdateExpression=arguments['UpdateExpression'],
+                                               ExpressionAttributeNames=names, ExpressionAttributeValues=values,
+                                               ReturnConsumedCapacity=mode)
+                elif operation == 'Delete':
+                    result = table.delete_item(Key=key, ReturnConsumedCapacity=mode)
+                else:
+                    continue
+                if 'ConsumedCapacity' in result:
+                    units = result['ConsumedCapacity']['CapacityUnits'] * 2
+                    capacity[table.name] = capacity.get(table.name, 0) + units
+
+        response = {}
+        if len(capacity) > 0:
+            response['ConsumedCapacity'] = [{'TableName': name, 'CapacityUnits': units}
+                                            for name, units in capacity.items()]
+        return response
+
+
+class MemoryResource:
+    """
+    In-memory stand-in for the boto3 DynamoDB service resource. Items live in sorted partitions per table and per
+    secondary index, and condition, update and projection expressions are evaluated locally. Every call is counted
+    by operation name in `calls`
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.calls = collections.Counter()
+        self.tables: Dict[str, _TableData] = {}
+        self.meta = SimpleNamespace(client=MemoryClient(self))
+
+    @classmethod
+    def from_environment(cls) -> 'MemoryResource':
+        """
+        Create a backend with the tables of the SAM template pointed by PPS_DB_MEMORY_TEMPLATE, if any
+        """
+        resource = cls()
+        template = os.environ.get('PPS_DB_MEMORY_TEMPLATE')
+        if template is not None:
+            load_template(resource, template)
+        return resource
+
+    def table_data(self, name: str, operation: str) -> _TableData:
+        data = self.tables.get(name)
+        if data is None:
+            _raise('ResourceNotFoundException', f"Requested resource not found: Table: {name} not found", operation)
+        return data
+
+    def Table(self, name: str) -> MemoryTable:
+        return MemoryTable(self, name)
+
+    def create_table(self, TableName: str, KeySchema: List[dict], GlobalSecondaryIndexes: List[dict] = None,
+                     LocalSecondaryIndexes: List[dict] = None, **_) -> MemoryTable:
+        with self.lock:
+            if TableName in self.tables:
+                _raise('ResourceInUseException', f"Table already exists: {TableName}", 'CreateTable')
+            self.tables[TableName] = _TableData(TableName, KeySchema, GlobalSecondaryIndexes, LocalSecondaryIndexes)
+        return self.Table(TableName)
+
+    def ensure_table(self, name: str, partition_key: str, sort_key: str = None,
+                     indices: Dict[str, Tuple[str, str]] = None):
+        """
+        Create a table and any missing secondary index (projecting every attribute) from a service definition
+        """
+        with self.lock:
+            if name not in self.tables:
+                key_schema = [{'AttributeName': partition_key, 'KeyType': 'HASH'}]
+                if sort_key is not None:
+                    key_schema.append({'AttributeName': sort_key, 'KeyType': 'RANGE'})
+                self.create_table(TableName=name, KeySchema=key_schema)
+            data = self.tables[name]
+            for index_name, (index_partition, index_sort) in (indices or {}).items():
+                if index_name in data.indexes:
+                    continue
+                key_schema = [{'AttributeName': index_partition, 'KeyType': 'HASH'}]
+                if index_sort is not None:
+                    key_schema.append({'AttributeName': index_sort, 'KeyType': 'RANGE'})
+                data.add_index(index_name, key_schema)
+
+    def batch_get_item(self, RequestItems: Dict[str, dict], ReturnConsumedCapacity=None, **_):
+        responses, capacity = {}, []
+        with self.lock:
+            self.calls['BatchGetItem'] += 1
+            for name, request in RequestItems.items():
+                data = self.table_data(name, 'BatchGetItem')
+                items, units = [], 0.0
+                for key in request['Keys']:
+                    result = data.get_item(Key=key, ProjectionExpression=request.get('ProjectionExpression'),
+                                           ExpressionAttributeNames=request.get('ExpressionAttributeNames'),
+                                           ReturnConsumedCapacity=ReturnConsumedCapacity)
+                    if 'Item' in result:
+                        items.append(result['Item'])
+                    units += result.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+                responses[name] = items
+                if ReturnConsumedCapacity not in (None, 'NONE'):
+                    capacity.append({'TableName': name, 'CapacityUnits': units})
+        response = {'Responses': responses, 'UnprocessedKeys': {}}
+        if len(capacity) > 0:
+            response['ConsumedCapacity'] = capacity
+        return response
+
+    def batch_write_item(self, RequestItems: Dict[str, List[dict]], ReturnConsumedCapacity=None, **_):
+        capacity = []
+        with self.lock:
+            self.calls['BatchWriteItem'] += 1
+            for name, requests in RequestItems.items():
+                data = self.table_data(name, 'BatchWriteItem')
+                units = 0.0
+                for request in requests:
+                    if 'PutRequest' in request:
+                        result = data.put_item(Item=request['PutRequest']['Item'],
+                                               ReturnConsumedCapacity=ReturnConsumedCapacity)
+                    else:
+                        result = data.delete_item(Key=request['DeleteRequest']['Key'],
+                                                  ReturnConsumedCapacity=ReturnConsumedCapacity)
+                    units += result.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+                if ReturnConsumedCapacity not in (None, 'NONE'):
+                    capacity.append({'TableName': name, 'CapacityUnits': units})
+        response = {'UnprocessedItems': {}}
+        if len(capacity) > 0:
+            response['ConsumedCapacity'] = capacity
+        return response
+
+
+def load_template(resource: MemoryResource, path: str) -> List[str]:
+    """
+    Create the AWS::DynamoDB::Table resources of a SAM/CloudFormation template, returning the created table names
+    """
+    import yaml
+
+    class TemplateLoader(yaml.SafeLoader):
+        pass
+
+    def construct_tag(loader, _suffix, node):
+        if isinstance(node, yaml.ScalarNode):
+            return loader.construct_scalar(node)
+        if isinstance(node, yaml.SequenceNode):
+            return loader.construct_sequence(node, deep=True)
+        return loader.construct_mapping(node, deep=True)
+
+    TemplateLoader.add_multi_constructor('!', construct_tag)
+    with open(path) as f:
+        template = yaml.load(f, Loader=TemplateLoader)
+
+    created = []
+    for name, definition in template.get('Resources', {}).items():
+        if definition.get('Type') != 'AWS::DynamoDB::Table':
+            continue
+        properties = definition.get('Properties', {})
+        table_name = properties.get('TableName', name)
+        if table_name in resource.tables:
+            continue
+        resource.create_table(TableName=table_name, KeySchema=properties['KeySchema'],
+                              GlobalSecondaryIndexes=properties.get('GlobalSecondaryIndexes'),
+                              LocalSecondaryIndexes=properties.get('LocalSecondaryIndexes'))
+        created.append(table_name)
+    return created
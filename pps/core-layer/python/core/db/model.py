@@ -1,19 +1,23 @@
 import abc
 import enum
-from typing import List, Dict, Any, Tuple, Union
-
-from boto3 import dynamodb
-from boto3.dynamodb.conditions import Key
-from boto3.dynamodb.table import TableResource
-
-import boto3
-
-from .results import QueryResult, GetResult
+import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import List, Dict, Any, Tuple, Union, Iterator, Callable, Iterable
+
+from . import expressions
+from .capacity import capacity
+from .debug import log_result
+from .retry import retry_policy
+from .results import QueryResult, GetResult, clean_item
 from .types import DynamoDBKey, DynamoDBTypes
 
 _valid_select_options = ['ALL_ATTRIBUTES', 'ALL_PROJECTED_ATTRIBUTES', 'SPECIFIC_ATTRIBUTES', 'COUNT']
 
-RESERVED_KEYWORDS = ['name', 'unit', 'sub', 'user', 'group']
+BATCH_GET_SIZE = 100
+BATCH_WRITE_SIZE = 25
 
 
 def pass_not_none_arguments(fn, **kwargs):
@@ -24,6 +28,157 @@ def pass_not_none_arguments(fn, **kwargs):
     return fn(**args)
 
 
+def execute(operation: str, table_name: str, fn: Callable, index: str = None, **kwargs) -> dict:
+    """
+    Run a database call under the retry policy, asking DynamoDB for the consumed capacity when capacity tracking is enabled, and record
+    the capacity and metrics of its response
+    """
+    if capacity.mode is not None and kwargs.get('ReturnConsumedCapacity') is None:
+        kwargs['ReturnConsumedCapacity'] = capacity.mode
+    result = retry_policy.call(table_name, pass_not_none_arguments, fn, **kwargs)
+    if result is None:
+        return result
+    capacity.add(operation, result.get('ConsumedCapacity'))
+    log_result(operation, table_name, result, index)
+    return result
+
+
+class UnprocessedItemsError(Exception):
+    def __init__(self, message: str, unprocessed: dict):
+        super().__init__(message)
+        self.unprocessed = unprocessed
+
+
+_END_OF_PAGES = object()
+
+
+def merge_pages(sources: List[Iterator[Any]], size: int = 1, max_workers: int = None) -> Iterator[Any]:
+    """
+    Consume many page iterators on a thread pool, yielding their pages in arrival order and keeping up to `size`
+    pages ready ahead of the caller
+    """
+    buffer = queue.Queue(maxsize=size)
+    stop = threading.Event()
+
+    def put(value) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker(pages: Iterator[Any]):
+        try:
+            for page in pages:
+                if not put(page):
+                    return
+        except Exception as e:
+            put(e)
+            return
+        put(_END_OF_PAGES)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(sources))
+    futures = [executor.submit(worker, source) for source in sources]
+    pending = len(sources)
+    try:
+        while pending > 0:
+            page = buffer.get()
+            if page is _END_OF_PAGES:
+                pending -= 1
+                continue
+            if isinstance(page, Exception):
+                raise page
+            yield page
+    finally:
+        stop.set()
+        # shutdown(cancel_futures=True) needs Python 3.9, the functions run on 3.8
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def prefetch_pages(pages: Iterator[Any], size: int = 1) -> Iterator[Any]:
+    """
+    Consume a page iterator on a background thread, keeping up to `size` pages ready ahead of the caller
+    """
+    return merge_pages([pages], size=size)
+
+
+class BatchWriter:
+    """
+    Buffers puts and deletes into BatchWriteItem calls of up to 25 requests, retrying unprocessed items.
+    When the key names are known, repeated writes to the same key inside a batch are collapsed to the last one
+    """
+
+    def __init__(self, model: 'AbstractModel', key_names: List[str] = None, max_attempts: int = 8):
+        self._model = model
+        self._key_names = key_names
+        self._max_attempts = max_attempts
+        self._buffer: Dict[Any, dict] = {}
+        self.written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.flush()
+
+    def _buffer_key(self, item: dict):
+        if self._key_names is None:
+            return len(self._buffer), None
+        return tuple(item.get(name) for name in self._key_names)
+
+    def _add(self, key_source: dict, request: dict):
+        key = self._buffer_key(key_source)
+        self._buffer.pop(key, None)
+        self._buffer[key] = request
+        if len(self._buffer) >= BATCH_WRITE_SIZE:
+            self.flush()
+
+    def put(self, item: dict):
+        self._add(item, {'PutRequest': {'Item': item}})
+
+    def delete(self, key: DynamoDBKey):
+        self._add(key, {'DeleteRequest': {'Key': key}})
+
+    def put_jsonl(self, lines: Iterable[str]) -> int:
+        """
+        Put every item of a JSON Lines stream, returning the number of items read
+        """
+        count = 0
+        for line in lines:
+            line = line.strip()
+            if len(line) == 0:
+                continue
+            self.put(json.loads(line, parse_float=Decimal))
+            count += 1
+        return count
+
+    def flush(self):
+        if len(self._buffer) == 0:
+            return
+        table_name = self._model.__table_name__
+        request = {table_name: list(self._buffer.values())}
+        self._buffer = {}
+
+        attempt = 0
+        while True:
+            sent = len(request[table_name])
+            result = execute('BatchWriteItem', table_name, self._model.get_db().batch_write_item,
+                             RequestItems=request)
+            request = result.get('UnprocessedItems') or {}
+            self.written += sent - len(request.get(table_name, []))
+            if len(request) == 0:
+                return
+            if attempt + 1 >= self._max_attempts:
+                raise UnprocessedItemsError(f"Could not write all the items to {table_name}", request)
+            retry_policy.wait(attempt, table_name)
+            attempt += 1
+
+
 class UpdateReturnValues(enum.Enum):
     NONE = 0
     ALL_OLD = 1
@@ -50,9 +205,12 @@ class Operator(enum.Enum):
     EQ = 0
     BEGINS_WITH = 1
     LESS_THAN = 2
+    GREATER_THAN = 3
 
     @staticmethod
     def to_expression(key_name, op, value):
+        from boto3.dynamodb.conditions import Key
+
         exp = Key(key_name)
         if op == Operator.EQ:
             exp = exp.eq(value)
@@ -60,6 +218,8 @@ class Operator(enum.Enum):
             exp = exp.begins_with(value)
         elif op == Operator.LESS_THAN:
             exp = exp.lt(value)
+        elif op == Operator.GREATER_THAN:
+            exp = exp.gt(value)
         else:
             raise ValueError(f"Unknown operator {str(op)}")
         return exp
@@ -67,44 +227,57 @@ class Operator(enum.Enum):
 
 class AbstractModel(abc.ABC):
     __table_name__: str
-    __db__: boto3.session.Session.resource
+    __db__: 'Database'
     __keys__: Dict[str, type(DynamoDBTypes)]
 
-    _table: boto3.dynamodb.table = None
+    _table = None
+
+    @classmethod
+    def get_db(cls):
+        return cls.__db__.resource
 
     @classmethod
     def get_table(cls):
         if cls._table is None:
-            cls._table = cls.__db__.Table(cls.__table_name__)
+            cls._table = cls.get_db().Table(cls.__table_name__)
         return cls._table
 
+    @classmethod
+    def _execute(cls, operation: str, fn: Callable, index: str = None, **kwargs) -> dict:
+        return execute(operation, cls.__table_name__, fn, index=index, **kwargs)
+
+    @classmethod
+    def _scan_arguments(cls, attributes: List[str] = None, index: str = None, filter_expression=None) -> dict:
+        projection, attr_names = None, None
+        if attributes is not None:
+            projection, attr_names = expressions.compile_projection(tuple(attributes))
+            attr_names = dict(attr_names) if len(attr_names) > 0 else None
+
+        return {
+            'ProjectionExpression': projection,
+            'IndexName': index,
+            'FilterExpression': filter_expression,
+            'ExpressionAttributeNames': attr_names
+        }
+
     @classmethod
     def scan(cls,
              limit: int = None,
              start_key: DynamoDBKey = None,
              attributes: List[str] = None,
-             index: str = None) -> QueryResult:
+             index: str = None,
+             filter_expression=None) -> QueryResult:
         """
         List items from a database
         """
+        arguments = cls._scan_arguments(attributes, index, filter_expression)
         table = cls.get_table()
-        result = pass_not_none_arguments(table.scan, Limit=limit, AttributesToGet=attributes, IndexName=index,
-                                         ExclusiveStartKey=start_key)
+        result = cls._execute('Scan', table.scan, index=index, Limit=limit, ExclusiveStartKey=start_key, **arguments)
         return QueryResult(result)
 
     @staticmethod
     def replace_keyword_attributes(attributes: List[str]):
-        attr_expression = {}
-        for attr_idx in range(len(attributes)):
-            exp = attributes[attr_idx]
-            if exp in RESERVED_KEYWORDS or '-' in exp:
-                model_exp = f"#model_{exp}".replace('-', '_')
-                attr_expression[model_exp] = exp
-                exp = model_exp
-            attributes[attr_idx] = exp
-        if len(attr_expression) == 0:
-            attr_expression = None
-        return attr_expression
+        return expressions.replace_keyword_attributes(attributes)
 
     @staticmethod
     def attributes_to_projection_and_expression(attributes: List[str]):
@@ -114,22 +287,11 @@ class AbstractModel(abc.ABC):
 
     @staticmethod
     def clean_for_exp(text: str):
-        return text.replace('-', '_').replace('.', '_')
+        return expressions.clean_for_exp(text)
 
     @staticmethod
     def add_to_attribute_names(attribute: str, attribute_names: dict, prefix: str = None) -> str:
-        dot_splitted = attribute.split('.')
-        if len(dot_splitted) > 1:
-            exp = []
-            for attr in dot_splitted:
-                pref = '_'.join(exp).replace('#attr_', '')
-                exp.append(AbstractModel.add_to_attribute_names(attr, attribute_names, pref))
-            name_exp = '.'.join(exp)
-        else:
-            name = (prefix + '_' if prefix else '') + attribute
-            name_exp = AbstractModel.clean_for_exp(f"#attr_{name}")
-            attribute_names[name_exp] = attribute
-        return name_exp
+        return expressions.add_to_attribute_names(attribute, attribute_names, prefix)
 
     @staticmethod
     def value_to_value_expression(value: Union[str, int, float, dict, bool]):
@@ -150,10 +312,37 @@ class AbstractModel(abc.ABC):
 
     @staticmethod
     def add_to_attribute_values(value: Any, attribute_values: dict, attribute: str) -> str:
-        name_exp = f":val_{attribute}".replace('-', '_').replace('.', '_')
+        name_exp = expressions.value_placeholder(attribute)
         attribute_values[name_exp] = value
         return name_exp
 
+    @classmethod
+    def _query_arguments(cls,
+                         partition_key: Tuple[str, Any],
+                         sort_key: Tuple[str, Operator, Any] = None,
+                         attributes: List[str] = None,
+                         index: str = None,
+                         filter_expression=None) -> dict:
+        projection, attr_names = None, None
+        if attributes is not None:
+            projection, attr_names = expressions.compile_projection(tuple(attributes))
+            attr_names = dict(attr_names) if len(attr_names) > 0 else None
+
+        hash_name, hash_value = partition_key
+        key_conditions = Operator.to_expression(hash_name, Operator.EQ, hash_value)
+
+        if sort_key:
+            sort_name, sort_op, sort_value = sort_key
+            key_conditions = key_conditions & Operator.to_expression(sort_name, sort_op, sort_value)
+
+        return {
+            'ProjectionExpression': projection,
+            'IndexName': index,
+            'KeyConditionExpression': key_conditions,
+            'FilterExpression': filter_expression,
+            'ExpressionAttributeNames': attr_names
+        }
+
     @classmethod
     def query(cls,
               partition_key: Tuple[str, Any],
@@ -162,31 +351,154 @@ class AbstractModel(abc.ABC):
               start_key: DynamoDBKey = None,
               attributes: List[str] = None,
               index: str = None,
+              scan_forward: bool = None,
+              filter_expression=None
               ) -> QueryResult:
         """
-        List items from a database
+        List items from a database. With scan_forward=False the items are returned in descending sort key order
         """
+        arguments = cls._query_arguments(partition_key, sort_key, attributes, index, filter_expression)
+        table = cls.get_table()
+        result = cls._execute('Query', table.query, index=index, Limit=limit, ExclusiveStartKey=start_key,
+                              ScanIndexForward=scan_forward, **arguments)
+        return QueryResult(result)
 
-        attr_names = {}
+    @classmethod
+    def count(cls,
+              partition_key: Tuple[str, Any],
+              sort_key: Tuple[str, Operator, Any] = None,
+              index: str = None,
+              filter_expression=None) -> int:
+        """
+        Count the items matching a key condition, and the filter if given, without reading them, following every
+        page of the query
+        """
+        arguments = cls._query_arguments(partition_key, sort_key, None, index, filter_expression)
+        table = cls.get_table()
+        total, start_key = 0, None
+        while True:
+            result = cls._execute('Query', table.query, index=index, Select='COUNT', ExclusiveStartKey=start_key,
+                                  **arguments)
+            total += result.get('Count', 0)
+            start_key = result.get('LastEvaluatedKey')
+            if start_key is None:
+                return total
 
-        projection = None
-        if attributes is not None:
-            projection = ', '.join([cls.add_to_attribute_names(attr, attr_names) for attr in attributes])
+    @classmethod
+    def _iter_pages(cls, operation: str, fn: Callable, arguments: dict, start_key: DynamoDBKey = None,
+                    page_size: int = None, max_items: int = None, max_rcu: float = None) -> Iterator[dict]:
+        consumed = 0.0
+        returned = 0
+        if max_rcu is not None and arguments.get('ReturnConsumedCapacity') is None:
+            # the budget needs the consumed capacity, which INDEXES also holds when it is the mode requested
+            arguments = {**arguments, 'ReturnConsumedCapacity': capacity.mode or 'TOTAL'}
+        while True:
+            limit = page_size
+            if max_items is not None:
+                remaining = max_items - returned
+                limit = remaining if limit is None else min(limit, remaining)
+            result = cls._execute(operation, fn, index=arguments.get('IndexName'), Limit=limit,
+                                  ExclusiveStartKey=start_key, **arguments)
+            items = result.get('Items', [])
+            returned += len(items)
+            yield items
+
+            start_key = result.get('LastEvaluatedKey')
+            if start_key is None or (max_items is not None and returned >= max_items):
+                return
+            if max_rcu is not None:
+                consumed += result.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+                if consumed >= max_rcu:
+                    return
 
-        hash_name, hash_value = partition_key
-        key_conditions = Operator.to_expression(hash_name, Operator.EQ, hash_value)
+    @classmethod
+    def _iter_items(cls, pages: Iterator[dict], prefetch: bool) -> Iterator[dict]:
+        if prefetch:
+            pages = prefetch_pages(pages)
+        for items in pages:
+            for item in items:
+                yield clean_item(item)
 
-        if sort_key:
-            sort_name, sort_op, sort_value = sort_key
-            key_conditions = key_conditions & Operator.to_expression(sort_name, sort_op, sort_value)
-        if len(attr_names) == 0:
-            attr_names = None
+    @classmethod
+    def iter_query(cls,
+                   partition_key: Tuple[str, Any],
+                   sort_key: Tuple[str, Operator, Any] = None,
+                   start_key: DynamoDBKey = None,
+                   attributes: List[str] = None,
+                   index: str = None,
+                   page_size: int = None,
+                   max_items: int = None,
+                   max_rcu: float = None,
+                   prefetch: bool = False,
+                   filter_expression=None,
+                   scan_forward: bool = None) -> Iterator[dict]:
+        """
+        Lazily iterate over every item matching a query, following pagination until the results or the
+        max_items/max_rcu budget are exhausted
+        """
+        arguments = cls._query_arguments(partition_key, sort_key, attributes, index, filter_expression)
+        arguments['ScanIndexForward'] = scan_forward
+        pages = cls._iter_pages('Query', cls.get_table().query, arguments, start_key=start_key,
+                                page_size=page_size, max_items=max_items, max_rcu=max_rcu)
+        return cls._iter_items(pages, prefetch)
+
+    @classmethod
+    def query_all(cls,
+                  partition_key: Tuple[str, Any],
+                  sort_key: Tuple[str, Operator, Any] = None,
+                  attributes: List[str] = None,
+                  index: str = None) -> QueryResult:
+        """
+        Read every page of a query into a single result, whose items are only cleaned if they are accessed
+        """
+        arguments = cls._query_arguments(partition_key, sort_key, attributes, index)
+        items = []
+        for page in cls._iter_pages('Query', cls.get_table().query, arguments):
+            items += page
+        return QueryResult({'Items': items, 'Count': len(items)})
 
+    @classmethod
+    def iter_scan(cls,
+                  start_key: DynamoDBKey = None,
+                  attributes: List[str] = None,
+                  index: str = None,
+                  page_size: int = None,
+                  max_items: int = None,
+                  max_rcu: float = None,
+                  prefetch: bool = False,
+                  filter_expression=None) -> Iterator[dict]:
+        """
+        Lazily iterate over every item of a table, following pagination until the results or the
+        max_items/max_rcu budget are exhausted
+        """
+        arguments = cls._scan_arguments(attributes, index, filter_expression)
+        pages = cls._iter_pages('Scan', cls.get_table().scan, arguments, start_key=start_key,
+                                page_size=page_size, max_items=max_items, max_rcu=max_rcu)
+        return cls._iter_items(pages, prefetch)
+
+    @classmethod
+    def parallel_scan(cls,
+                      segments: int = 4,
+                      attributes: List[str] = None,
+                      index: str = None,
+                      filter_expression=None,
+                      page_size: int = None,
+                      max_workers: int = None) -> Iterator[dict]:
+        """
+        Iterate over every item of a table splitting the scan in segments that are read concurrently, each one
+        following its own pagination. Items are yielded in arrival order, not in table order
+        """
+        if segments < 1:
+            raise ValueError("The number of segments must be positive")
         table = cls.get_table()
-        result = pass_not_none_arguments(table.query, Limit=limit, ProjectionExpression=projection, IndexName=index,
-                                         ExclusiveStartKey=start_key, KeyConditionExpression=key_conditions,
-                                         ExpressionAttributeNames=attr_names)
-        return QueryResult(result)
+        sources = []
+        for segment in range(segments):
+            arguments = {**cls._scan_arguments(attributes, index, filter_expression),
+                         'Segment': segment, 'TotalSegments': segments}
+            sources.append(cls._iter_pages('Scan', table.scan, arguments, page_size=page_size))
+        for items in merge_pages(sources, size=segments, max_workers=max_workers):
+            for item in items:
+                yield clean_item(item)
 
     @classmethod
     def add(cls, item: dict, raise_if_attributes_exist: List[str] = None, conditions: List[str] = None,
@@ -222,8 +534,8 @@ class AbstractModel(abc.ABC):
             conditions.append(' AND '.join(and_conditions))
 
         condition = ' AND '.join(conditions) if conditions is not None else None
-        pass_not_none_arguments(table.put_item, Item=item, ReturnValues='NONE', ConditionExpression=condition,
-                                ExpressionAttributeNames=exp, ExpressionAttributeValues=attribute_values)
+        cls._execute('PutItem', table.put_item, Item=item, ReturnValues='NONE', ConditionExpression=condition,
+                     ExpressionAttributeNames=exp, ExpressionAttributeValues=attribute_values)
         return item
 
     @classmethod
@@ -235,12 +547,58 @@ class AbstractModel(abc.ABC):
 
         attr_expression = None
         if attributes is not None:
-            attr_expression, attributes = cls.attributes_to_projection_and_expression(attributes)
+            attributes, attr_expression = expressions.compile_keyword_projection(tuple(attributes))
+            attr_expression = None if attr_expression is None else dict(attr_expression)
 
-        result = pass_not_none_arguments(table.get_item, Key=key, ProjectionExpression=attributes,
-                                         ExpressionAttributeNames=attr_expression)
+        result = cls._execute('GetItem', table.get_item, Key=key, ProjectionExpression=attributes,
+                              ExpressionAttributeNames=attr_expression)
         return GetResult(result)
 
+    @classmethod
+    def batch_get(cls, keys: List[DynamoDBKey], attributes: List[str] = None,
+                  max_attempts: int = 8) -> List[dict]:
+        """
+        Get many items from the database using as few BatchGetItem calls as possible
+        """
+        projection = {}
+        if attributes is not None:
+            attributes, attr_expression = expressions.compile_keyword_projection(tuple(attributes))
+            projection['ProjectionExpression'] = attributes
+            if attr_expression is not None:
+                projection['ExpressionAttributeNames'] = dict(attr_expression)
+
+        unique_keys = []
+        seen = set()
+        for key in keys:
+            key_id = tuple(sorted(key.items()))
+            if key_id not in seen:
+                seen.add(key_id)
+                unique_keys.append(key)
+
+        items = []
+        for chunk_start in range(0, len(unique_keys), BATCH_GET_SIZE):
+            request = {cls.__table_name__: {'Keys': unique_keys[chunk_start:chunk_start + BATCH_GET_SIZE],
+                                            **projection}}
+            attempt = 0
+            while len(request) > 0:
+                result = cls._execute('BatchGetItem', cls.get_db().batch_get_item, RequestItems=request)
+                items += [clean_item(item) for item in result.get('Responses', {}).get(cls.__table_name__, [])]
+                request = result.get('UnprocessedKeys') or {}
+                if len(request) == 0:
+                    break
+                if attempt + 1 >= max_attempts:
+                    raise UnprocessedItemsError(f"Could not get all the items from {cls.__table_name__}", request)
+                retry_policy.wait(attempt, cls.__table_name__)
+                attempt += 1
+        return items
+
+    @classmethod
+    def batch_writer(cls, key_names: List[str] = None) -> BatchWriter:
+        """
+        Create a context manager that writes items to the database in batches
+        """
+        return BatchWriter(cls, key_names=key_names)
+
     @staticmethod
     def to_code_name(attribute: str, ignore: List[str] = None):
         name = ''.join(map(lambda x: x.capitalize(), attribute.split('-')))
@@ -262,9 +620,10 @@ class AbstractModel(abc.ABC):
     @classmethod
     def update(cls, key: DynamoDBKey, updates: dict = None, append_to: Dict[str, Any] = None,
                condition_equals: Dict[str, Any] = None, add_to: Dict[str, int] = None, conditions=None,
-               return_values: UpdateReturnValues = UpdateReturnValues.UPDATED_NEW):
+               return_values: UpdateReturnValues = UpdateReturnValues.UPDATED_NEW, cache_expression: bool = True):
         """
-        Update an item from the database changing only the given attributes
+        Update an item from the database changing only the given attributes. Updates of attribute paths that change
+        per item (e.g. roster.<sub>) should not cache their expression
         """
         table = cls.get_table()
 
@@ -280,57 +639,24 @@ class AbstractModel(abc.ABC):
         if len(updates) == 0 and len(append_to) == 0 and len(add_to) == 0:
             raise ValueError("The updates, append_to and add_to dictionaries must not be empty at the same time")
 
-        attr_names = {}
-        attr_values = {}
-        update_expressions = []
-        for item_key, item_value in updates.items():
-            item_key_ = cls.add_to_attribute_names(item_key, attr_names)
-            item_value_ = cls.add_to_attribute_values(item_value, attr_values, item_key)
-            update_expressions.append(f"{item_key_}={item_value_}")
-        for item_key, item_value in append_to.items():
-            item_key_ = cls.add_to_attribute_names(item_key, attr_names)
-            item_value_ = cls.add_to_attribute_values(item_value, attr_values, item_key)
-            update_expressions.append(f"{item_key_}=list_append({item_key_}, {item_value_})")
-        if len(update_expressions) > 0:
-            expression = "SET " + ', '.join(update_expressions)
-        else:
-            expression = None
-
-        add_expressions = []
-        for item_key, amount in add_to.items():
-            item_key_ = cls.add_to_attribute_names(item_key, attr_names)
-            item_value_ = cls.add_to_attribute_values(amount, attr_values, item_key)
-            add_expressions.append(f"{item_key_} {item_value_}")
-        if len(add_expressions) > 0:
-            expression = ("" if expression is None else expression + " ") + "ADD " + ', '.join(add_expressions)
-
-        eq_conditions = list()
-
-        if condition_equals is not None:
-            for item_key, item_value in condition_equals.items():
-                item_key_ = cls.add_to_attribute_names(item_key, attr_names)
-                item_value_ = cls.add_to_attribute_values(item_value, attr_values, item_key + '_condition')
-
-                eq_conditions.append(f"{item_key_} = {item_value_}")
-
-        if len(eq_conditions) == 0:
-            condition_exp = None
-        else:
-            condition_exp = ' AND '.join(eq_conditions)
+        if condition_equals is None:
+            condition_equals = {}
 
-        if len(attr_names) == 0:
-            attr_names = None
+        compile_update = expressions.compile_update if cache_expression else expressions.render_update
+        compiled = compile_update(tuple(updates), tuple(append_to), tuple(add_to), tuple(condition_equals))
+        attr_names = dict(compiled.names) if len(compiled.names) > 0 else None
+        attr_values = compiled.bind(updates, append_to, add_to, condition_equals)
         if len(attr_values) == 0:
             attr_values = None
 
-        return pass_not_none_arguments(table.update_item,
-                                       Key=key,
-                                       UpdateExpression=expression,
-                                       ExpressionAttributeNames=attr_names,
-                                       ExpressionAttributeValues=attr_values,
-                                       ConditionExpression=conditions if conditions is not None else condition_exp,
-                                       ReturnValues=UpdateReturnValues.to_str(return_values),
-                                       )
+        return cls._execute('UpdateItem', table.update_item,
+                            Key=key,
+                            UpdateExpression=compiled.expression,
+                            ExpressionAttributeNames=attr_names,
+                            ExpressionAttributeValues=attr_values,
+                            ConditionExpression=conditions if conditions is not None else compiled.condition,
+                            ReturnValues=UpdateReturnValues.to_str(return_values),
+                            )
 
     @classmethod
     def delete(cls, key: DynamoDBKey):
@@ -338,8 +664,8 @@ class AbstractModel(abc.ABC):
         Delete an item from the database
         """
         table = cls.get_table()
-        pass_not_none_arguments(table.delete_item, Key=key)
+        cls._execute('DeleteItem', table.delete_item, Key=key)
 
 
-def create_model(db: boto3.session.Session.resource):
+def create_model(db: 'Database'):
     return type('Model', (AbstractModel,), {'__db__': db})
@@ -1,56 +1,149 @@
 import abc
 from decimal import Decimal
+from typing import Dict, List, Optional, Type, TypeVar
 
 from .capacity import ConsumedCapacity
 
+R = TypeVar('R', bound='Record')
+
 
 class Result(abc.ABC):
+    __slots__ = ()
+
     @abc.abstractmethod
     def as_dict(self):
         pass
 
 
 def clean_value(value):
-    if type(value) is Decimal:
+    value_type = type(value)
+    if value_type is Decimal:
         return float(value)
+    if value_type is dict:
+        return clean_item(value)
+    if value_type is list:
+        return [clean_value(element) for element in value]
     return value
 
 
 def clean_item(item: dict):
     if item is None:
         return None
-    return {
-        key: clean_item(value) if type(value) is dict else clean_value(value) for key, value in item.items()
-    }
+    return {key: clean_value(value) for key, value in item.items()}
+
+
+class Record:
+    """
+    Typed, slotted view of a table item. Subclasses list the item attributes in __slots__, naming them in snake
+    case; __keys__ maps the slots whose item key differs (e.g. {'unit_user': 'unit-user'}). Missing attributes are
+    None. Values are cleaned while the record is built, so no intermediate dict is created per item
+    """
+    __slots__ = ()
+    __keys__: Dict[str, str] = {}
+
+    @classmethod
+    def _attributes(cls):
+        attributes = cls.__dict__.get('_attributes_cache')
+        if attributes is None:
+            slots = [slot for klass in reversed(cls.__mro__) for slot in klass.__dict__.get('__slots__', ())]
+            attributes = tuple((slot, cls.__keys__.get(slot, slot)) for slot in slots)
+            setattr(cls, '_attributes_cache', attributes)
+        return attributes
+
+    @classmethod
+    def from_item(cls: Type[R], item: Optional[dict]) -> Optional[R]:
+        if item is None:
+            return None
+        record = cls.__new__(cls)
+        for slot, key in cls._attributes():
+            object.__setattr__(record, slot, clean_value(item.get(key)))
+        return record
+
+    def as_dict(self) -> dict:
+        return {key: getattr(self, slot) for slot, key in self._attributes()}
+
+    def __eq__(self, other):
+        return type(other) is type(self) and self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.as_dict()!r})"
 
 
 class QueryResult(Result):
+    """
+    Items of a query or scan. They are cleaned on the first access to `items`; a result that is only serialized
+    passes the raw items through, as the JSON encoder converts their Decimals
+    """
+    __slots__ = ('_raw_items', '_items', 'count', 'scanned_count', 'last_evaluated_key', 'consumed_capacity')
 
     def __init__(self, result: dict):
-        print(result)
-        uncleaned_items = result.get('Items')
-        self.items = [clean_item(item) for item in uncleaned_items] if uncleaned_items is not None else None
-        self.count = result.get('Count'),
+        self._raw_items = result.get('Items')
+        self._items = None
+        self.count = result.get('Count')
         self.scanned_count = result.get('ScannedCount')
         self.last_evaluated_key = result.get('LastEvaluatedKey')
         self.consumed_capacity = ConsumedCapacity.from_dict(result.get('ConsumedCapacity'))
 
+    @property
+    def items(self) -> Optional[List[dict]]:
+        if self._items is None and self._raw_items is not None:
+            self._items = [clean_item(item) for item in self._raw_items]
+            self._raw_items = None
+        return self._items
+
+    @items.setter
+    def items(self, items: Optional[List[dict]]):
+        self._items = items
+        self._raw_items = None
+
+    @classmethod
+    def from_items(cls, items):
+        """
+        Build a result from already cleaned items, e.g. the ones yielded by AbstractModel.iter_query
+        """
+        result = cls({})
+        result.items = list(items)
+        result.count = len(result.items)
+        return result
+
+    def records(self, record_class: Type[R]) -> List[R]:
+        items = self._items if self._items is not None else self._raw_items
+        return [record_class.from_item(item) for item in items or []]
+
     def as_dict(self):
         return {
-            "items": self.items,
+            "items": self._items if self._items is not None else self._raw_items,
             "count": self.count,
             "last_key": self.last_evaluated_key
         }
 
 
 class GetResult(Result):
+    __slots__ = ('_raw_item', '_item', 'metadata')
+
     def __init__(self, result: dict):
-        self.item = clean_item(result.get("Item"))
+        self._raw_item = result.get("Item")
+        self._item = None
         self.metadata = result.get("ResponseMetadata")
 
+    @property
+    def item(self) -> Optional[dict]:
+        if self._raw_item is not None:
+            self._item = clean_item(self._raw_item)
+            self._raw_item = None
+        return self._item
+
     @classmethod
     def from_item(cls, item):
-        return GetResult({'Item': item})
+        """
+        Build a result from an already cleaned item
+        """
+        result = GetResult({})
+        result._item = item
+        return result
+
+    def record(self, record_class: Type[R]) -> Optional[R]:
+        return record_class.from_item(self._item if self._raw_item is None else self._raw_item)
 
     def as_dict(self):
-        return self.item
+        return self._item if self._raw_item is None else self._raw_item
@@ -0,0 +1,169 @@
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Any
+
+from ..aws import invocation
+
+THROTTLING_ERRORS = {'ProvisionedThroughputExceededException', 'ThrottlingException', 'RequestLimitExceeded'}
+TRANSIENT_ERRORS = {'InternalServerError', 'ServiceUnavailable'}
+CONNECTION_ERRORS = {'EndpointConnectionError', 'ConnectionClosedError', 'ReadTimeoutError', 'ConnectTimeoutError'}
+
+
+class DeadlineExceededError(Exception):
+    """
+    Raised instead of retrying or waiting for capacity when the invocation would run out of time
+    """
+
+
+def error_code(error: Exception) -> Optional[str]:
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict):
+        return response.get('Error', {}).get('Code')
+    return None
+
+
+def is_throttling(error: Exception) -> bool:
+    return error_code(error) in THROTTLING_ERRORS
+
+
+def is_retryable(error: Exception) -> bool:
+    code = error_code(error)
+    return code in THROTTLING_ERRORS or code in TRANSIENT_ERRORS or type(error).__name__ in CONNECTION_ERRORS
+
+
+class TokenBucket:
+    """
+    Client-side rate limiter for one table. The rate is decreased multiplicatively when the table throttles and
+    recovers additively on every successful call
+    """
+
+    def __init__(self, max_rate: float, min_rate: float = 1.0, decrease: float = 0.5, increase: float = 0.5):
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.decrease = decrease
+        self.increase = increase
+        self.rate = max_rate
+        self.tokens = max_rate
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.rate, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def reserve(self) -> float:
+        """
+        Take a token, returning the seconds to wait before it can be used
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = min(self.tokens, self.rate)
+
+
+class RetryPolicy:
+    """
+    Retries throttled and transient database errors with exponential backoff and full jitter, limiting the
+    request rate of every table and never sleeping past the invocation deadline
+    """
+
+    def __init__(self, max_attempts: int = 8, base: float = 0.05, cap: float = 2.0, max_rate: float = 50.0,
+                 deadline_margin: float = 0.2):
+        self.max_attempts = max_attempts
+        self.base = base
+        self.cap = cap
+        self.max_rate = max_rate
+        self.deadline_margin = deadline_margin
+        self.deadline: Optional[float] = None
+        self._buckets: Dict[Any, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, table: Any) -> TokenBucket:
+        bucket = self._buckets.get(table)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.setdefault(table, TokenBucket(self.max_rate))
+        return bucket
+
+    def reset(self):
+        """
+        Forget the observed throttling of every table
+        """
+        with self._lock:
+            self._buckets = {}
+
+    def remaining(self) -> Optional[float]:
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+
+    def sleep(self, seconds: float):
+        """
+        Sleep unless it would go past the deadline, in which case DeadlineExceededError is raised
+        """
+        if seconds <= 0:
+            return
+        remaining = self.remaining()
+        if remaining is not None and seconds >= remaining:
+            raise DeadlineExceededError(f"Waiting {seconds:.3f}s would exceed the invocation deadline")
+        time.sleep(seconds)
+
+    def wait(self, attempt: int, table: Any = None):
+        """
+        Back off before retrying unprocessed items of a batch operation, which DynamoDB returns when throttled
+        """
+        if table is not None:
+            self.bucket(table).on_throttle()
+        self.sleep(self.backoff(attempt))
+
+    def call(self, table: Any, fn: Callable, *args, **kwargs):
+        bucket = self.bucket(table)
+        attempt = 0
+        while True:
+            self.sleep(bucket.reserve())
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt + 1 >= self.max_attempts:
+                    raise
+                if is_throttling(e):
+                    bucket.on_throttle()
+                try:
+                    self.sleep(self.backoff(attempt))
+                except DeadlineExceededError as deadline_error:
+                    raise deadline_error from e
+                attempt += 1
+                continue
+            bucket.on_success()
+            return result
+
+
+retry_policy = RetryPolicy(max_attempts=int(os.environ.get('PPS_DB_MAX_ATTEMPTS', '8')),
+                           max_rate=float(os.environ.get('PPS_DB_MAX_RATE', '50')),
+                           deadline_margin=float(os.environ.get('PPS_DB_DEADLINE_MARGIN_MS', '200')) / 1000)
+
+
+@invocation.on_start
+def _set_deadline(_event: dict, context: Any):
+    get_remaining_time = getattr(context, 'get_remaining_time_in_millis', None)
+    if get_remaining_time is None:
+        retry_policy.deadline = None
+        return
+    retry_policy.deadline = time.monotonic() + get_remaining_time() / 1000 - retry_policy.deadline_margin
+
+
+@invocation.on_end
+def _clear_deadline():
+    retry_policy.deadline = None
@@ -1,17 +1,32 @@
 from abc import ABC
-from typing import Dict, Tuple, List, Any
+from typing import Dict, Tuple, List, Any, Iterator, Iterable
 
 from .db import db
-from .model import Operator, UpdateReturnValues
-from .results import GetResult
+from .identity import identity_map
+from .model import Operator, UpdateReturnValues, BatchWriter
+from .results import GetResult, QueryResult
 
 
-class ModelIndex:
-    def __init__(self, table_name: str, partition_key: str, sort_key: str = None, index_name: str = None):
+_models: Dict[str, type] = {}
+_interfaces: Dict[Tuple[str, str, str, str], 'ModelIndex'] = {}
+
+
+def get_model(table_name: str):
+    """
+    Get the model of a table, creating it only once per container so its table handle is reused
+    """
+    model = _models.get(table_name)
+    if model is None:
         class TableModel(db.Model):
             __table_name__ = table_name
 
-        self._model = TableModel
+        model = _models.setdefault(table_name, TableModel)
+    return model
+
+
+class ModelIndex:
+    def __init__(self, table_name: str, partition_key: str, sort_key: str = None, index_name: str = None):
+        self._model = get_model(table_name)
         self.partition = partition_key
         self.sort = sort_key
         self.index_name = index_name
@@ -47,28 +62,93 @@ class ModelIndex:
                 must_exist.append(self.partition)
             if raise_if_exists_sort:
                 must_exist.append(self.sort)
+        identity_map.invalidate(self._model, key)
         return GetResult(self._model.add({**item, **key}, raise_if_attributes_exist=must_exist, conditions=conditions,
                                          raise_attribute_equals=raise_attribute_equals))
 
-    def query(self, partition_key, sort_key: Tuple[Operator, Any] = None, limit=None, start_key=None, attributes=None):
+    def query(self, partition_key, sort_key: Tuple[Operator, Any] = None, limit=None, start_key=None, attributes=None,
+              scan_forward: bool = None, filter_expression=None):
         self.generate_key(partition_key, sort_key, False)
         return self._model.query((self.partition, partition_key), None if sort_key is None else (self.sort, *sort_key),
-                                 limit=limit, start_key=start_key, attributes=attributes, index=self.index_name)
+                                 limit=limit, start_key=start_key, attributes=attributes, index=self.index_name,
+                                 scan_forward=scan_forward, filter_expression=filter_expression)
+
+    def count(self, partition_key, sort_key: Tuple[Operator, Any] = None, filter_expression=None) -> int:
+        self.generate_key(partition_key, sort_key, False)
+        return self._model.count((self.partition, partition_key), None if sort_key is None else (self.sort, *sort_key),
+                                 index=self.index_name, filter_expression=filter_expression)
+
+    def iter_query(self, partition_key, sort_key: Tuple[Operator, Any] = None, start_key=None, attributes=None,
+                   page_size: int = None, max_items: int = None, max_rcu: float = None,
+                   prefetch: bool = False, filter_expression=None, scan_forward: bool = None) -> Iterator[dict]:
+        self.generate_key(partition_key, sort_key, False)
+        return self._model.iter_query((self.partition, partition_key),
+                                      None if sort_key is None else (self.sort, *sort_key),
+                                      start_key=start_key, attributes=attributes, index=self.index_name,
+                                      page_size=page_size, max_items=max_items, max_rcu=max_rcu, prefetch=prefetch,
+                                      filter_expression=filter_expression, scan_forward=scan_forward)
+
+    def query_all(self, partition_key, sort_key: Tuple[Operator, Any] = None, attributes=None) -> QueryResult:
+        self.generate_key(partition_key, sort_key, False)
+        return self._model.query_all((self.partition, partition_key),
+                                     None if sort_key is None else (self.sort, *sort_key),
+                                     attributes=attributes, index=self.index_name)
+
+    def iter_scan(self, start_key=None, attributes=None, page_size: int = None, max_items: int = None,
+                  max_rcu: float = None, prefetch: bool = False, filter_expression=None) -> Iterator[dict]:
+        return self._model.iter_scan(start_key=start_key, attributes=attributes, index=self.index_name,
+                                     page_size=page_size, max_items=max_items, max_rcu=max_rcu, prefetch=prefetch,
+                                     filter_expression=filter_expression)
+
+    def parallel_scan(self, segments: int = 4, attributes=None, filter_expression=None, page_size: int = None,
+                      max_workers: int = None) -> Iterator[dict]:
+        return self._model.parallel_scan(segments=segments, attributes=attributes, index=self.index_name,
+                                         filter_expression=filter_expression, page_size=page_size,
+                                         max_workers=max_workers)
 
     def get(self, partition_key, sort_key=None, attributes=None):
         key = self.generate_key(partition_key, sort_key)
+        if identity_map.active and self.index_name is None:
+            return identity_map.get(self._model, key, attributes=attributes)
         return self._model.get(key=key, attributes=attributes)
 
+    def batch_get(self, keys: List[Any], attributes: List[str] = None) -> List[GetResult]:
+        """
+        Get many items at once. Each key is a partition key or, for composite keys, a (partition, sort) tuple.
+        The results are returned in the same order as the keys, with an empty result for missing items
+        """
+        if self.index_name is not None:
+            raise ValueError("Batch gets can not be done over a secondary index")
+        full_keys = [self.generate_key(*(key if self.sort is not None else (key,))) for key in keys]
+        if attributes is not None:
+            attributes = list(attributes) + [name for name in (self.partition, self.sort)
+                                             if name is not None and name not in attributes]
+
+        items = self._model.batch_get(full_keys, attributes=attributes)
+        by_key = {self._key_id(item): item for item in items}
+        return [GetResult.from_item(by_key.get(self._key_id(key))) for key in full_keys]
+
+    def _key_id(self, item: dict):
+        return item.get(self.partition), None if self.sort is None else item.get(self.sort)
+
+    def batch_writer(self) -> BatchWriter:
+        if self.index_name is not None:
+            raise ValueError("Batch writes can not be done over a secondary index")
+        return self._model.batch_writer(key_names=[name for name in (self.partition, self.sort) if name is not None])
+
     def delete(self, partition_key, sort_key=None):
         key = self.generate_key(partition_key, sort_key)
+        identity_map.invalidate(self._model, key)
         self._model.delete(key)
 
     def update(self, partition_key, updates: dict = None, sort_key=None, append_to: dict = None,
                condition_equals: Dict[str, Any] = None, add_to: Dict[str, int] = None, conditions=None,
-               return_values: UpdateReturnValues = UpdateReturnValues.UPDATED_NEW):
+               return_values: UpdateReturnValues = UpdateReturnValues.UPDATED_NEW, cache_expression: bool = True):
         key = self.generate_key(partition_key, sort_key)
+        identity_map.invalidate(self._model, key)
         return self._model.update(key, updates=updates, append_to=append_to, condition_equals=condition_equals,
-                                  add_to=add_to, return_values=return_values, conditions=conditions)
+                                  add_to=add_to, return_values=return_values, conditions=conditions,
+                                  cache_expression=cache_expression)
 
 
 class ModelService(ABC):
@@ -89,5 +169,17 @@ class ModelService(ABC):
         else:
             partition, sort = index
 
-        return ModelIndex(cls.__table_name__, partition_key=partition, sort_key=sort,
-                          index_name=index_name)
+        registry_key = (cls.__table_name__, index_name, partition, sort)
+        interface = _interfaces.get(registry_key)
+        if interface is None:
+            interface = _interfaces.setdefault(registry_key, ModelIndex(cls.__table_name__, partition_key=partition,
+                                                                        sort_key=sort, index_name=index_name))
+        return interface
+
+    @classmethod
+    def bulk_import(cls, lines: Iterable[str]) -> int:
+        """
+        Import the items of a JSON Lines stream into the table of this service
+        """
+        with cls.get_interface().batch_writer() as writer:
+            return writer.put_jsonl(lines)
@@ -0,0 +1,78 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from botocore.stub import Stubber
+
+from core.aws.invocation import invocation
+from ..capacity import capacity, ConsumedCapacity
+from ..db import db
+
+
+class ItemsModel(db.Model):
+    __table_name__ = 'items'
+
+
+@pytest.fixture(scope="function")
+def ddb_stubber():
+    ddb_stubber = Stubber(ItemsModel.get_table().meta.client)
+    ddb_stubber.activate()
+    yield ddb_stubber
+    ddb_stubber.deactivate()
+
+
+def test_consumed_capacity():
+    consumed = ConsumedCapacity.from_dict({
+        'TableName': 'items',
+        'CapacityUnits': 3.0,
+        'Table': {'CapacityUnits': 1.0},
+        'GlobalSecondaryIndexes': {'ByName': {'CapacityUnits': 2.0, 'ReadCapacityUnits': 2.0}}
+    })
+    assert consumed.total.all == 3.0
+    assert consumed.total.read is None
+    assert consumed.table.all == 1.0
+    assert consumed.local_secondary_indexes == {}
+    assert consumed.global_secondary_indexes['ByName'].read == 2.0
+
+
+def test_capacity_accounting(ddb_stubber, monkeypatch, capsys):
+    monkeypatch.setattr(capacity, 'mode', 'INDEXES')
+    ddb_stubber.add_response('get_item', {
+        'Item': {'key': {'S': 'value'}},
+        'ConsumedCapacity': {'TableName': 'items', 'CapacityUnits': 0.5, 'Table': {'CapacityUnits': 0.5}}
+    }, {'TableName': 'items', 'Key': {'key': 'value'}, 'ReturnConsumedCapacity': 'INDEXES'})
+    ddb_stubber.add_response('get_item', {
+        'Item': {'key': {'S': 'value'}},
+        'ConsumedCapacity': {'TableName': 'items', 'CapacityUnits': 1.0, 'Table': {'CapacityUnits': 1.0}}
+    }, {'TableName': 'items', 'Key': {'key': 'value'}, 'ReturnConsumedCapacity': 'INDEXES'})
+    ddb_stubber.add_response('put_item', {
+        'ConsumedCapacity': {'TableName': 'items', 'CapacityUnits': 2.0, 'Table': {'CapacityUnits': 1.0},
+                             'GlobalSecondaryIndexes': {'ByName': {'CapacityUnits': 1.0}}}
+    }, {'TableName': 'items', 'Item': {'key': 'value'}, 'ReturnValues': 'NONE', 'ReturnConsumedCapacity': 'INDEXES'})
+
+    with invocation(context=SimpleNamespace(function_name='items-function')):
+        ItemsModel.get({'key': 'value'})
+        ItemsModel.get({'key': 'value'})
+        ItemsModel.add({'key': 'value'})
+        assert capacity.units == {('items', None): [1.5, 1.0], ('items', 'ByName'): [0.0, 1.0]}
+    ddb_stubber.assert_no_pending_responses()
+    assert capacity.units == {}
+
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert len(records) == 2
+    table_record = next(record for record in records if record['Index'] == '-')
+    assert table_record['Table'] == 'items'
+    assert table_record['Function'] == 'items-function'
+    assert table_record['ConsumedRCU'] == 1.5
+    assert table_record['ConsumedWCU'] == 1.0
+    assert table_record['_aws']['CloudWatchMetrics'][0]['Namespace'] == 'PPS'
+    assert table_record['_aws']['CloudWatchMetrics'][0]['Dimensions'] == [['Table', 'Index', 'Function']]
+
+
+def test_capacity_disabled(ddb_stubber, capsys):
+    ddb_stubber.add_response('get_item', {'Item': {'key': {'S': 'value'}}},
+                             {'TableName': 'items', 'Key': {'key': 'value'}})
+    with invocation(context=SimpleNamespace(function_name='items-function')):
+        ItemsModel.get({'key': 'value'})
+    ddb_stubber.assert_no_pending_responses()
+    assert capsys.readouterr().out == ''
@@ -1,6 +1,6 @@
 from decimal import Decimal
 
-from core.db.results import clean_item
+from core.db.results import GetResult, QueryResult, Record, clean_item
 
 
 def test_clean():
@@ -24,3 +24,31 @@ def test_clean():
             'e': 'def'
         }
     }
+
+
+def test_clean_lists():
+    cleaned = clean_item({'a': [Decimal(1), {'b': Decimal('1.5')}, [Decimal(2)]]})
+    assert cleaned == {'a': [1.0, {'b': 1.5}, [2.0]]} and type(cleaned['a'][0]) is float
+
+
+def test_lazy_query_result():
+    raw = {'user': 'u1', 'score': {'corporality': Decimal(3)}}
+    result = QueryResult({'Items': [raw], 'Count': 1})
+    assert result.count == 1
+    assert result.as_dict()['items'][0] is raw
+    assert type(result.items[0]['score']['corporality']) is float
+    assert result.as_dict()['items'] is result.items
+    assert not hasattr(result, '__dict__')
+
+
+def test_records():
+    class Beneficiary(Record):
+        __slots__ = ('user', 'unit_user', 'score')
+        __keys__ = {'unit_user': 'unit-user'}
+
+    result = QueryResult({'Items': [{'user': 'u1', 'unit-user': 'scouts::u1', 'score': {'a': Decimal(2)}}]})
+    record = result.records(Beneficiary)[0]
+    assert record.unit_user == 'scouts::u1' and record.score == {'a': 2.0}
+    assert record.as_dict() == {'user': 'u1', 'unit-user': 'scouts::u1', 'score': {'a': 2.0}}
+    assert GetResult({'Item': {'user': 'u2'}}).record(Beneficiary) == Beneficiary.from_item({'user': 'u2'})
+    assert GetResult({}).record(Beneficiary) is None
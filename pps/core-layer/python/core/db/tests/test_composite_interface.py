@@ -1,3 +1,6 @@
+from decimal import Decimal
+from unittest.mock import patch
+
 import pytest
 from boto3.dynamodb.conditions import Key
 from botocore.stub import Stubber
@@ -145,3 +148,57 @@ def test_update(ddb_stubber):
                      condition_equals={'key_c': 'value_c'})
 
     ddb_stubber.assert_no_pending_responses()
+
+
+def test_batch_get(ddb_stubber):
+    keys = [{'hash': 'value_h', 'range': 'value_r'}, {'hash': 'value_h', 'range': 'value_r_2'},
+            {'hash': 'value_h', 'range': 'value_x'}]
+    ddb_stubber.add_response('batch_get_item', {
+        'Responses': {'items': [{'hash': {'S': 'value_h'}, 'range': {'S': 'value_r_2'}, 'name': {'S': 'b'}}]},
+        'UnprocessedKeys': {'items': {'Keys': [{'hash': {'S': 'value_h'}, 'range': {'S': 'value_r'}}],
+                                      'ProjectionExpression': '#model_name, hash, range',
+                                      'ExpressionAttributeNames': {'#model_name': 'name'}}}
+    }, {'RequestItems': {'items': {
+        'Keys': keys,
+        'ProjectionExpression': '#model_name, hash, range',
+        'ExpressionAttributeNames': {'#model_name': 'name'}
+    }}})
+    ddb_stubber.add_response('batch_get_item', {
+        'Responses': {'items': [{'hash': {'S': 'value_h'}, 'range': {'S': 'value_r'}, 'name': {'S': 'a'}}]}
+    }, {'RequestItems': {'items': {
+        'Keys': keys[:1],
+        'ProjectionExpression': '#model_name, hash, range',
+        'ExpressionAttributeNames': {'#model_name': 'name'}
+    }}})
+
+    with patch('time.sleep'):
+        results = interface.batch_get([('value_h', 'value_r'), ('value_h', 'value_r_2'), ('value_h', 'value_x')],
+                                      attributes=['name'])
+    assert [result.item['name'] if result.item else None for result in results] == ['a', 'b', None]
+    ddb_stubber.assert_no_pending_responses()
+
+
+def test_batch_writer(ddb_stubber):
+    lines = [
+        '{"hash": "h", "range": "a", "value": 1.5}',
+        '',
+        '{"hash": "h", "range": "b", "value": 2}',
+        '{"hash": "h", "range": "a", "value": 3}',
+    ]
+    ddb_stubber.add_response('batch_write_item', {
+        'UnprocessedItems': {'items': [{'DeleteRequest': {'Key': {'hash': {'S': 'h'}, 'range': {'S': 'c'}}}}]}
+    }, {'RequestItems': {'items': [
+        {'PutRequest': {'Item': {'hash': 'h', 'range': 'b', 'value': 2}}},
+        {'PutRequest': {'Item': {'hash': 'h', 'range': 'a', 'value': Decimal('3')}}},
+        {'DeleteRequest': {'Key': {'hash': 'h', 'range': 'c'}}},
+    ]}})
+    ddb_stubber.add_response('batch_write_item', {}, {'RequestItems': {'items': [
+        {'DeleteRequest': {'Key': {'hash': 'h', 'range': 'c'}}},
+    ]}})
+
+    with patch('time.sleep'):
+        with interface.batch_writer() as writer:
+            assert writer.put_jsonl(lines) == 3
+            writer.delete({'hash': 'h', 'range': 'c'})
+    assert writer.written == 3
+    ddb_stubber.assert_no_pending_responses()
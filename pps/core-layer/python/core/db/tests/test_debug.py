@@ -0,0 +1,29 @@
+import json
+import logging
+from types import SimpleNamespace
+
+from core.aws.invocation import invocation
+from ..debug import log_result, logger, DebugConfig
+
+
+def test_log_result(caplog, monkeypatch):
+    monkeypatch.setattr(DebugConfig, 'sample_rate', 1.0)
+    monkeypatch.setattr(DebugConfig, 'max_size', 20)
+    monkeypatch.setattr(logger, 'level', logging.DEBUG)
+
+    result = {'Items': [{'name': 'a' * 100}], 'Count': 1, 'ScannedCount': 3, 'LastEvaluatedKey': {'hash': 'h'}}
+    with caplog.at_level(logging.DEBUG, logger='core.db'):
+        with invocation(context=SimpleNamespace(aws_request_id='request-id')):
+            log_result('Query', 'items', result, 'ByName')
+
+    metrics = json.loads(caplog.records[0].getMessage())
+    assert metrics == {'op': 'Query', 'table': 'items', 'index': 'ByName', 'count': 1, 'scanned': 3, 'more': True,
+                       'request_id': 'request-id'}
+    payload = json.loads(caplog.records[1].getMessage())['payload']
+    assert len(payload) == 23 and payload.endswith('...')
+
+
+def test_log_disabled(caplog):
+    with caplog.at_level(logging.DEBUG):
+        log_result('Query', 'items', {'Items': []})
+    assert len(caplog.records) == 0
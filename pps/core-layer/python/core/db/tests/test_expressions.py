@@ -0,0 +1,49 @@
+from ..expressions import compile_update, compile_projection, compile_keyword_projection, render_update
+
+
+def test_compile_update():
+    compiled = compile_update(('target',), (), ('score.corporality',), ('target',))
+    assert compiled is compile_update(('target',), (), ('score.corporality',), ('target',))
+    assert compiled.expression == 'SET #attr_target=:val_target ADD #attr_score.#attr_score_corporality ' \
+                                  ':val_score_corporality'
+    assert compiled.condition == '#attr_target = :val_target_condition'
+    assert compiled.names == {
+        '#attr_target': 'target',
+        '#attr_score': 'score',
+        '#attr_score_corporality': 'corporality'
+    }
+    assert compiled.bind({'target': None}, {}, {'score.corporality': 10}, {'target': 'old'}) == {
+        ':val_target': None,
+        ':val_score_corporality': 10,
+        ':val_target_condition': 'old'
+    }
+
+
+def test_compile_update_append():
+    compiled = compile_update((), ('log-items',))
+    assert compiled.expression == 'SET #attr_log_items=list_append(#attr_log_items, :val_log_items)'
+    assert compiled.condition is None
+
+
+def test_render_update():
+    cached = compile_update.cache_info().currsize
+    compiled = render_update(('roster.u-sub',), (), ('roster-version',))
+    assert compiled.expression == 'SET #attr_roster.#attr_roster_u_sub=:val_roster_u_sub ' \
+                                  'ADD #attr_roster_version :val_roster_version'
+    assert compile_update.cache_info().currsize == cached
+
+
+def test_compile_projection():
+    projection, names = compile_projection(('name', 'release-id', 'target.score'))
+    assert projection == '#attr_name, #attr_release_id, #attr_target.#attr_target_score'
+    assert names == {
+        '#attr_name': 'name',
+        '#attr_release_id': 'release-id',
+        '#attr_target': 'target',
+        '#attr_target_score': 'score'
+    }
+
+    projection, names = compile_keyword_projection(('name', 'category'))
+    assert projection == '#model_name, category'
+    assert names == {'#model_name': 'name'}
+    assert compile_keyword_projection(('category',)) == ('category', None)
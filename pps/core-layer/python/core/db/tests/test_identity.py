@@ -0,0 +1,72 @@
+import pytest
+from botocore.stub import Stubber
+
+from core.aws.invocation import invocation
+from .. import ModelIndex
+from ..identity import merge_projections, project
+
+interface = ModelIndex('items', 'hash')
+
+
+@pytest.fixture(scope="function")
+def ddb_stubber():
+    # noinspection PyProtectedMember
+    ddb_stubber = Stubber(interface._model.get_table().meta.client)
+    ddb_stubber.activate()
+    yield ddb_stubber
+    ddb_stubber.deactivate()
+
+
+def test_merge_projections():
+    assert merge_projections(['target.score', 'name'], ['target']) == ['name', 'target']
+    assert merge_projections(['target'], None) is None
+
+
+def test_project():
+    item = {'target': {'score': 1, 'objective': 'o'}, 'name': 'n'}
+    assert project(item, ['target.score', 'missing.key']) == {'target': {'score': 1}}
+    assert project(item, None) is item
+    assert project(item, ['target'])['target'] is item['target']
+
+
+def test_identity_map(ddb_stubber):
+    target = {'M': {'score': {'N': '10'}, 'objective': {'S': 'o'}, 'tasks': {'L': []}}}
+    ddb_stubber.add_response('get_item', {'Item': {'target': {'M': {'score': {'N': '10'}, 'objective': {'S': 'o'}}}}}, {
+        'TableName': 'items',
+        'Key': {'hash': 'h'},
+        'ProjectionExpression': 'target.score, target.objective'
+    })
+    ddb_stubber.add_response('get_item', {'Item': {'target': target}}, {
+        'TableName': 'items',
+        'Key': {'hash': 'h'},
+        'ProjectionExpression': 'target'
+    })
+    ddb_stubber.add_response('update_item', {}, {
+        'TableName': 'items',
+        'Key': {'hash': 'h'},
+        'UpdateExpression': 'SET #attr_target=:val_target',
+        'ExpressionAttributeNames': {'#attr_target': 'target'},
+        'ExpressionAttributeValues': {':val_target': None},
+        'ReturnValues': 'UPDATED_NEW'
+    })
+    ddb_stubber.add_response('get_item', {'Item': {}}, {
+        'TableName': 'items',
+        'Key': {'hash': 'h'},
+        'ProjectionExpression': 'target'
+    })
+
+    with invocation():
+        assert interface.get('h', attributes=['target.score', 'target.objective']).item == {
+            'target': {'score': 10, 'objective': 'o'}
+        }
+        assert interface.get('h', attributes=['target.score']).item == {'target': {'score': 10}}
+        assert interface.get('h', attributes=['target']).item['target']['tasks'] == []
+
+        result = interface.get('h', attributes=['target'])
+        result.item['target']['score'] = 0
+        assert interface.get('h', attributes=['target.score']).item['target']['score'] == 10
+        assert interface.get('h', attributes=['target']).item['target']['score'] == 10
+
+        interface.update('h', {'target': None})
+        assert interface.get('h', attributes=['target']).item == {}
+    ddb_stubber.assert_no_pending_responses()
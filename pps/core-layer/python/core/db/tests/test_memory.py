@@ -0,0 +1,130 @@
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from boto3.dynamodb.conditions import Attr
+
+from ..db import Database
+from ..memory import load_template
+from ..model import Operator
+
+TEMPLATE = Path(__file__).parents[6].joinpath('template.yaml')
+
+
+@pytest.fixture(scope="function")
+def memory_db():
+    database = Database('memory')
+    load_template(database.resource, str(TEMPLATE))
+    return database
+
+
+def test_template(memory_db):
+    assert {'beneficiaries', 'tasks', 'groups', 'districts', 'items', 'logs'} <= set(memory_db.resource.tables)
+    assert 'ByGroup' in memory_db.resource.tables['beneficiaries'].indexes
+
+
+def test_items(memory_db):
+    class Beneficiaries(memory_db.Model):
+        __table_name__ = 'beneficiaries'
+
+    Beneficiaries.add({'user': 'u1', 'group': 'd::g', 'unit-user': 'scouts::u1', 'score': {'corporality': 1}})
+    with pytest.raises(memory_db.resource.meta.client.exceptions.ConditionalCheckFailedException):
+        Beneficiaries.add({'user': 'u1'}, raise_if_attributes_exist=['user'])
+
+    result = Beneficiaries.update({'user': 'u1'}, updates={'nickname': 'Nick'},
+                                  add_to={'score.corporality': 2})
+    assert result['Attributes'] == {'nickname': 'Nick', 'score': {'corporality': Decimal(3)}}
+    with pytest.raises(memory_db.resource.meta.client.exceptions.ConditionalCheckFailedException):
+        Beneficiaries.update({'user': 'u1'}, updates={'nickname': 'Other'},
+                             conditions=Attr('score.corporality').gte(10))
+
+    assert Beneficiaries.get({'user': 'u1'}, ['nickname', 'user']).item == {'nickname': 'Nick', 'user': 'u1'}
+    Beneficiaries.delete({'user': 'u1'})
+    assert Beneficiaries.get({'user': 'u1'}).item is None
+
+
+def test_query(memory_db):
+    class Beneficiaries(memory_db.Model):
+        __table_name__ = 'beneficiaries'
+
+    class Tasks(memory_db.Model):
+        __table_name__ = 'tasks'
+
+    for index in range(5):
+        Beneficiaries.add({'user': f'u{index}', 'group': 'd::g', 'unit-user': f'scouts::u{index}',
+                           'nickname': f'n{index}', 'private': True})
+        Tasks.add({'user': 'u0', 'objective': f'puberty::corporality::{index}'})
+    Beneficiaries.add({'user': 'other', 'group': 'd::g', 'unit-user': 'guides::other'})
+
+    result = Beneficiaries.query(('group', 'd::g'), ('unit-user', Operator.BEGINS_WITH, 'scouts::'), index='ByGroup',
+                                 limit=2)
+    assert [item['user'] for item in result.items] == ['u0', 'u1']
+    assert 'private' not in result.items[0]
+    assert result.last_evaluated_key == {'user': 'u1', 'group': 'd::g', 'unit-user': 'scouts::u1'}
+
+    items = Beneficiaries.iter_query(('group', 'd::g'), ('unit-user', Operator.BEGINS_WITH, 'scouts::'),
+                                     index='ByGroup', page_size=2)
+    assert [item['user'] for item in items] == ['u0', 'u1', 'u2', 'u3', 'u4']
+
+    result = Tasks.query(('user', 'u0'), ('objective', Operator.LESS_THAN, 'puberty::corporality::2'))
+    assert [item['objective'][-1] for item in result.items] == ['0', '1']
+
+    users = Beneficiaries.parallel_scan(segments=3, attributes=['user'], filter_expression=Attr('private').eq(True))
+    assert sorted(item['user'] for item in users) == ['u0', 'u1', 'u2', 'u3', 'u4']
+
+
+def test_batches(memory_db):
+    class Tasks(memory_db.Model):
+        __table_name__ = 'tasks'
+
+    with Tasks.batch_writer() as writer:
+        writer.put_jsonl(['{"user": "u", "objective": "o%d", "score": 1.5}' % index for index in range(30)])
+    assert writer.written == 30
+    items = Tasks.batch_get([{'user': 'u', 'objective': 'o1'}, {'user': 'u', 'objective': 'missing'}])
+    assert items == [{'user': 'u', 'objective': 'o1', 'score': 1.5}]
+
+
+def test_transaction(memory_db):
+    class Beneficiaries(memory_db.Model):
+        __table_name__ = 'beneficiaries'
+
+    client = memory_db.resource.meta.client
+    Beneficiaries.add({'user': 'u1', 'target': {'objective': 'o1'}, 'score': {'corporality': 0}})
+    update = {'Update': {
+        'TableName': 'beneficiaries',
+        'Key': {'user': {'S': 'u1'}},
+        'UpdateExpression': 'SET #target=:target ADD #score.#area :score',
+        'ConditionExpression': '#target.#objective = :objective',
+        'ExpressionAttributeNames': {'#target': 'target', '#score': 'score', '#area': 'corporality',
+                                     '#objective': 'objective'},
+        'ExpressionAttributeValues': {':target': {'NULL': True}, ':score': {'N': '5'}, ':objective': {'S': 'o1'}}
+    }}
+    put = {'Put': {'TableName': 'tasks', 'Item': {'user': {'S': 'u1'}, 'objective': {'S': 'o1'}}}}
+
+    client.transact_write_items(TransactItems=[update, put])
+    assert Beneficiaries.get({'user': 'u1'}).item == {'user': 'u1', 'target': None, 'score': {'corporality': 5}}
+
+    with pytest.raises(client.exceptions.TransactionCanceledException) as error:
+        client.transact_write_items(TransactItems=[update])
+    assert error.value.response['CancellationReasons'] == [{'Code': 'ConditionalCheckFailed',
+                                                            'Message': 'The conditional request failed'}]
+
+
+def test_score_ranking(memory_db):
+    class Beneficiaries(memory_db.Model):
+        __table_name__ = 'beneficiaries'
+
+    for user, score in [('u1', 30), ('u2', 50), ('u3', 30), ('u4', 10)]:
+        Beneficiaries.add({'user': user, 'group': 'd::g', 'unit-user': f'scouts::{user}', 'score-total': score})
+    Beneficiaries.add({'user': 'u5', 'group': 'd::g'})
+    Beneficiaries.add({'user': 'u6', 'group': 'd::g', 'unit-user': 'guides::u6', 'score-total': 40})
+    scouts = Attr('unit-user').begins_with('scouts::')
+
+    top = Beneficiaries.query(('group', 'd::g'), limit=2, index='ByGroupScore', scan_forward=False)
+    assert [item['user'] for item in top.items] == ['u2', 'u6']
+    top = list(Beneficiaries.iter_query(('group', 'd::g'), index='ByGroupScore', max_items=2, scan_forward=False,
+                                        filter_expression=scouts))
+    assert top[0]['user'] == 'u2' and top[1]['user'] in ('u1', 'u3')
+    assert Beneficiaries.count(('group', 'd::g'), ('score-total', Operator.GREATER_THAN, 30), index='ByGroupScore',
+                               filter_expression=scouts) == 1
+    assert Beneficiaries.count(('group', 'd::g'), index='ByGroupScore') == 5
@@ -1,7 +1,8 @@
 import pytest
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Key, Attr
 from botocore.stub import Stubber
 
+from ..capacity import capacity
 from ..db import db
 
 
@@ -117,3 +118,81 @@ def test_update(ddb_stubber):
     ddb_stubber.add_response('update_item', update_response, update_params)
     ItemsModel.update(key={'hash': 'value_h'}, updates={'key_a': 'value_a', 'key_b': 'value_b'})
     ddb_stubber.assert_no_pending_responses()
+
+
+def test_iter_query(ddb_stubber):
+    base_params = {
+        'TableName': 'items',
+        'KeyConditionExpression': Key('hash').eq('value_h'),
+        'Limit': 2
+    }
+    ddb_stubber.add_response('query', {
+        'Items': [{'hash': {'S': 'value_h'}, 'range': {'N': '1'}}, {'hash': {'S': 'value_h'}, 'range': {'N': '2'}}],
+        'LastEvaluatedKey': {'hash': {'S': 'value_h'}, 'range': {'N': '2'}}
+    }, base_params)
+    ddb_stubber.add_response('query', {
+        'Items': [{'hash': {'S': 'value_h'}, 'range': {'N': '3'}}]
+    }, {**base_params, 'ExclusiveStartKey': {'hash': 'value_h', 'range': 2}})
+
+    items = list(ItemsModel.iter_query(('hash', 'value_h'), page_size=2))
+    assert [item['range'] for item in items] == [1, 2, 3]
+    assert type(items[0]['range']) is float
+    ddb_stubber.assert_no_pending_responses()
+
+
+def test_iter_query_budget(ddb_stubber):
+    ddb_stubber.add_response('query', {
+        'Items': [{'hash': {'S': 'value_h'}, 'range': {'N': '1'}}],
+        'LastEvaluatedKey': {'hash': {'S': 'value_h'}, 'range': {'N': '1'}},
+        'ConsumedCapacity': {'TableName': 'items', 'CapacityUnits': 0.5}
+    }, {
+        'TableName': 'items',
+        'KeyConditionExpression': Key('hash').eq('value_h'),
+        'Limit': 3,
+        'ReturnConsumedCapacity': 'TOTAL'
+    })
+
+    items = list(ItemsModel.iter_query(('hash', 'value_h'), max_items=3, max_rcu=0.5, prefetch=True))
+    assert len(items) == 1
+    ddb_stubber.assert_no_pending_responses()
+
+
+def test_iter_query_budget_keeps_capacity_mode(ddb_stubber, monkeypatch):
+    monkeypatch.setattr(capacity, 'mode', 'INDEXES')
+    ddb_stubber.add_response('query', {
+        'Items': [{'hash': {'S': 'value_h'}, 'range': {'N': '1'}}],
+        'LastEvaluatedKey': {'hash': {'S': 'value_h'}, 'range': {'N': '1'}},
+        'ConsumedCapacity': {'TableName': 'items', 'CapacityUnits': 0.5, 'Table': {'CapacityUnits': 0.5}}
+    }, {
+        'TableName': 'items',
+        'KeyConditionExpression': Key('hash').eq('value_h'),
+        'ReturnConsumedCapacity': 'INDEXES'
+    })
+
+    assert len(list(ItemsModel.iter_query(('hash', 'value_h'), max_rcu=0.5))) == 1
+    ddb_stubber.assert_no_pending_responses()
+
+
+def test_parallel_scan(ddb_stubber):
+    base_params = {
+        'TableName': 'items',
+        'ProjectionExpression': '#attr_hash',
+        'ExpressionAttributeNames': {'#attr_hash': 'hash'},
+        'FilterExpression': Attr('score').gt(1),
+        'TotalSegments': 2
+    }
+    ddb_stubber.add_response('scan', {
+        'Items': [{'hash': {'S': 'a'}}],
+        'LastEvaluatedKey': {'hash': {'S': 'a'}}
+    }, {**base_params, 'Segment': 0})
+    ddb_stubber.add_response('scan', {
+        'Items': [{'hash': {'S': 'b'}}]
+    }, {**base_params, 'Segment': 0, 'ExclusiveStartKey': {'hash': 'a'}})
+    ddb_stubber.add_response('scan', {
+        'Items': [{'hash': {'S': 'c'}}]
+    }, {**base_params, 'Segment': 1})
+
+    items = ItemsModel.parallel_scan(segments=2, attributes=['hash'], filter_expression=Attr('score').gt(1),
+                                     max_workers=1)
+    assert sorted(item['hash'] for item in items) == ['a', 'b', 'c']
+    ddb_stubber.assert_no_pending_responses()
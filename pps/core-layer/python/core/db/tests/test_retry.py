@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from botocore.stub import Stubber
+
+from core.aws.invocation import invocation
+from ..db import db
+from ..retry import DeadlineExceededError, TokenBucket, retry_policy
+
+
+class ItemsModel(db.Model):
+    __table_name__ = 'items'
+
+
+@pytest.fixture(scope="function")
+def ddb_stubber():
+    ddb_stubber = Stubber(ItemsModel.get_table().meta.client)
+    ddb_stubber.activate()
+    retry_policy.reset()
+    yield ddb_stubber
+    retry_policy.reset()
+    ddb_stubber.deactivate()
+
+
+def test_retry_throttled(ddb_stubber):
+    params = {'TableName': 'items', 'Key': {'key': 'value'}}
+    ddb_stubber.add_client_error('get_item', 'ProvisionedThroughputExceededException', expected_params=params)
+    ddb_stubber.add_client_error('get_item', 'InternalServerError', expected_params=params)
+    ddb_stubber.add_response('get_item', {'Item': {'key': {'S': 'value'}}}, params)
+
+    with patch('time.sleep') as sleep:
+        result = ItemsModel.get({'key': 'value'})
+    assert result.item == {'key': 'value'}
+    assert sleep.call_count <= 2
+    ddb_stubber.assert_no_pending_responses()
+
+
+def test_not_retried(ddb_stubber):
+    ddb_stubber.add_client_error('get_item', 'ValidationException')
+    with pytest.raises(Exception) as error:
+        ItemsModel.get({'key': 'value'})
+    assert error.value.response['Error']['Code'] == 'ValidationException'
+    ddb_stubber.assert_no_pending_responses()
+
+
+def test_deadline(ddb_stubber):
+    ddb_stubber.add_client_error('get_item', 'ProvisionedThroughputExceededException')
+    context = SimpleNamespace(get_remaining_time_in_millis=lambda: 100)
+    with invocation(context=context):
+        assert retry_policy.remaining() < 0
+        with patch('random.uniform', return_value=0.05), pytest.raises(DeadlineExceededError):
+            ItemsModel.get({'key': 'value'})
+    assert retry_policy.deadline is None
+    ddb_stubber.assert_no_pending_responses()
+
+
+def test_token_bucket():
+    bucket = TokenBucket(max_rate=4, min_rate=1)
+    for _ in range(4):
+        assert bucket.reserve() == 0
+    assert bucket.reserve() > 0
+
+    bucket.on_throttle()
+    assert bucket.rate == 2
+    bucket.on_throttle()
+    bucket.on_throttle()
+    assert bucket.rate == 1
+    bucket.on_success()
+    assert bucket.rate == 1.5
+
+
+def test_client_does_not_retry():
+    # Stubber skips the retry handler of botocore, so the configuration itself is checked
+    assert ItemsModel.get_table().meta.client.meta.config.retries['total_max_attempts'] == 1
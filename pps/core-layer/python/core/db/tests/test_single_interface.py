@@ -2,7 +2,7 @@ import pytest
 from boto3.dynamodb.conditions import Key
 from botocore.stub import Stubber
 
-from .. import ModelIndex
+from .. import ModelIndex, ModelService
 
 interface = ModelIndex('items', 'hash')
 
@@ -129,3 +129,15 @@ def test_update(ddb_stubber):
         interface.update('value_h', {'key_a': 'value_a', 'key_b': 'value_b'}, 'value_r')
     interface.update('value_h', {'key_a': 'value_a', 'key_b': 'value_b'})
     ddb_stubber.assert_no_pending_responses()
+
+
+def test_interface_registry():
+    class Service(ModelService):
+        __table_name__ = 'items'
+        __partition_key__ = 'hash'
+        __indices__ = {'ByRange': ('range', 'hash')}
+
+    assert Service.get_interface() is Service.get_interface()
+    assert Service.get_interface('ByRange') is not Service.get_interface()
+    assert Service.get_interface('ByRange')._model is Service.get_interface()._model
+    assert interface._model is Service.get_interface()._model
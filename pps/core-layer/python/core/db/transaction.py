@@ -0,0 +1,108 @@
+from decimal import Decimal
+from typing import List, Dict, Any
+
+from . import expressions
+from .identity import identity_map
+from .model import execute
+
+TRANSACTION_SIZE = 100
+
+
+def _to_dynamo(value):
+    if type(value) is float:
+        return Decimal(str(value))
+    if type(value) is dict:
+        return {key: _to_dynamo(item) for key, item in value.items()}
+    if type(value) is list:
+        return [_to_dynamo(item) for item in value]
+    return value
+
+
+class Transaction:
+    """
+    Builder of a TransactWriteItems call over ModelIndex interfaces. Either every write is applied or none is
+    """
+
+    def __init__(self):
+        self._items: List[dict] = []
+        self._keys: List[tuple] = []
+        self._client = None
+
+    def __len__(self):
+        return len(self._items)
+
+    @staticmethod
+    def _serialize(value: Any) -> dict:
+        from boto3.dynamodb.types import TypeSerializer
+
+        return TypeSerializer().serialize(_to_dynamo(value))
+
+    def _add(self, interface, operation: str, key: dict, request: dict):
+        if len(self._items) >= TRANSACTION_SIZE:
+            raise ValueError(f"A transaction can not have more than {TRANSACTION_SIZE} items")
+        if self._client is None:
+            self._client = interface.client
+        # noinspection PyProtectedMember
+        model = interface._model
+        self._keys.append((model, key))
+        self._items.append({operation: {'TableName': model.__table_name__, **request}})
+
+    def _serialize_values(self, values: Dict[str, Any]) -> Dict[str, dict]:
+        return {name: self._serialize(value) for name, value in values.items()}
+
+    def put(self, interface, partition_key, item: dict, sort_key=None, raise_if_exists: bool = False):
+        key = interface.generate_key(partition_key, sort_key)
+        request = {'Item': {name: self._serialize(value) for name, value in {**item, **key}.items()}}
+        if raise_if_exists:
+            names = {}
+            request['ConditionExpression'] = ' AND '.join(
+                f'attribute_not_exists({expressions.add_to_attribute_names(name, names)})' for name in key)
+            request['ExpressionAttributeNames'] = names
+        self._add(interface, 'Put', key, request)
+        return self
+
+    def update(self, interface, partition_key, sort_key=None, updates: dict = None, append_to: dict = None,
+               add_to: Dict[str, int] = None, condition_equals: Dict[str, Any] = None):
+        key = interface.generate_key(partition_key, sort_key)
+        updates, append_to, add_to = updates or {}, append_to or {}, add_to or {}
+        condition_equals = condition_equals or {}
+        if len(updates) == 0 and len(append_to) == 0 and len(add_to) == 0:
+            raise ValueError("The updates, append_to and add_to dictionaries must not be empty at the same time")
+
+        compiled = expressions.compile_update(tuple(updates), tuple(append_to), tuple(add_to),
+                                              tuple(condition_equals))
+        request = {
+            'Key': self._serialize_values(key),
+            'UpdateExpression': compiled.expression,
+            'ExpressionAttributeNames': dict(compiled.names),
+            'ExpressionAttributeValues': self._serialize_values(
+                compiled.bind(updates, append_to, add_to, condition_equals))
+        }
+        if compiled.condition is not None:
+            request['ConditionExpression'] = compiled.condition
+        self._add(interface, 'Update', key, request)
+        return self
+
+    def condition_check(self, interface, partition_key, condition_equals: Dict[str, Any], sort_key=None):
+        key = interface.generate_key(partition_key, sort_key)
+        compiled = expressions.compile_update(condition_keys=tuple(condition_equals))
+        self._add(interface, 'ConditionCheck', key, {
+            'Key': self._serialize_values(key),
+            'ConditionExpression': compiled.condition,
+            'ExpressionAttributeNames': dict(compiled.names),
+            'ExpressionAttributeValues': self._serialize_values(compiled.bind(condition_equals=condition_equals))
+        })
+        return self
+
+    def commit(self, client_request_token: str = None):
+        """
+        Send every write in a single TransactWriteItems call. A failed condition raises the client's
+        TransactionCanceledException and nothing is written. Calls repeated with the same client_request_token
+        within ten minutes, e.g. retries, are only applied once
+        """
+        if len(self._items) == 0:
+            return None
+        for model, key in self._keys:
+            identity_map.invalidate(model, key)
+        return execute('TransactWriteItems', None, self._client.transact_write_items, TransactItems=self._items,
+                       ClientRequestToken=client_request_token)
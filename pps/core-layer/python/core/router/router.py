@@ -1,42 +1,120 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
 from core import HTTPEvent, JSONResponse
 from core.aws.errors import HTTPError
 
+Handler = Callable[[HTTPEvent], JSONResponse]
+
+
+class _Node:
+    """
+    Segment of the routes trie: static children by name and at most one {parameter} child
+    """
+    __slots__ = ('static', 'param', 'param_name', 'handlers')
+
+    def __init__(self):
+        self.static: Dict[str, '_Node'] = {}
+        self.param: Optional['_Node'] = None
+        self.param_name: Optional[str] = None
+        self.handlers: Dict[str, Handler] = {}
+
+
+def _is_param(segment: str) -> bool:
+    return len(segment) > 2 and segment[0] == '{' and segment[-1] == '}'
+
 
 class Router:
+    """
+    Dispatch HTTP events to the handlers registered for a method and a path template such as
+    /api/districts/{district}/. Templates are compiled once into a trie, so resolving a request costs one lookup per
+    path segment. Static segments are preferred over parameters, and raw paths are matched when the event has no
+    API Gateway resource, extracting the path parameters from them
+    """
     def __init__(self):
-        self.routes = {}
+        self._root = _Node()
+        self._methods = set()
 
     @staticmethod
     def standardize_resource(resource: str):
         return '/'.join(filter(lambda x: x != '', resource.split('/')))
 
-    def _add_route_method(self, method: str, resource: str, fun):
-        if self.routes.get(method) is None:
-            self.routes[method] = {}
-        resource = self.standardize_resource(resource)
-        self.routes[method][resource] = fun
+    @staticmethod
+    def _segments(resource: str) -> List[str]:
+        return [segment for segment in resource.split('/') if segment != '']
+
+    def add(self, method: str, resource: str, fun: Handler):
+        node = self._root
+        for segment in self._segments(resource):
+            if _is_param(segment):
+                name = segment[1:-1]
+                if node.param is None:
+                    node.param, node.param_name = _Node(), name
+                elif node.param_name != name:
+                    raise ValueError(f"Parameter {{{name}}} of {resource} conflicts with {{{node.param_name}}}")
+                node = node.param
+            else:
+                node = node.static.setdefault(segment, _Node())
+        node.handlers[method] = fun
+        self._methods.add(method)
+
+    def _match(self, node: _Node, method: str, segments: List[str], index: int,
+               params: Dict[str, str]) -> Optional[Handler]:
+        if index == len(segments):
+            return node.handlers.get(method)
+        segment = segments[index]
+        child = node.static.get(segment)
+        if child is not None:
+            found = self._match(child, method, segments, index + 1, params)
+            if found is not None:
+                return found
+        if node.param is not None:
+            found = self._match(node.param, method, segments, index + 1, params)
+            if found is not None:
+                if not _is_param(segment):
+                    params[node.param_name] = segment
+                return found
+        return None
+
+    def resolve(self, method: str, path: str) -> Tuple[Optional[Handler], Dict[str, str]]:
+        """
+        Find the handler of a method and a resource template or raw path, with the parameters taken from the path
+        """
+        params = {}
+        fun = self._match(self._root, method, self._segments(path), 0, params)
+        return fun, params
 
     def route(self, event: HTTPEvent) -> JSONResponse:
-        resources = self.routes.get(event.method)
-        if resources is None:
+        if event.method not in self._methods:
             return JSONResponse.generate_error(HTTPError.UNKNOWN_RESOURCE, f"Unknown method {event.method}")
-        resource = self.standardize_resource(event.resource)
-        fun = resources.get(resource)
+        resource = event.resource if event.resource is not None else event.path
+        fun, params = self.resolve(event.method, resource or '')
         if fun is None:
-            return JSONResponse.generate_error(HTTPError.UNKNOWN_RESOURCE, f"Unknown resource {event.resource}")
+            return JSONResponse.generate_error(HTTPError.UNKNOWN_RESOURCE, f"Unknown resource {resource}")
+        if len(params) > 0:
+            event.params = {**params, **event.params}
         return fun(event)
 
-    def post(self, resource: str, fun):
-        self._add_route_method("POST", resource, fun)
+    def _register(self, method: str, resource: str, fun: Optional[Handler]):
+        if fun is not None:
+            self.add(method, resource, fun)
+            return fun
+
+        def decorator(f: Handler) -> Handler:
+            self.add(method, resource, f)
+            return f
+        return decorator
+
+    def post(self, resource: str, fun: Handler = None):
+        return self._register("POST", resource, fun)
 
-    def get(self, resource: str, fun):
-        self._add_route_method("GET", resource, fun)
+    def get(self, resource: str, fun: Handler = None):
+        return self._register("GET", resource, fun)
 
-    def delete(self, resource: str, fun):
-        self._add_route_method("DELETE", resource, fun)
+    def delete(self, resource: str, fun: Handler = None):
+        return self._register("DELETE", resource, fun)
 
-    def patch(self, resource: str, fun):
-        self._add_route_method("PATCH", resource, fun)
+    def patch(self, resource: str, fun: Handler = None):
+        return self._register("PATCH", resource, fun)
 
-    def put(self, resource: str, fun):
-        self._add_route_method("PUT", resource, fun)
+    def put(self, resource: str, fun: Handler = None):
+        return self._register("PUT", resource, fun)
@@ -0,0 +1,48 @@
+import pytest
+
+from core import HTTPEvent, JSONResponse
+from ..router import Router
+
+
+@pytest.fixture
+def router():
+    router = Router()
+    router.get("/api/users/{sub}/tasks/", lambda event: JSONResponse({'route': 'list', **event.params}))
+    router.get("/api/users/{sub}/tasks/{stage}/", lambda event: JSONResponse({'route': 'stage', **event.params}))
+
+    @router.get("/api/users/{sub}/tasks/active/")
+    def active(event: HTTPEvent):
+        return JSONResponse({'route': 'active', **event.params})
+
+    router.post("/api/users/{sub}/tasks/active/complete", lambda event: JSONResponse({'route': 'complete'}))
+    return router
+
+
+def route(router: Router, method: str, **event) -> dict:
+    return router.route(HTTPEvent({'httpMethod': method, **event})).body
+
+
+def test_resource(router):
+    body = route(router, 'GET', resource='/api/users/{sub}/tasks/{stage}/', pathParameters={'sub': 'u', 'stage': 'a'})
+    assert body == {'route': 'stage', 'sub': 'u', 'stage': 'a'}
+    assert route(router, 'GET', resource='api/users/{sub}/tasks/active', pathParameters={'sub': 'u'})['route'] == \
+        'active'
+    assert route(router, 'POST', resource='/api/users/{sub}/tasks/active/complete/')['route'] == 'complete'
+
+
+def test_raw_path(router):
+    assert route(router, 'GET', path='/api/users/u-1/tasks/') == {'route': 'list', 'sub': 'u-1'}
+    assert route(router, 'GET', path='/api/users/u-1/tasks/active/') == {'route': 'active', 'sub': 'u-1'}
+    assert route(router, 'GET', path='/api/users/u-1/tasks/puberty/') == {'route': 'stage', 'sub': 'u-1',
+                                                                           'stage': 'puberty'}
+
+
+def test_unknown(router):
+    assert route(router, 'GET', path='/api/users/u-1/')['error'] == route(router, 'PUT', path='/api/')['error']
+    assert route(router, 'POST', path='/api/users/u-1/tasks/')['message'] == "Unknown resource /api/users/u-1/tasks/"
+    assert route(router, 'PUT', path='/api/')['message'] == "Unknown method PUT"
+
+
+def test_conflicting_parameters(router):
+    with pytest.raises(ValueError):
+        router.get("/api/users/{user}/", lambda event: None)
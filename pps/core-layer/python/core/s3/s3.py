@@ -1,8 +1,7 @@
 import json
 import os
 
-import boto3
-
+from core.aws import clients
 from core.aws.event import Authorizer
 
 
@@ -10,7 +9,7 @@ class Bucket:
 
     @staticmethod
     def get_s3():
-        return boto3.resource('s3')
+        return clients.resource('s3')
 
     def __init__(self, bucket_name: str):
         self._bucket = self.get_s3().Bucket(bucket_name)
@@ -1,21 +1,42 @@
-from datetime import datetime, date
-from typing import List
-
-import botocore
-from boto3.dynamodb.conditions import Attr
+import logging
+from datetime import datetime
+from typing import List, Optional
 
 from core import ModelService
 from core.aws.event import Authorizer
+from core.db import Transaction
 from core.db.model import Operator, UpdateReturnValues
+from core.db.results import QueryResult, Record
+from core.services.groups import GroupsService
 from core.services.shop import ShopService
-from core.utils.consts import VALID_STAGES, VALID_AREAS
+from core.utils.consts import VALID_AREAS
 from core.utils.key import clean_text, date_to_text, join_key, split_key
+from core.utils.paths import apply_updates, select_paths
+from core.utils.stages import calculate_stage
+
+logger = logging.getLogger('core.services')
+
+
+class Beneficiary(Record):
+    __slots__ = ('user', 'group', 'unit_user', 'full_name', 'nickname', 'birthdate', 'target',
+                 'completed', 'score', 'score_total', 'n_tasks', 'bought_items')
+    __keys__ = {
+        'unit_user': 'unit-user',
+        'full_name': 'full-name',
+        'score_total': 'score-total'
+    }
+
+
+ROSTER_ATTRIBUTES = ["group", "unit-user", "nickname", "birthdate", "score-total", "target"]
 
 
 class BeneficiariesService(ModelService):
     __table_name__ = "beneficiaries"
     __partition_key__ = "user"
-    __indices__ = {"ByGroup": ("group", "unit-user")}
+    __indices__ = {
+        "ByGroup": ("group", "unit-user"),
+        "ByGroupScore": ("group", "score-total")
+    }
 
     @staticmethod
     def generate_code(date: datetime, nick: str):
@@ -28,24 +49,153 @@ class BeneficiariesService(ModelService):
         interface = cls.get_interface()
         return interface.get(sub, attributes=attributes)
 
+    @classmethod
+    def get_record(cls, sub: str) -> Beneficiary:
+        return cls.get_interface().get(sub).record(Beneficiary)
+
+    @classmethod
+    def get_many(cls, subs: List[str], attributes: List[str] = None):
+        interface = cls.get_interface()
+        return interface.batch_get(subs, attributes=attributes)
+
     @classmethod
     def calculate_stage(cls, birth_date: datetime):
-        today = date.today()
-        age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
-        if age < 13:
-            return VALID_STAGES[0]
-        else:
-            return VALID_STAGES[1]
+        return calculate_stage(birth_date)
 
     @classmethod
-    def query_unit(cls, district: str, group: str, unit: str):
+    def query_unit(cls, district: str, group: str, unit: str, limit: int = None, start_key: dict = None):
         interface = cls.get_interface("ByGroup")
-        return interface.query(join_key(district, group), (Operator.BEGINS_WITH, join_key(unit, '')))
+        sort_key = (Operator.BEGINS_WITH, join_key(unit, ''))
+        if limit is None:
+            return interface.query_all(join_key(district, group), sort_key)
+        return interface.query(join_key(district, group), sort_key, limit=limit, start_key=start_key)
 
     @classmethod
-    def query_group(cls, district: str, group: str):
+    def query_group(cls, district: str, group: str, limit: int = None, start_key: dict = None):
         interface = cls.get_interface("ByGroup")
-        return interface.query(join_key(district, group))
+        if limit is None:
+            return interface.query_all(join_key(district, group))
+        return interface.query(join_key(district, group), limit=limit, start_key=start_key)
+
+    @staticmethod
+    def _unit_filter(unit: str = None):
+        if unit is None:
+            return None
+        from boto3.dynamodb.conditions import Attr
+        return Attr("unit-user").begins_with(join_key(unit, ''))
+
+    @classmethod
+    def top_scores(cls, district: str, group: str, unit: str = None, limit: int = 10, attributes: List[str] = None):
+        """
+        Get the beneficiaries of a group, or of one of its units, with the highest total score, best first.
+        The score index is sparse: only beneficiaries with a score-total attribute are ranked. Units are filtered
+        out of the group partition, reading further pages until `limit` beneficiaries are found
+        """
+        interface = cls.get_interface("ByGroupScore")
+        return QueryResult.from_items(interface.iter_query(join_key(district, group), attributes=attributes,
+                                                           max_items=limit, scan_forward=False,
+                                                           filter_expression=cls._unit_filter(unit)))
+
+    @classmethod
+    def get_rank(cls, sub: str, by_unit: bool = True):
+        """
+        Get the position (starting at 1) of a beneficiary in the score ranking of its unit or group, or None if the
+        beneficiary is not ranked. Beneficiaries with the same total score share their position
+        """
+        beneficiary = cls.get(sub, ["group", "unit-user", "score-total"]).item
+        if beneficiary is None or beneficiary.get("score-total") is None:
+            return None
+        unit = split_key(beneficiary["unit-user"])[0] if by_unit else None
+        score = int(beneficiary["score-total"])
+        interface = cls.get_interface("ByGroupScore")
+        return {
+            "rank": interface.count(beneficiary["group"], (Operator.GREATER_THAN, score),
+                                    filter_expression=cls._unit_filter(unit)) + 1,
+            "score": score
+        }
+
+    @classmethod
+    def backfill_scores(cls, district: str, group: str) -> int:
+        """
+        Set score-total to the sum of the area scores for the beneficiaries of a group whose total is missing or
+        wrong: the ones created before the score index existed, and the ones whose total was started from 0 by a
+        write made before they were backfilled. Beneficiaries whose score changes while they are backfilled are
+        skipped and picked up by the next run. Returns the number of beneficiaries updated
+        """
+        from boto3.dynamodb.conditions import Attr
+        interface = cls.get_interface()
+        # the ByGroup index does not project score-total, so the scores are read from the table
+        users = [beneficiary["user"] for beneficiary in cls.query_group(district, group).items]
+        updated = 0
+        for result in interface.batch_get(users, attributes=["score", "score-total"]):
+            beneficiary = result.item
+            if beneficiary is None:
+                continue
+            # cleaned items hold floats, which can not be written back: scores are whole numbers
+            score = {area: int(value) for area, value in beneficiary.get("score", {}).items()}
+            total = sum(score.values())
+            if beneficiary.get("score-total") is not None and int(beneficiary["score-total"]) == total:
+                continue
+            try:
+                interface.update(beneficiary["user"], {"score-total": total}, None,
+                                 conditions=Attr("score").eq(score), return_values=UpdateReturnValues.NONE)
+                updated += 1
+            except interface.client.exceptions.ConditionalCheckFailedException:
+                pass
+        return updated
+
+    @staticmethod
+    def roster_entry(beneficiary: dict) -> dict:
+        score = beneficiary.get("score-total")
+        if score is None:
+            # the ByGroup index does not project score-total, its items only have the score of each area
+            score = sum((beneficiary.get("score") or {}).values())
+        return {
+            "unit": split_key(beneficiary["unit-user"])[0],
+            "nickname": beneficiary.get("nickname"),
+            "birthdate": beneficiary.get("birthdate"),
+            "score": int(score),
+            "active-task": beneficiary.get("target") is not None
+        }
+
+    @classmethod
+    def sync_roster(cls, sub: str, beneficiary: dict, old_group: str = None):
+        """
+        Copy the roster entry of a beneficiary, as it was just written, into the roster of its group, and drop it
+        from `old_group` if the beneficiary left it. The roster is a cache of the beneficiaries table: failures
+        are logged and not raised, and groups without a roster get a full one built by rebuild_roster
+        """
+        from botocore.exceptions import BotoCoreError, ClientError
+        group_key = beneficiary.get("group")
+        conditional_check_failed = GroupsService.get_interface().client.exceptions.ConditionalCheckFailedException
+        try:
+            if old_group is not None and old_group != group_key:
+                try:
+                    GroupsService.set_roster_member(*split_key(old_group), sub)
+                except conditional_check_failed:
+                    pass
+            if group_key is None:
+                return
+            district, group = split_key(group_key)
+            try:
+                GroupsService.set_roster_member(district, group, sub, cls.roster_entry(beneficiary))
+            except conditional_check_failed:
+                cls.rebuild_roster(district, group)
+        except (BotoCoreError, ClientError):
+            logger.warning("Could not update the roster of %s for beneficiary %s", group_key, sub, exc_info=True)
+
+    @classmethod
+    def build_roster(cls, district: str, group: str) -> dict:
+        return {split_key(beneficiary["unit-user"])[1]: cls.roster_entry(beneficiary)
+                for beneficiary in cls.query_group(district, group).items}
+
+    @classmethod
+    def rebuild_roster(cls, district: str, group: str) -> Optional[int]:
+        """
+        Rebuild the roster of a group from its beneficiaries, dropping the entries of the ones that left it.
+        Returns the new roster version, or None if the group does not exist
+        """
+        return GroupsService.set_roster(district, group, cls.build_roster(district, group))
 
     @classmethod
     def create(cls, district: str, group: str, authorizer: Authorizer):
@@ -60,22 +210,52 @@ class BeneficiariesService(ModelService):
             "target": None,
             "completed": None,
             "score": {area: 0 for area in VALID_AREAS},
+            "score-total": 0,
             "n_tasks": {area: 0 for area in VALID_AREAS},
             "bought_items": {}
         }
 
+        from botocore.exceptions import ClientError
         try:
             interface.create(authorizer.sub, beneficiary,
                              raise_if_exists_partition=True)
-            return True
-        except botocore.exceptions.ClientError as e:
+        except ClientError as e:
             print(str(e))
             return False
+        cls.sync_roster(authorizer.sub, beneficiary)
+        return True
+
+    @classmethod
+    def _update_synced(cls, sub: str, updates: Optional[dict], add_to: Optional[dict],
+                       return_values: UpdateReturnValues, **kwargs) -> dict:
+        """
+        Update a beneficiary and its roster entry. UPDATED_NEW does not hold the group of the beneficiary, so the
+        item is read back from the ALL_OLD values of the write itself, with the updates applied to them, and the
+        requested return values are cut out of those
+        """
+        response = cls.get_interface().update(sub, updates, None, add_to=add_to,
+                                              return_values=UpdateReturnValues.ALL_OLD, **kwargs)
+        old = response.get("Attributes", {})
+        new = apply_updates(old, updates, add_to)
+        cls.sync_roster(sub, new, old.get("group"))
+
+        paths = [*(updates or {}), *(add_to or {})]
+        attributes = {
+            UpdateReturnValues.ALL_OLD: lambda: old,
+            UpdateReturnValues.UPDATED_OLD: lambda: select_paths(old, paths),
+            UpdateReturnValues.ALL_NEW: lambda: new,
+            UpdateReturnValues.UPDATED_NEW: lambda: select_paths(new, paths),
+            UpdateReturnValues.NONE: lambda: None
+        }[return_values]()
+        response = {key: value for key, value in response.items() if key != "Attributes"}
+        if attributes is not None:
+            response["Attributes"] = attributes
+        return response
 
     @classmethod
     def buy_item(cls, authorizer: Authorizer, area: str, item_category: str, item_release: int, item_id: int,
                  amount: int = 1):
-        interface = cls.get_interface()
+        from boto3.dynamodb.conditions import Attr
         item = ShopService.get(item_category, item_release, item_id).item
         if item is None:
             return False
@@ -83,11 +263,12 @@ class BeneficiariesService(ModelService):
         price = item['price']
 
         release_id = item_release * 100000 + item_id
-        return interface.update(authorizer.sub, None, None, add_to={
+        return cls._update_synced(authorizer.sub, None, {
             f'bought_items.{item_category}{release_id}': amount,
-            f'score.{area}': int(-amount * price)
-        }, conditions=Attr(f'score.{area}').gte(int(amount * price)), return_values=UpdateReturnValues.UPDATED_NEW)[
-            'Attributes']
+            f'score.{area}': int(-amount * price),
+            'score-total': int(-amount * price)
+        }, UpdateReturnValues.UPDATED_NEW, conditions=Attr(f'score.{area}').gte(int(amount * price)),
+            cache_expression=False)['Attributes']
 
     @classmethod
     def update(cls, authorizer: Authorizer, group: str = None, name: str = None, nickname: str = None,
@@ -103,15 +284,16 @@ class BeneficiariesService(ModelService):
         if len(condition_equals) == 0:
             condition_equals = None
 
-        return interface.update(authorizer.sub, updates, None, return_values=return_values,
-                                condition_equals=condition_equals)
+        if group is None and nickname is None and active_task is None:
+            return interface.update(authorizer.sub, updates, None, return_values=return_values,
+                                    condition_equals=condition_equals)
+        return cls._update_synced(authorizer.sub, updates, None, return_values, condition_equals=condition_equals)
 
     @classmethod
     def clear_active_task(cls, authorizer: Authorizer,
                           return_values: UpdateReturnValues = UpdateReturnValues.UPDATED_OLD,
                           receive_score=False
                           ):
-        interface = cls.get_interface()
         updates = {'target': None}
         add_to = None
         if receive_score:
@@ -123,11 +305,25 @@ class BeneficiariesService(ModelService):
             area = split_key(beneficiary['target']['objective'])[1]
             add_to = {
                 f'score.{area}': score,
+                'score-total': score,
                 f'n_tasks.{area}': 1
             }
 
-        return interface.update(authorizer.sub, updates, None, return_values=return_values,
-                                add_to=add_to)["Attributes"]
+        return cls._update_synced(authorizer.sub, updates, add_to, return_values)["Attributes"]
+
+    @classmethod
+    def transact_complete_active_task(cls, transaction: Transaction, authorizer: Authorizer, active_task: dict):
+        """
+        Add to a transaction the write that clears the given active task and gives its score to the beneficiary.
+        The transaction is cancelled if the active task changed after it was read, including when the same objective
+        was completed and started again
+        """
+        area = split_key(active_task['objective'])[1]
+        return transaction.update(cls.get_interface(), authorizer.sub, updates={'target': None}, add_to={
+            f'score.{area}': int(active_task['score']),
+            'score-total': int(active_task['score']),
+            f'n_tasks.{area}': 1
+        }, condition_equals={'target.objective': active_task['objective'], 'target.created': active_task['created']})
 
     @classmethod
     def update_active_task(cls, authorizer: Authorizer, description: str, tasks: list):
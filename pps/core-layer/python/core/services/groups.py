@@ -1,12 +1,14 @@
 import hashlib
 import random
-from typing import Any
+from typing import Any, Optional
 
 from schema import Schema
 
 from core import ModelService
+from core.db.model import UpdateReturnValues
 from core.utils import join_key
 from core.utils.key import split_key
+from core.utils.stages import classify_stages
 
 schema = Schema({
     'name': str,
@@ -68,9 +70,9 @@ class GroupsService(ModelService):
         return interface.get(district, code, attributes=attributes)
 
     @classmethod
-    def query(cls, district: str):
+    def query(cls, district: str, limit: int = None, start_key: dict = None):
         interface = cls.get_interface()
-        return interface.query(district, attributes=["district", "name", "code"])
+        return interface.query(district, attributes=["district", "name", "code"], limit=limit, start_key=start_key)
 
     @classmethod
     def get_by_code(cls, code: str):
@@ -79,3 +81,64 @@ class GroupsService(ModelService):
 
         interface = cls.get_interface("ByBeneficiaryCode")
         return interface.get(district, code, attributes=["district", "code", "name"])
+
+    @staticmethod
+    def roster_district(district: str) -> str:
+        """
+        Partition key of the roster items of the groups of a district. Rosters are kept out of the group items, and
+        out of the partition of the groups, so that reading or listing groups does not pay for their rosters
+        """
+        return join_key(district, 'roster')
+
+    @classmethod
+    def set_roster_member(cls, district: str, group: str, sub: str, entry: dict = None):
+        """
+        Write the roster entry of a beneficiary and bump the roster version. A None entry marks a beneficiary that
+        left the group. Fails with ConditionalCheckFailedException if the group has no roster yet
+        """
+        from boto3.dynamodb.conditions import Attr
+        interface = cls.get_interface()
+        interface.update(cls.roster_district(district), {f'roster.{sub}': entry}, group,
+                         add_to={'roster-version': 1}, conditions=Attr('roster').exists(),
+                         return_values=UpdateReturnValues.NONE, cache_expression=False)
+
+    @classmethod
+    def set_roster(cls, district: str, group: str, roster: dict) -> Optional[int]:
+        """
+        Replace the whole roster of an existing group, returning the new roster version, or None if the group
+        does not exist
+        """
+        interface = cls.get_interface()
+        if cls.get(district, group, attributes=['code']).item is None:
+            return None
+        return int(interface.update(cls.roster_district(district), {'roster': roster}, group,
+                                    add_to={'roster-version': 1},
+                                    return_values=UpdateReturnValues.UPDATED_NEW)['Attributes']['roster-version'])
+
+    @classmethod
+    def get_roster(cls, district: str, group: str, unit: str = None):
+        """
+        Read the roster of a group, or of one of its units, with a single GetItem. Groups without a roster item
+        get theirs built from their beneficiaries on the first read. Returns None if the group does not exist
+        """
+        item = cls.get_interface().get(cls.roster_district(district), group,
+                                       attributes=['roster', 'roster-version']).item
+        if item is not None:
+            roster, version = item['roster'], item['roster-version']
+        else:
+            from core.services.beneficiaries import BeneficiariesService
+            roster = BeneficiariesService.build_roster(district, group)
+            version = cls.set_roster(district, group, roster)
+            if version is None:
+                return None
+
+        members = [{'sub': sub, **entry} for sub, entry in roster.items()
+                   if entry is not None and (unit is None or entry['unit'] == unit)]
+        stages = classify_stages([member.pop('birthdate', None) for member in members])
+        for member, stage in zip(members, stages):
+            member['stage'] = stage
+            member['score'] = int(member['score'])
+        return {
+            'version': int(version),
+            'members': members
+        }
@@ -1,28 +1,80 @@
+import copy
 import json
 import math
 import os
+import time
+from typing import Dict, Tuple, Any, Optional
 
 from core.exceptions.notfound import NotFoundException
 
 
+class _CachedFile:
+    def __init__(self, mtime: float, data: Any, index: Optional[Dict[Tuple[str, int, int], Any]]):
+        self.checked = time.monotonic()
+        self.mtime = mtime
+        self.data = data
+        self.index = index
+
+
 class ObjectivesService:
-    @staticmethod
-    def get_stage_objectives(stage):
-        this_path = os.path.dirname(os.path.realpath(__file__))
-        with open(os.path.join(this_path, '../common/objectives', f'{stage}.json')) as f:
-            objectives = json.load(f)
-        return objectives
+    __common_path__ = os.path.join(os.path.dirname(os.path.realpath(__file__)), '../common')
+    __cache_ttl__ = 60
+
+    _cache: Dict[str, _CachedFile] = {}
 
     @staticmethod
-    def get_score_configuration():
-        this_path = os.path.dirname(os.path.realpath(__file__))
-        with open(os.path.join(this_path, '../common/', f'score.json')) as f:
-            conf = json.load(f)
-        return conf
+    def index_objectives(objectives: dict) -> Dict[Tuple[str, int, int], Any]:
+        return {
+            (area, line + 1, sub_line + 1): objective
+            for area, lines in objectives.items()
+            for line, sub_lines in enumerate(lines)
+            for sub_line, objective in enumerate(sub_lines)
+        }
+
+    @classmethod
+    def _load(cls, path: str, index: bool = False) -> _CachedFile:
+        """
+        Read-through cache of parsed files. The modification time is checked at most once every __cache_ttl__
+        seconds and the file is parsed again only when it changed
+        """
+        cached = cls._cache.get(path)
+        if cached is not None and time.monotonic() - cached.checked < cls.__cache_ttl__:
+            return cached
+
+        mtime = os.stat(path).st_mtime
+        if cached is not None and cached.mtime == mtime:
+            cached.checked = time.monotonic()
+            return cached
+
+        with open(path) as f:
+            data = json.load(f)
+        cached = _CachedFile(mtime, data, cls.index_objectives(data) if index else None)
+        cls._cache[path] = cached
+        return cached
+
+    @classmethod
+    def _load_stage(cls, stage: str) -> _CachedFile:
+        return cls._load(os.path.join(cls.__common_path__, 'objectives', f'{stage}.json'), index=True)
+
+    @classmethod
+    def get_stage_objectives(cls, stage):
+        """
+        Objectives of a stage, shared between calls so they must not be modified
+        """
+        return cls._load_stage(stage).data
+
+    @classmethod
+    def get_score_configuration(cls):
+        return cls._load(os.path.join(cls.__common_path__, 'score.json')).data
 
     @classmethod
     def get(cls, stage: str, area: str, line: int, sub_line: int):
-        objectives = cls.get_stage_objectives(stage)
+        cached = cls._load_stage(stage)
+        objective = cached.index.get((area, line, sub_line))
+        if objective is not None:
+            return objective
+
+        objectives = cached.data
         if area not in objectives:
             raise NotFoundException(f"Area {area} not found")
         objectives = objectives[area]
@@ -37,7 +89,7 @@ class ObjectivesService:
 
     @classmethod
     def query(cls, stage: str):
-        return cls.get_stage_objectives(stage)
+        return copy.deepcopy(cls.get_stage_objectives(stage))
 
     @classmethod
     def calculate_score_for_task(cls, area: str, n_tasks: dict):
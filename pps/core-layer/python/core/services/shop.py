@@ -24,10 +24,11 @@ class ShopService(ModelService):
         return index.create(category, item, release_id, raise_if_exists_sort=True, raise_if_exists_partition=True)
 
     @classmethod
-    def query(cls, category: str, release: int):
+    def query(cls, category: str, release: int, limit: int = None, start_key: dict = None):
         index = cls.get_interface()
         result = index.query(category, (Operator.LESS_THAN, int((release + 1) * 1e5)),
-                             attributes=['name', 'category', 'description', 'release-id', 'price'])
+                             attributes=['name', 'category', 'description', 'release-id', 'price'], limit=limit,
+                             start_key=start_key)
         for item in result.items:
             release = int(item['release-id'] // 100000)
             id_ = int(item['release-id'] % 100000)
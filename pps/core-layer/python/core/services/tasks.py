@@ -1,3 +1,4 @@
+import hashlib
 import time
 from typing import List
 
@@ -5,9 +6,10 @@ from schema import Schema
 
 from core import ModelService
 from core.aws.event import Authorizer
-from core.db.model import Operator, UpdateReturnValues
+from core.db import Transaction
+from core.db.model import Operator
 from core.db.results import GetResult
-from core.services.beneficiaries import BeneficiariesService
+from core.services.beneficiaries import BeneficiariesService, ROSTER_ATTRIBUTES
 from core.services.objectives import ObjectivesService
 from core.utils import join_key
 from core.utils.key import split_key
@@ -24,12 +26,15 @@ class TasksService(ModelService):
         return interface.get(authorizer.sub, join_key(stage, area, subline))
 
     @classmethod
-    def query(cls, authorizer: Authorizer, stage: str = None, area: str = None):
+    def query(cls, authorizer: Authorizer, stage: str = None, area: str = None, limit: int = None,
+              start_key: dict = None):
         interface = cls.get_interface()
         args = [arg for arg in (stage, area) if arg is not None]
         sort_key = (Operator.BEGINS_WITH, join_key(*args, '')) if len(args) > 0 else None
-        return interface.query(partition_key=authorizer.sub, sort_key=sort_key,
-                               attributes=['objective-description', 'completed', 'tasks'])
+        attributes = ['objective-description', 'completed', 'tasks']
+        if limit is None:
+            return interface.query_all(partition_key=authorizer.sub, sort_key=sort_key, attributes=attributes)
+        return interface.query(authorizer.sub, sort_key, limit=limit, start_key=start_key, attributes=attributes)
 
     """Active Task methods"""
 
@@ -72,15 +77,31 @@ class TasksService(ModelService):
 
     @classmethod
     def complete_active_task(cls, authorizer: Authorizer):
-        old_active_task = BeneficiariesService.clear_active_task(authorizer,
-                                                                 return_values=UpdateReturnValues.UPDATED_OLD,
-                                                                 receive_score=True)["target"]
-        if old_active_task is None:
+        # the raw item keeps the Decimals of the task, which is written back as it was read
+        beneficiary = BeneficiariesService.get(authorizer.sub, ROSTER_ATTRIBUTES).as_dict()
+        if beneficiary is None or beneficiary.get('target') is None:
             return None
 
-        interface = cls.get_interface()
-        old_active_task['completed'] = True
-        for subtask in old_active_task['tasks']:
-            subtask['completed'] = True
-        interface.create(authorizer.sub, old_active_task, old_active_task['objective'])
-        return old_active_task
+        old_active_task = beneficiary['target']
+        completed_task = {
+            **old_active_task,
+            'completed': True,
+            'tasks': [{**subtask, 'completed': True} for subtask in old_active_task['tasks']]
+        }
+
+        transaction = Transaction()
+        BeneficiariesService.transact_complete_active_task(transaction, authorizer, old_active_task)
+        transaction.put(cls.get_interface(), authorizer.sub, completed_task, old_active_task['objective'])
+        # the token identifies this active task, so a retried completion is not applied twice
+        token = hashlib.sha1(join_key(authorizer.sub, old_active_task['objective'],
+                                      str(old_active_task['created'])).encode()).hexdigest()[:36]
+        try:
+            transaction.commit(client_request_token=token)
+        except cls.exceptions().TransactionCanceledException:
+            return None
+        BeneficiariesService.sync_roster(authorizer.sub, {
+            **beneficiary,
+            'target': None,
+            'score-total': beneficiary.get('score-total', 0) + int(old_active_task['score'])
+        })
+        return completed_task
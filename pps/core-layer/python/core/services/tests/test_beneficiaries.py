@@ -1,5 +1,5 @@
 import pytest
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Attr, Key
 from botocore.stub import Stubber
 
 from core.services.beneficiaries import BeneficiariesService
@@ -34,3 +34,87 @@ def test_query_unit(ddb_stubber: Stubber):
     ddb_stubber.add_response('query', response, params)
     BeneficiariesService.query_unit('district', 'group', 'scouts')
     ddb_stubber.assert_no_pending_responses()
+
+
+def test_top_scores(ddb_stubber: Stubber):
+    params = {
+        'IndexName': 'ByGroupScore',
+        'KeyConditionExpression': Key('group').eq('district::group'),
+        'FilterExpression': Attr('unit-user').begins_with('scouts::'),
+        'ScanIndexForward': False,
+        'Limit': 3,
+        'TableName': 'beneficiaries'}
+    last_key = {'user': 'u2', 'group': 'district::group', 'score-total': 50}
+    response = {'Items': [{'user': {'S': 'u2'}, 'score-total': {'N': '50'}}],
+                'LastEvaluatedKey': {'user': {'S': 'u2'}, 'group': {'S': 'district::group'},
+                                     'score-total': {'N': '50'}}}
+    ddb_stubber.add_response('query', response, params)
+    response = {'Items': [{'user': {'S': 'u1'}, 'score-total': {'N': '30'}},
+                          {'user': {'S': 'u3'}, 'score-total': {'N': '10'}}]}
+    ddb_stubber.add_response('query', response, {**params, 'Limit': 2, 'ExclusiveStartKey': last_key})
+    result = BeneficiariesService.top_scores('district', 'group', 'scouts', limit=3)
+    assert [item['user'] for item in result.items] == ['u2', 'u1', 'u3']
+    ddb_stubber.assert_no_pending_responses()
+
+
+def test_get_rank(ddb_stubber: Stubber):
+    get_params = {
+        'TableName': 'beneficiaries',
+        'Key': {'user': 'u1'},
+        'ProjectionExpression': '#model_group, #model_unit_user, #model_score_total',
+        'ExpressionAttributeNames': {'#model_group': 'group', '#model_unit_user': 'unit-user',
+                                     '#model_score_total': 'score-total'}
+    }
+    get_response = {'Item': {'group': {'S': 'district::group'}, 'unit-user': {'S': 'scouts::u1'},
+                             'score-total': {'N': '30'}}}
+    count_params = {
+        'IndexName': 'ByGroupScore',
+        'KeyConditionExpression': Key('group').eq('district::group') & Key('score-total').gt(30),
+        'FilterExpression': Attr('unit-user').begins_with('scouts::'),
+        'Select': 'COUNT',
+        'TableName': 'beneficiaries'}
+    ddb_stubber.add_response('get_item', get_response, get_params)
+    ddb_stubber.add_response('query', {'Count': 2}, count_params)
+    assert BeneficiariesService.get_rank('u1') == {'rank': 3, 'score': 30}
+    ddb_stubber.assert_no_pending_responses()
+
+
+def test_backfill_scores(ddb_stubber: Stubber):
+    query_params = {
+        'IndexName': 'ByGroup',
+        'KeyConditionExpression': Key('group').eq('district::group'),
+        'TableName': 'beneficiaries'}
+    query_response = {'Items': [
+        {'user': {'S': user}, 'unit-user': {'S': f'scouts::{user}'}} for user in ('u1', 'u2', 'u3')
+    ]}
+    batch_get_params = {
+        'RequestItems': {'beneficiaries': {
+            'Keys': [{'user': 'u1'}, {'user': 'u2'}, {'user': 'u3'}],
+            'ProjectionExpression': 'score, #model_score_total, #model_user',
+            'ExpressionAttributeNames': {'#model_score_total': 'score-total', '#model_user': 'user'}
+        }}}
+    batch_get_response = {'Responses': {'beneficiaries': [
+        # never backfilled
+        {'user': {'S': 'u1'}, 'score': {'M': {'corporality': {'N': '10'}, 'creativity': {'N': '5'}}}},
+        # already backfilled
+        {'user': {'S': 'u2'}, 'score-total': {'N': '7'}, 'score': {'M': {'corporality': {'N': '7'}}}},
+        # total started from 0 by a purchase made before the backfill
+        {'user': {'S': 'u3'}, 'score-total': {'N': '-10'}, 'score': {'M': {'corporality': {'N': '20'}}}}
+    ]}}
+
+    def update_params(user: str, total: int, score: dict):
+        return {
+            'TableName': 'beneficiaries',
+            'Key': {'user': user},
+            'UpdateExpression': 'SET #attr_score_total=:val_score_total',
+            'ExpressionAttributeNames': {'#attr_score_total': 'score-total'},
+            'ExpressionAttributeValues': {':val_score_total': total},
+            'ConditionExpression': Attr('score').eq(score),
+            'ReturnValues': 'NONE'}
+
+    ddb_stubber.add_response('query', query_response, query_params)
+    ddb_stubber.add_response('batch_get_item', batch_get_response, batch_get_params)
+    ddb_stubber.add_response('update_item', {}, update_params('u1', 15, {'corporality': 10, 'creativity': 5}))
+    ddb_stubber.add_response('update_item', {}, update_params('u3', 20, {'corporality': 20}))
+    assert BeneficiariesService.backfill_scores('district', 'group') == 2
+    ddb_stubber.assert_no_pending_responses()
@@ -1,3 +1,7 @@
+import json
+import os
+from unittest.mock import patch
+
 import pytest
 
 from core.exceptions.notfound import NotFoundException
@@ -21,3 +25,24 @@ def test_get():
         ObjectivesService.get("puberty", "spirituality", 1, 3)
     ObjectivesService.get("puberty", "spirituality", 1, 1)
 
+
+def test_cache(tmp_path, monkeypatch):
+    objectives_path = tmp_path / 'objectives'
+    objectives_path.mkdir()
+    stage_file = objectives_path / 'puberty.json'
+    stage_file.write_text(json.dumps({'spirituality': [['first', 'second'], ['third']]}))
+
+    monkeypatch.setattr(ObjectivesService, '__common_path__', str(tmp_path))
+    monkeypatch.setattr(ObjectivesService, '_cache', {})
+
+    assert ObjectivesService.get('puberty', 'spirituality', 1, 2) == 'second'
+    with patch('builtins.open', side_effect=AssertionError("The file must not be read again")):
+        assert ObjectivesService.get('puberty', 'spirituality', 2, 1) == 'third'
+        with pytest.raises(NotFoundException):
+            ObjectivesService.get('puberty', 'spirituality', 2, 2)
+
+    stage_file.write_text(json.dumps({'spirituality': [['changed']]}))
+    os.utime(stage_file, (1, 1))
+    assert ObjectivesService.get('puberty', 'spirituality', 1, 1) == 'first'
+    monkeypatch.setattr(ObjectivesService, '__cache_ttl__', 0)
+    assert ObjectivesService.get('puberty', 'spirituality', 1, 1) == 'changed'
@@ -1 +1,12 @@
-from .key import join_key
+from typing import TYPE_CHECKING
+
+from .lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .key import join_key
+
+__all__ = ['join_key']
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'join_key': '.key'
+})
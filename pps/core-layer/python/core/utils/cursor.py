@@ -0,0 +1,100 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import os
+import secrets
+from decimal import Decimal
+from typing import Optional
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+_SIGNATURE_SIZE = 16
+
+# every container must share the secret for the cursors it signs to be valid in the others, so deployments set
+# CURSOR_SECRET; the random fallback only keeps local runs and tests working
+_secret = os.environ.get('CURSOR_SECRET', '').encode('utf-8') or secrets.token_bytes(32)
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def _default(o):
+    if isinstance(o, Decimal):
+        return int(o) if o == o.to_integral_value() else float(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def _sign(scope: str, payload: bytes) -> bytes:
+    return hmac.new(_secret, scope.encode('utf-8') + b'\0' + payload, hashlib.sha256).digest()[:_SIGNATURE_SIZE]
+
+
+def encode_cursor(key: Optional[dict], scope: str = '') -> Optional[str]:
+    """
+    Turn the LastEvaluatedKey of a query into an opaque, URL-safe cursor, signed for the listing given by `scope`
+    """
+    if key is None:
+        return None
+    payload = json.dumps(key, default=_default, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return base64.urlsafe_b64encode(_sign(scope, payload) + payload).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor: Optional[str], scope: str = '') -> Optional[dict]:
+    """
+    Get back the ExclusiveStartKey of a cursor, raising InvalidCursorError if it was altered or belongs to another
+    listing
+    """
+    if cursor is None or cursor == '':
+        return None
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+    except (binascii.Error, ValueError):
+        raise InvalidCursorError("Cursor is not valid base64")
+    signature, payload = data[:_SIGNATURE_SIZE], data[_SIGNATURE_SIZE:]
+    if not hmac.compare_digest(signature, _sign(scope, payload)):
+        raise InvalidCursorError("Cursor signature does not match")
+    # numbers of DynamoDB keys must go back as int or Decimal, never float
+    return json.loads(payload, parse_float=Decimal)
+
+
+class Page:
+    """
+    Page size and start key requested through the `limit` and `cursor` query string parameters of a list endpoint
+    """
+    __slots__ = ('scope', 'limit', 'start_key')
+
+    def __init__(self, scope: str, limit: int = None, start_key: dict = None):
+        self.scope = scope
+        self.limit = limit
+        self.start_key = start_key
+
+    @classmethod
+    def from_event(cls, event) -> 'Page':
+        """
+        Read the page of an HTTPEvent. Without limit nor cursor the whole listing is requested (limit is None).
+        Cursors are scoped to the resource and path parameters they were issued for
+        """
+        scope = json.dumps([event.resource, event.params], sort_keys=True, separators=(',', ':'))
+        limit = event.queryParams.get('limit')
+        cursor = event.queryParams.get('cursor')
+        if limit is None and cursor is None:
+            return cls(scope)
+        try:
+            limit = DEFAULT_PAGE_SIZE if limit is None else int(limit)
+        except ValueError:
+            raise InvalidCursorError(f"Limit must be an integer, got {limit}")
+        if not 0 < limit <= MAX_PAGE_SIZE:
+            raise InvalidCursorError(f"Limit must be between 1 and {MAX_PAGE_SIZE}")
+        return cls(scope, limit, decode_cursor(cursor, scope))
+
+    def body(self, result) -> dict:
+        """
+        Body of a page of results, with the cursor of the next page or None if this is the last one
+        """
+        return {
+            "items": result.items,
+            "count": result.count,
+            "cursor": encode_cursor(result.last_evaluated_key, self.scope)
+        }
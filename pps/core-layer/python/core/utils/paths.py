@@ -0,0 +1,49 @@
+import copy
+from typing import Any, Dict, Iterable, Optional
+
+
+def get_path(item: dict, path: str, default=None):
+    """
+    Get the value of a dotted attribute path (e.g. score.corporality) of an item
+    """
+    value = item
+    for name in path.split('.'):
+        if not isinstance(value, dict) or name not in value:
+            return default
+        value = value[name]
+    return value
+
+
+def set_path(item: dict, path: str, value):
+    *parents, name = path.split('.')
+    for parent in parents:
+        item = item.setdefault(parent, {})
+    item[name] = value
+
+
+def apply_updates(item: dict, updates: Optional[Dict[str, Any]] = None,
+                  add_to: Optional[Dict[str, Any]] = None) -> dict:
+    """
+    Copy of an item with the SET `updates` and the ADD `add_to` of an UpdateItem applied, as ALL_NEW would return it
+    """
+    item = copy.deepcopy(item)
+    for path, value in (updates or {}).items():
+        set_path(item, path, value)
+    for path, value in (add_to or {}).items():
+        set_path(item, path, get_path(item, path, 0) + value)
+    return item
+
+
+def select_paths(item: dict, paths: Iterable[str]) -> dict:
+    """
+    The given dotted attribute paths of an item, nested as UPDATED_OLD and UPDATED_NEW return them
+    """
+    selected = {}
+    for path in paths:
+        value = get_path(item, path, _MISSING)
+        if value is not _MISSING:
+            set_path(selected, path, value)
+    return selected
+
+
+_MISSING = object()
@@ -0,0 +1,59 @@
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Iterable, List, Union
+
+from .consts import VALID_STAGES
+
+# beneficiaries move from the first to the second stage on this birthday
+SECOND_STAGE_AGE = 13
+
+
+@lru_cache(maxsize=8192)
+def parse_birthdate(birthdate: str) -> date:
+    """
+    Parse a dd-mm-YYYY birthdate, the format of the Cognito claims and of the beneficiaries table, once per value
+    """
+    day, month, year = birthdate.split('-')
+    return date(int(year), int(month), int(day))
+
+
+def _as_date(value: Union[str, date]) -> date:
+    if isinstance(value, str):
+        return parse_birthdate(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def calculate_age(birth_date: Union[str, date], today: date = None) -> int:
+    birth_date = _as_date(birth_date)
+    today = date.today() if today is None else today
+    return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+
+
+@lru_cache(maxsize=8192)
+def _stage(birth_date: date, today: date) -> str:
+    return VALID_STAGES[0] if calculate_age(birth_date, today) < SECOND_STAGE_AGE else VALID_STAGES[1]
+
+
+def calculate_stage(birth_date: Union[str, date], today: date = None) -> str:
+    return _stage(_as_date(birth_date), date.today() if today is None else today)
+
+
+def classify_stages(birthdates: Iterable[Union[str, date]], today: date = None) -> List[str]:
+    """
+    Get the stage of many beneficiaries at once, comparing every birthdate with a single cut-off date.
+    Missing birthdates get a None stage
+    """
+    today = date.today() if today is None else today
+    # born on or before this (year, month, day) means being SECOND_STAGE_AGE or older today, even on February 29
+    cutoff = (today.year - SECOND_STAGE_AGE, today.month, today.day)
+    stages = []
+    for birthdate in birthdates:
+        if birthdate is None:
+            stages.append(None)
+            continue
+        birth_date = _as_date(birthdate)
+        stages.append(VALID_STAGES[1] if (birth_date.year, birth_date.month, birth_date.day) <= cutoff
+                      else VALID_STAGES[0])
+    return stages
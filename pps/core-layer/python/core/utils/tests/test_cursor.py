@@ -0,0 +1,49 @@
+from decimal import Decimal
+
+import pytest
+
+from core.aws.event import HTTPEvent
+from core.db.results import QueryResult
+from ..cursor import InvalidCursorError, Page, decode_cursor, encode_cursor
+
+
+def test_round_trip():
+    key = {'category': 'shirts', 'release-id': Decimal(301234), 'score': Decimal('1.5')}
+    cursor = encode_cursor(key, 'shop')
+    assert '=' not in cursor and '/' not in cursor
+    decoded = decode_cursor(cursor, 'shop')
+    assert decoded == key and type(decoded['release-id']) is int and type(decoded['score']) is Decimal
+    assert encode_cursor(None) is None and decode_cursor(None) is None
+
+
+def test_invalid_cursor():
+    cursor = encode_cursor({'user': 'u1'}, 'group-a')
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, 'group-b')
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor[:-2] + ('A' if cursor[-2] != 'A' else 'B') + cursor[-1], 'group-a')
+    with pytest.raises(InvalidCursorError):
+        decode_cursor('%%%', 'group-a')
+
+
+def event(query_params: dict = None, group: str = 'g'):
+    return HTTPEvent({'resource': '/api/districts/{district}/groups/{group}/beneficiaries/',
+                      'pathParameters': {'district': 'd', 'group': group}, 'queryStringParameters': query_params})
+
+
+def test_page():
+    assert Page.from_event(event()).limit is None
+    page = Page.from_event(event({'limit': '2'}))
+    assert page.limit == 2 and page.start_key is None
+
+    body = page.body(QueryResult({'Items': [{'user': 'u1'}, {'user': 'u2'}], 'Count': 2,
+                                  'LastEvaluatedKey': {'user': 'u2'}}))
+    assert body['count'] == 2 and body['cursor'] is not None
+    next_page = Page.from_event(event({'cursor': body['cursor']}))
+    assert next_page.limit == 50 and next_page.start_key == {'user': 'u2'}
+
+    with pytest.raises(InvalidCursorError):
+        Page.from_event(event({'cursor': body['cursor']}, group='other'))
+    for limit in ('0', '101', 'ten'):
+        with pytest.raises(InvalidCursorError):
+            Page.from_event(event({'limit': limit}))
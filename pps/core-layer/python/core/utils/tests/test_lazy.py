@@ -0,0 +1,27 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import core
+import core.utils
+
+
+def test_lazy_exports():
+    from core.utils.key import join_key
+    assert core.utils.join_key is join_key
+    assert 'join_key' in vars(core.utils)
+    assert 'join_key' in dir(core.utils)
+    with pytest.raises(AttributeError):
+        core.utils.not_a_name
+
+
+def test_core_import_is_lazy():
+    code = "import sys, core; assert 'boto3' not in sys.modules and 'core.db' not in sys.modules"
+    subprocess.run([sys.executable, '-c', code], cwd=Path(core.__file__).parents[1], check=True)
+
+
+def test_database_import_does_not_depend_on_import_order():
+    code = "import core.db.service; from core.db.db import db, Database; assert isinstance(db, Database)"
+    subprocess.run([sys.executable, '-c', code], cwd=Path(core.__file__).parents[1], check=True)
@@ -0,0 +1,20 @@
+from decimal import Decimal
+
+from ..paths import apply_updates, get_path, select_paths
+
+
+def test_apply_updates():
+    item = {'target': {'score': 80}, 'score': {'corporality': Decimal(10)}, 'score-total': Decimal(10)}
+    new = apply_updates(item, {'target': None}, {'score.corporality': 5, 'score-total': 5, 'n_tasks.corporality': 1})
+    assert new == {'target': None, 'score': {'corporality': 15}, 'score-total': 15, 'n_tasks': {'corporality': 1}}
+    assert item['score']['corporality'] == 10
+
+
+def test_select_paths():
+    item = {'target': None, 'score': {'corporality': 15, 'creativity': 3}, 'nickname': 'Nick'}
+    assert select_paths(item, ['target', 'score.corporality', 'missing.path']) == {
+        'target': None,
+        'score': {'corporality': 15}
+    }
+    assert get_path(item, 'score.creativity') == 3
+    assert get_path(item, 'nickname.first', 'default') == 'default'
@@ -0,0 +1,26 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from ..stages import calculate_age, calculate_stage, classify_stages, parse_birthdate
+
+
+def test_parse_birthdate():
+    assert parse_birthdate("05-03-2009") == date(2009, 3, 5)
+    with pytest.raises(ValueError):
+        parse_birthdate("05-13-2009")
+
+
+def test_stage():
+    today = date(2021, 2, 28)
+    assert calculate_age("28-02-2008", today) == 13
+    assert calculate_age(datetime(2008, 2, 29), today) == 12
+    assert calculate_stage("28-02-2008", today) == "puberty"
+    assert calculate_stage(date(2008, 2, 29), today) == "prepuberty"
+
+
+def test_classify_stages():
+    today = date(2021, 2, 28)
+    birthdates = [(date(2005, 1, 1) + timedelta(days=days)).strftime("%d-%m-%Y") for days in range(0, 3000, 7)]
+    assert classify_stages(birthdates, today) == [calculate_stage(birthdate, today) for birthdate in birthdates]
+    assert classify_stages(["29-02-2008", date(2008, 3, 1), None], date(2021, 3, 1)) == ["puberty", "puberty", None]
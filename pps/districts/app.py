@@ -1,5 +1,7 @@
-from core import db, HTTPEvent, JSONResponse
+from core import HTTPEvent, JSONResponse
 from core.aws.errors import HTTPError
+from core.aws.invocation import lambda_handler
+from core.db.db import db
 
 
 class District(db.Model):
@@ -27,6 +29,7 @@ def get_handler(event: HTTPEvent) -> JSONResponse:
     return JSONResponse(response.as_dict())
 
 
+@lambda_handler
 def handler(event: dict, _) -> dict:
     event = HTTPEvent(event)
     return get_handler(event).as_dict()
@@ -1,5 +1,7 @@
 from core import JSONResponse
+from core.aws.invocation import lambda_handler
 
 
+@lambda_handler
 def handler(event: dict, _) -> dict:
     return JSONResponse({"error": "NOT_IMPLEMENTED"}).as_dict()
@@ -1,11 +1,14 @@
-import json
-
 from schema import SchemaError
 
-from core import db, HTTPEvent
+from core import HTTPEvent
 from core.aws.errors import HTTPError
 from core.aws.event import Authorizer
+from core.aws.invocation import lambda_handler
 from core.aws.response import JSONResponse
+from core.db.db import db
+from core.router.router import Router
+from core.utils.consts import VALID_UNITS
+from core.utils.cursor import InvalidCursorError, Page
 from core.services.beneficiaries import BeneficiariesService
 from core.services.groups import GroupsService
 
@@ -51,53 +54,71 @@ def join_group(district: str, group: str, code: str, authorizer: Authorizer):
     return JSONResponse.generate_error(HTTPError.ALREADY_IN_USE, "You have already joined this group")
 
 
-def get_handler(event: HTTPEvent):
-    district_code = event.params["district"]
-    code = event.params.get("group")
-
-    if code is None:
-        # get all groups from district
-        response = GroupsService.query(district_code)
-        for item in response.items:
-            process_group(item, event)
-    else:
-        # get one group
-        response = GroupsService.get(district_code, code,
-                                     attributes=["district", "code", "name", "beneficiary_code", "scouters_code",
-                                                 "scouters"])
-        if response.item is None:
-            return JSONResponse.generate_error(HTTPError.NOT_FOUND, f"Group '{code}' was not found")
-        if event.authorizer.sub not in response.item['scouters'].keys():
-            del response.item['scouters']
-            del response.item['beneficiary_code']
-            del response.item['scouters_code']
-        process_group(response.item, event)
+def list_groups(event: HTTPEvent):
+    try:
+        page = Page.from_event(event)
+    except InvalidCursorError as e:
+        return JSONResponse.generate_error(HTTPError.INVALID_CONTENT, str(e))
+    response = GroupsService.query(event.params["district"], page.limit, page.start_key)
+    for item in response.items:
+        process_group(item, event)
+    return JSONResponse(page.body(response))
+
+
+def get_group(event: HTTPEvent):
+    code = event.params["group"]
+    response = GroupsService.get(event.params["district"], code,
+                                 attributes=["district", "code", "name", "beneficiary_code", "scouters_code",
+                                             "scouters"])
+    if response.item is None:
+        return JSONResponse.generate_error(HTTPError.NOT_FOUND, f"Group '{code}' was not found")
+    if event.authorizer.sub not in response.item['scouters'].keys():
+        del response.item['scouters']
+        del response.item['beneficiary_code']
+        del response.item['scouters_code']
+    process_group(response.item, event)
     return JSONResponse(response.as_dict())
 
 
-def post_handler(event: HTTPEvent):
+def get_roster(event: HTTPEvent):
+    code = event.params["group"]
+    unit = event.params.get("unit")
+    if unit is not None and unit not in VALID_UNITS:
+        return JSONResponse.generate_error(HTTPError.NOT_FOUND, f"Unknown unit: {unit}")
+    roster = GroupsService.get_roster(event.params["district"], code, unit)
+    if roster is None:
+        return JSONResponse.generate_error(HTTPError.NOT_FOUND, f"Group '{code}' was not found")
+    return JSONResponse(roster)
+
+
+def post_group(event: HTTPEvent):
     district_code = event.params["district"]
-    code = event.params.get("group")
+    if District.get({"code": district_code}).item is None:
+        return JSONResponse.generate_error(HTTPError.NOT_FOUND, f"District '{district_code}' was not found")
+    return create_group(district_code, event.json, event.authorizer)
+
+
+def post_join_group(event: HTTPEvent):
+    return join_group(event.params["district"], event.params["group"], event.json["code"],
+                      event.authorizer)
+
+
+"""Handlers"""
+
+
+router = Router()
+
+router.get("/api/districts/{district}/groups/", list_groups)
+router.get("/api/districts/{district}/groups/{group}/", get_group)
+router.get("/api/districts/{district}/groups/{group}/roster/", get_roster)
+router.get("/api/districts/{district}/groups/{group}/roster/{unit}/", get_roster)
 
-    if event.resource == "/api/districts/{district}/groups/{group}/beneficiaries/join":
-        # join group
-        return join_group(district_code, code, json.loads(event.body)["code"], event.authorizer)
-    elif district_code is not None:
-        # create group
-        if District.get({"code": district_code}).item is None:
-            return JSONResponse.generate_error(HTTPError.NOT_FOUND, f"District '{district_code}' was not found")
-        return create_group(district_code, json.loads(event.body), event.authorizer)
-    else:
-        # unknown resource
-        return JSONResponse.generate_error(HTTPError.UNKNOWN_ERROR, f"Bad resource")
+router.post("/api/districts/{district}/groups/", post_group)
+router.post("/api/districts/{district}/groups/{group}/beneficiaries/join/", post_join_group)
 
 
+@lambda_handler
 def handler(event, _) -> dict:
     event = HTTPEvent(event)
-    if event.method == "GET":
-        result = get_handler(event)
-    elif event.method == "POST":
-        result = post_handler(event)
-    else:
-        result = JSONResponse.generate_error(HTTPError.NOT_IMPLEMENTED, f"Method {event.method} is not valid")
-    return result.as_dict()
+    response = router.route(event)
+    return response.as_dict(event)
@@ -2,12 +2,14 @@ from datetime import datetime
 from unittest.mock import patch
 
 import pytest
+from boto3.dynamodb.conditions import Attr
 from botocore.stub import Stubber, ANY
 from dateutil.relativedelta import relativedelta
 
 from core.aws.event import Authorizer
 from core.utils.key import epoch
-from ..app import GroupsService, create_group, BeneficiariesService, join_group
+from ..app import GroupsService, create_group, BeneficiariesService, join_group, get_roster
+from core import HTTPEvent
 
 
 @pytest.fixture(scope="function")
@@ -59,6 +61,86 @@ def test_generate_beneficiary_code():
     assert len(code) == 8
 
 
+ROSTER_ENTRY = {
+    "unit": "scouts",
+    "nickname": "Nick Name",
+    "birthdate": "01-01-2010",
+    "score": 0,
+    "active-task": False
+}
+
+
+def add_group_query(ddb_stubber: Stubber):
+    ddb_stubber.add_response('query', {
+        'Items': [{
+            "user": {"S": "u-sub"},
+            "group": {"S": "district::group"},
+            "unit-user": {"S": "scouts::u-sub"},
+            "nickname": {"S": "Nick Name"},
+            "birthdate": {"S": "01-01-2010"},
+            "score": {"M": {"corporality": {"N": "30"}, "creativity": {"N": "20"}}},
+            "target": {"NULL": True}
+        }]
+    }, {
+        'TableName': 'beneficiaries',
+        'IndexName': 'ByGroup',
+        'KeyConditionExpression': ANY
+    })
+
+
+def add_group_check(ddb_stubber: Stubber, exists: bool = True):
+    ddb_stubber.add_response('get_item', {'Item': {'code': {'S': 'group'}}} if exists else {}, {
+        'TableName': 'groups',
+        'Key': {'district': 'district', 'code': 'group'},
+        'ProjectionExpression': 'code'
+    })
+
+
+def set_roster_params(roster: dict):
+    return {
+        'TableName': 'groups',
+        'Key': {'district': 'district::roster', 'code': 'group'},
+        'UpdateExpression': 'SET #attr_roster=:val_roster ADD #attr_roster_version :val_roster_version',
+        'ExpressionAttributeNames': {'#attr_roster': 'roster', '#attr_roster_version': 'roster-version'},
+        'ExpressionAttributeValues': {':val_roster': roster, ':val_roster_version': 1},
+        'ReturnValues': 'UPDATED_NEW'
+    }
+
+
+GET_ROSTER_PARAMS = {
+    'TableName': 'groups',
+    'Key': {'district': 'district::roster', 'code': 'group'},
+    'ProjectionExpression': 'roster, #model_roster_version',
+    'ExpressionAttributeNames': {'#model_roster_version': 'roster-version'}
+}
+
+
+def roster_params(birthdate: str):
+    return {
+        'TableName': 'groups',
+        'Key': {'district': 'district::roster', 'code': 'group'},
+        'UpdateExpression': 'SET #attr_roster.#attr_roster_u_sub=:val_roster_u_sub '
+                            'ADD #attr_roster_version :val_roster_version',
+        'ExpressionAttributeNames': {
+            '#attr_roster': 'roster',
+            '#attr_roster_u_sub': 'u-sub',
+            '#attr_roster_version': 'roster-version'
+        },
+        'ExpressionAttributeValues': {
+            ':val_roster_u_sub': {
+                "unit": "scouts",
+                "nickname": "Nick Name",
+                "birthdate": birthdate,
+                "score": 0,
+                "active-task": False
+            },
+            ':val_roster_version': 1
+        },
+        'ConditionExpression': Attr('roster').exists(),
+        'ReturnValues': 'NONE'
+    }
+
+
 def test_join(ddb_stubber: Stubber):
     beneficiary_code = GroupsService.generate_beneficiary_code("district", "group")
 
@@ -110,6 +192,7 @@ def test_join(ddb_stubber: Stubber):
                 "sociability": 0,
                 "spirituality": 0
             },
+            "score-total": 0,
         },
         'ReturnValues': 'NONE',
         'ExpressionAttributeNames': {'#model_user': 'user'},
@@ -119,6 +202,7 @@ def test_join(ddb_stubber: Stubber):
 
     ddb_stubber.add_response('get_item', group_response, group_params)
     ddb_stubber.add_response('put_item', beneficiary_response, beneficiary_params)
+    ddb_stubber.add_response('update_item', {}, roster_params(birthdate))
 
     response = join_group("district", "group", beneficiary_code, Authorizer({
         "claims": {
@@ -134,3 +218,101 @@ def test_join(ddb_stubber: Stubber):
     assert response.body["message"] == "OK"
 
     ddb_stubber.assert_no_pending_responses()
+
+
+def test_sync_roster_rebuilds_missing_roster(ddb_stubber: Stubber):
+    beneficiary = {
+        "group": "district::group",
+        "unit-user": "scouts::u-sub",
+        "nickname": "Nick Name",
+        "birthdate": "01-01-2010",
+        "score-total": 0,
+        "target": None
+    }
+    ddb_stubber.add_client_error('update_item', 'ConditionalCheckFailedException',
+                                 expected_params=roster_params("01-01-2010"))
+    add_group_query(ddb_stubber)
+    add_group_check(ddb_stubber)
+    ddb_stubber.add_response('update_item', {'Attributes': {'roster-version': {'N': '1'}}},
+                             set_roster_params({"u-sub": {**ROSTER_ENTRY, "score": 50}}))
+
+    BeneficiariesService.sync_roster("u-sub", beneficiary)
+    ddb_stubber.assert_no_pending_responses()
+
+
+def test_get_roster(ddb_stubber: Stubber):
+    def member(unit: str, nickname: str, birthdate: str, score: str, active: bool):
+        return {"M": {
+            "unit": {"S": unit},
+            "nickname": {"S": nickname},
+            "birthdate": {"S": birthdate},
+            "score": {"N": score},
+            "active-task": {"BOOL": active}
+        }}
+
+    ddb_stubber.add_response('get_item', {
+        'Item': {
+            'roster': {'M': {
+                'sub-1': member("scouts", "Child", "01-01-2015", "10", True),
+                'sub-2': member("scouts", "Teen", "01-01-2005", "25", False),
+                'sub-3': member("guides", "Other", "01-01-2015", "5", False),
+                'sub-4': {'NULL': True}
+            }},
+            'roster-version': {'N': '7'}
+        }
+    }, GET_ROSTER_PARAMS)
+
+    response = get_roster(HTTPEvent({
+        "pathParameters": {"district": "district", "group": "group", "unit": "scouts"}
+    }))
+    assert response.body == {
+        "version": 7,
+        "members": [
+            {"sub": "sub-1", "unit": "scouts", "nickname": "Child", "score": 10, "active-task": True,
+             "stage": "prepuberty"},
+            {"sub": "sub-2", "unit": "scouts", "nickname": "Teen", "score": 25, "active-task": False,
+             "stage": "puberty"}
+        ]
+    }
+    ddb_stubber.assert_no_pending_responses()
+
+
+def test_sync_roster_logs_errors(ddb_stubber: Stubber, caplog):
+    ddb_stubber.add_client_error('update_item', 'ProvisionedThroughputExceededException',
+                                 expected_params=roster_params("01-01-2010"))
+    BeneficiariesService.sync_roster("u-sub", {
+        "group": "district::group",
+        "unit-user": "scouts::u-sub",
+        "nickname": "Nick Name",
+        "birthdate": "01-01-2010",
+        "score-total": 0,
+        "target": None
+    })
+    assert "Could not update the roster of district::group" in caplog.text
+    ddb_stubber.assert_no_pending_responses()
+
+
+def test_get_roster_builds_missing_roster(ddb_stubber: Stubber):
+    ddb_stubber.add_response('get_item', {}, GET_ROSTER_PARAMS)
+    add_group_query(ddb_stubber)
+    add_group_check(ddb_stubber)
+    ddb_stubber.add_response('update_item', {'Attributes': {'roster-version': {'N': '1'}}},
+                             set_roster_params({"u-sub": {**ROSTER_ENTRY, "score": 50}}))
+
+    roster = GroupsService.get_roster("district", "group")
+    assert roster["version"] == 1
+    assert [member["sub"] for member in roster["members"]] == ["u-sub"]
+    ddb_stubber.assert_no_pending_responses()
+
+
+def test_get_roster_unknown_group(ddb_stubber: Stubber):
+    ddb_stubber.add_response('get_item', {}, GET_ROSTER_PARAMS)
+    ddb_stubber.add_response('query', {'Items': []}, {
+        'TableName': 'beneficiaries',
+        'IndexName': 'ByGroup',
+        'KeyConditionExpression': ANY
+    })
+    add_group_check(ddb_stubber, exists=False)
+
+    assert GroupsService.get_roster("district", "group") is None
+    ddb_stubber.assert_no_pending_responses()
@@ -1,5 +1,7 @@
 from core import HTTPEvent, JSONResponse
 from core.aws.errors import HTTPError
+from core.aws.invocation import lambda_handler
+from core.router.router import Router
 from core.services.tasks import TasksService
 
 
@@ -24,8 +26,17 @@ def post_handler(event: HTTPEvent):
     return JSONResponse.generate_error(HTTPError.UNKNOWN_RESOURCE, f"Unknown resource {event.resource}")
 
 
+"""Handlers"""
+
+
+router = Router()
+
+router.get("/api/districts/{district}/groups/{group}/beneficiaries/{unit}/{sub}/logs/", get_handler)
+router.get("/api/districts/{district}/groups/{group}/beneficiaries/{unit}/{sub}/logs/{tag}/", get_handler)
+
+
+@lambda_handler
 def handler(event: dict, _) -> dict:
     event = HTTPEvent(event)
-    if event.method == "GET":
-        response = get_handler(event)
+    response = router.route(event)
     return response.as_dict()
@@ -1,5 +1,6 @@
 from core import HTTPEvent, JSONResponse
 from core.aws.errors import HTTPError
+from core.aws.invocation import lambda_handler
 from core.services.objectives import ObjectivesService
 from core.utils.consts import VALID_UNITS, VALID_STAGES, VALID_AREAS
 
@@ -68,6 +69,7 @@ def get_handler(event: HTTPEvent) -> JSONResponse:
     return JSONResponse(response.as_dict())
 
 
+@lambda_handler
 def handler(event: dict, _) -> dict:
     event = HTTPEvent(event)
-    return get_handler(event).as_dict()
+    return get_handler(event).as_dict(event)
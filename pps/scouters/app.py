@@ -1,4 +1,3 @@
-import json
 import os
 
 from botocore.exceptions import ParamValidationError
@@ -6,6 +5,8 @@ from botocore.exceptions import ParamValidationError
 from core import HTTPEvent, JSONResponse
 from core.auth import CognitoService
 from core.aws.errors import HTTPError
+from core.aws.invocation import lambda_handler
+from core.router.router import Router
 from core.services.groups import GroupsService
 
 
@@ -35,7 +36,7 @@ def get_scouters(district: str, group: str, event: HTTPEvent):
 
 
 def signup_scouter(event: HTTPEvent):
-    data = json.loads(event.body)
+    data = event.json
     try:
         UsersCognito.sign_up(data['email'], data['password'], {
             'name': data['name'],
@@ -58,31 +59,27 @@ def signup_scouter(event: HTTPEvent):
 """Handlers"""
 
 
-def get_handler(event: HTTPEvent):
-    district = event.params["district"]
-    group = event.params["group"]
-    code = event.params.get("code")
+def list_group_scouters(event: HTTPEvent):
+    return JSONResponse(get_scouters(event.params["district"], event.params["group"], event))
 
-    if code is None:
-        result = get_scouters(district, group, event)
-    else:
-        result = get_scouter(district, group, code, event)
-        if result is None:
-            return JSONResponse.generate_error(HTTPError.NOT_FOUND, "Scouter not found")
+
+def get_group_scouter(event: HTTPEvent):
+    result = get_scouter(event.params["district"], event.params["group"], event.params["sub"], event)
+    if result is None:
+        return JSONResponse.generate_error(HTTPError.NOT_FOUND, "Scouter not found")
     return JSONResponse(result)
 
 
+router = Router()
+
+router.get("/api/districts/{district}/groups/{group}/scouters/", list_group_scouters)
+router.get("/api/districts/{district}/groups/{group}/scouters/{sub}/", get_group_scouter)
+
+router.post("/api/auth/scouters-signup/", signup_scouter)
+
+
+@lambda_handler
 def handler(event: dict, _) -> dict:
     event = HTTPEvent(event)
-
-    if event.method == "GET":
-        result = get_handler(event)
-    elif event.method == "POST":
-        if event.resource == "/api/auth/scouters-signup":
-            result = signup_scouter(event)
-        else:
-            result = JSONResponse.generate_error(HTTPError.UNKNOWN_RESOURCE, f"Resource {event.resource} unknown")
-    else:
-        result = JSONResponse.generate_error(HTTPError.NOT_IMPLEMENTED, f"Method {event.method} is not valid")
-
-    return result.as_dict()
+    response = router.route(event)
+    return response.as_dict()
@@ -2,10 +2,12 @@ from schema import Schema, SchemaError
 
 from core import HTTPEvent, JSONResponse
 from core.aws.errors import HTTPError
+from core.aws.invocation import lambda_handler
 from core.router.router import Router
 from core.services.beneficiaries import BeneficiariesService
 from core.services.shop import ShopService
 from core.utils.consts import VALID_AREAS
+from core.utils.cursor import InvalidCursorError, Page
 
 router = Router()
 
@@ -19,7 +21,11 @@ def list_shop_category(event: HTTPEvent):
         return JSONResponse.generate_error(HTTPError.INVALID_CONTENT,
                                            f"Invalid release {event.params['release']}, it should be an int")
 
-    return JSONResponse(ShopService.query(category, release).as_dict())
+    try:
+        page = Page.from_event(event)
+    except InvalidCursorError as e:
+        return JSONResponse.generate_error(HTTPError.INVALID_CONTENT, str(e))
+    return JSONResponse(page.body(ShopService.query(category, release, page.limit, page.start_key)))
 
 
 def get_item(event: HTTPEvent):
@@ -121,7 +127,8 @@ router.post("/api/shop/{category}/{release}/", create_item)
 router.post("/api/shop/{category}/{release}/{id}/buy/{area}/", buy_item)
 
 
+@lambda_handler
 def handler(event: dict, _) -> dict:
     event = HTTPEvent(event)
     response = router.route(event)
-    return response.as_dict()
+    return response.as_dict(event)
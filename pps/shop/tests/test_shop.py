@@ -177,30 +177,59 @@ def test_buy(ddb_stubber: Stubber):
 
     update_response = {
         "Attributes": {
-            "score.corporality": {'N': '-20'},
-            "bought_items.shirts127190": {'N': '2'}
+            'group': {'S': 'district::group'},
+            'unit-user': {'S': 'scouts::u-sub'},
+            'nickname': {'S': 'Nick'},
+            'birthdate': {'S': '01-01-2010'},
+            'score': {'M': {'corporality': {'N': '20'}, 'creativity': {'N': '5'}}},
+            'score-total': {'N': '25'},
+            'bought_items': {'M': {}},
+            'target': {'NULL': True}
         }
     }
 
     update_params = {
         'TableName': 'beneficiaries',
         'Key': {'user': 'u-sub'},
-        'ReturnValues': 'UPDATED_NEW',
+        'ReturnValues': 'ALL_OLD',
         'ExpressionAttributeNames': {
             '#attr_bought_items': 'bought_items',
             '#attr_bought_items_cat301234': 'cat301234',
             '#attr_score_corporality': 'corporality',
-            '#attr_score': 'score'
+            '#attr_score': 'score',
+            '#attr_score_total': 'score-total'
         },
         'ConditionExpression': Attr('score.corporality').gte(20),
         'ExpressionAttributeValues': {':val_bought_items_cat301234': 2,
-                                      ':val_score_corporality': -20},
+                                      ':val_score_corporality': -20,
+                                      ':val_score_total': -20},
         'UpdateExpression': 'ADD #attr_bought_items.#attr_bought_items_cat301234 :val_bought_items_cat301234, '
-                            '#attr_score.#attr_score_corporality :val_score_corporality'
+                            '#attr_score.#attr_score_corporality :val_score_corporality, '
+                            '#attr_score_total :val_score_total'
+    }
+
+    roster_params = {
+        'TableName': 'groups',
+        'Key': {'district': 'district::roster', 'code': 'group'},
+        'UpdateExpression': 'SET #attr_roster.#attr_roster_u_sub=:val_roster_u_sub '
+                            'ADD #attr_roster_version :val_roster_version',
+        'ExpressionAttributeNames': {
+            '#attr_roster': 'roster',
+            '#attr_roster_u_sub': 'u-sub',
+            '#attr_roster_version': 'roster-version'
+        },
+        'ExpressionAttributeValues': {
+            ':val_roster_u_sub': {'unit': 'scouts', 'nickname': 'Nick', 'birthdate': '01-01-2010', 'score': 5,
+                                  'active-task': False},
+            ':val_roster_version': 1
+        },
+        'ConditionExpression': Attr('roster').exists(),
+        'ReturnValues': 'NONE'
     }
 
     ddb_stubber.add_response('get_item', get_response, get_params)
     ddb_stubber.add_response('update_item', update_response, update_params)
+    ddb_stubber.add_response('update_item', {}, roster_params)
     event = HTTPEvent({
         "pathParameters": {
             "category": "cat",
@@ -219,6 +248,7 @@ def test_buy(ddb_stubber: Stubber):
             }
         }
     })
-    buy_item(event)
+    response = buy_item(event)
 
+    assert response.body == {'bought_items': {'cat301234': 2}, 'score': {'corporality': 0}, 'score-total': 5}
     ddb_stubber.assert_no_pending_responses()
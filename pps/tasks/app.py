@@ -4,10 +4,20 @@ from schema import Schema, SchemaError
 
 from core import HTTPEvent, JSONResponse
 from core.aws.errors import HTTPError
+from core.aws.invocation import lambda_handler
 from core.exceptions.notfound import NotFoundException
 from core.router.router import Router
 from core.services.tasks import TasksService
 from core.utils.consts import VALID_STAGES, VALID_AREAS
+from core.utils.cursor import InvalidCursorError, Page
+
+
+def list_tasks_page(event: HTTPEvent, stage: str = None, area: str = None) -> JSONResponse:
+    try:
+        page = Page.from_event(event)
+    except InvalidCursorError as e:
+        return JSONResponse.generate_error(HTTPError.INVALID_CONTENT, str(e))
+    return JSONResponse(page.body(TasksService.query(event.authorizer, stage, area, page.limit, page.start_key)))
 
 
 # GET  /api/users/{sub}/tasks/
@@ -15,7 +25,7 @@ def list_user_tasks(event: HTTPEvent) -> JSONResponse:
     sub = event.params['sub']
     if event.authorizer.sub != sub and not event.authorizer.is_scouter:
         return JSONResponse.generate_error(HTTPError.FORBIDDEN, "You have no access to this resource with this user")
-    return JSONResponse(TasksService.query(event.authorizer).as_dict())
+    return list_tasks_page(event)
 
 
 # GET  /api/users/{sub}/tasks/{stage}/
@@ -24,7 +34,7 @@ def list_user_stage_tasks(event: HTTPEvent) -> JSONResponse:
     stage = event.params['stage']
     if event.authorizer.sub != sub and not event.authorizer.is_scouter:
         return JSONResponse.generate_error(HTTPError.FORBIDDEN, "You have no access to this resource with this user")
-    return JSONResponse(TasksService.query(event.authorizer, stage).as_dict())
+    return list_tasks_page(event, stage)
 
 
 # GET  /api/users/{sub}/tasks/{stage}/{area}/
@@ -34,7 +44,7 @@ def list_user_area_tasks(event: HTTPEvent) -> JSONResponse:
     area = event.params['area']
     if event.authorizer.sub != sub and not event.authorizer.is_scouter:
         return JSONResponse.generate_error(HTTPError.FORBIDDEN, "You have no access to this resource with this user")
-    return JSONResponse(TasksService.query(event.authorizer, stage, area).as_dict())
+    return list_tasks_page(event, stage, area)
 
 
 # GET  /api/users/{sub}/tasks/{stage}/{area}/{subline}/
@@ -169,6 +179,7 @@ router.put("/api/users/{sub}/tasks/active/", update_active_task)
 router.delete("/api/users/{sub}/tasks/active/", dismiss_active_task)
 
 
+@lambda_handler
 def handler(event: dict, _) -> dict:
     event = HTTPEvent(event)
     response = router.route(event)
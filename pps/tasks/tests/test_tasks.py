@@ -1,8 +1,10 @@
+import hashlib
+import json
 import time
 from unittest.mock import patch
 
 import pytest
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Attr, Key
 from botocore.stub import Stubber, ANY
 
 from core.services.objectives import ObjectivesService
@@ -18,6 +20,36 @@ def ddb_stubber():
     ddb_stubber.deactivate()
 
 
+BENEFICIARY = {
+    'group': {'S': 'district::group'},
+    'unit-user': {'S': 'scouts::user-sub'},
+    'nickname': {'S': 'Nick'},
+    'birthdate': {'S': '01-01-2008'},
+    'score-total': {'N': '0'}
+}
+
+
+def roster_params(active_task: bool, score: int):
+    return {
+        'TableName': 'groups',
+        'Key': {'district': 'district::roster', 'code': 'group'},
+        'UpdateExpression': 'SET #attr_roster.#attr_roster_user_sub=:val_roster_user_sub '
+                            'ADD #attr_roster_version :val_roster_version',
+        'ExpressionAttributeNames': {
+            '#attr_roster': 'roster',
+            '#attr_roster_user_sub': 'user-sub',
+            '#attr_roster_version': 'roster-version'
+        },
+        'ExpressionAttributeValues': {
+            ':val_roster_user_sub': {'unit': 'scouts', 'nickname': 'Nick', 'birthdate': '01-01-2008', 'score': score,
+                                     'active-task': active_task},
+            ':val_roster_version': 1
+        },
+        'ConditionExpression': Attr('roster').exists(),
+        'ReturnValues': 'NONE'
+    }
+
+
 def test_list_user_tasks(ddb_stubber: Stubber):
     params = {
         'KeyConditionExpression': Key('user').eq('user-sub'),
@@ -172,7 +204,7 @@ def test_start_task(ddb_stubber: Stubber):
     params = {
         'TableName': 'beneficiaries',
         'Key': {'user': 'user-sub'},
-        'ReturnValues': 'UPDATED_NEW',
+        'ReturnValues': 'ALL_OLD',
         'ConditionExpression': '#attr_target = :val_target_condition',
         'UpdateExpression': 'SET #attr_target=:val_target',
         'ExpressionAttributeNames': {
@@ -200,8 +232,9 @@ def test_start_task(ddb_stubber: Stubber):
             }
         }
     }
-    response = {}
+    response = {'Attributes': {**BENEFICIARY, 'target': {'NULL': True}}}
     ddb_stubber.add_response('update_item', response, params)
+    ddb_stubber.add_response('update_item', {}, roster_params(True, 0))
     with patch('time.time', lambda: now):
         start_task(HTTPEvent({
             "pathParameters": {
@@ -301,51 +334,23 @@ def test_update_task(ddb_stubber: Stubber):
 
 def test_complete_task(ddb_stubber: Stubber):
     now = int(time.time())
+    objective = ObjectivesService.get('puberty', 'corporality', 2, 3)
 
     get_params = {
         'Key': {'user': 'user-sub'},
-        'ProjectionExpression': 'target.score, target.objective',
+        'ProjectionExpression': '#model_group, #model_unit_user, nickname, birthdate, #model_score_total, target',
+        'ExpressionAttributeNames': {
+            '#model_group': 'group',
+            '#model_unit_user': 'unit-user',
+            '#model_score_total': 'score-total'
+        },
         'TableName': 'beneficiaries'
     }
 
     get_response = {
         'Item': {
+            **BENEFICIARY,
             'target': {
-                'M': {
-                    'objective': {'S': 'puberty::corporality::2.3'},
-                    'score': {'N': str(94)}
-                }
-            }
-        }
-    }
-
-    beneficiary_update_params = {
-        'TableName': 'beneficiaries',
-        'Key': {'user': 'user-sub'},
-        'ReturnValues': 'UPDATED_OLD',
-        'UpdateExpression': 'SET #attr_target=:val_target ADD #attr_score.#attr_score_corporality :val_score_corporality, '
-                            '#attr_n_tasks.#attr_n_tasks_corporality :val_n_tasks_corporality',
-        'ExpressionAttributeNames': {
-            '#attr_score': 'score',
-            '#attr_n_tasks': 'n_tasks',
-            '#attr_n_tasks_corporality': 'corporality',
-            '#attr_score_corporality': 'corporality',
-            '#attr_target': 'target',
-        },
-        'ExpressionAttributeValues': {
-            ':val_target': None,
-            ':val_n_tasks_corporality': 1,
-            ':val_score_corporality': 94
-        }
-    }
-    beneficiary_update_response = {
-        "Attributes": {
-            'n_tasks': {
-                'M': {
-                    'corporality': {'N': str(2)}  # this is one less than its current value
-                }
-            },
-            "target": {
                 'M': {
                     'tasks': {'L': [
                         {
@@ -356,46 +361,79 @@ def test_complete_task(ddb_stubber: Stubber):
                         },
                         {
                             'M': {
-                                'completed': {'BOOL': True},
+                                'completed': {'BOOL': False},
                                 'description': {'S': 'Sub-task 2'}
                             }
                         }
                     ]},
+                    'completed': {'BOOL': False},
                     'personal-objective': {'S': 'A new task'},
                     'created': {'N': str(now)},
                     'score': {'N': str(80)},
                     'objective': {'S': 'puberty::corporality::2.3'},
-                    'original-objective': {'S': ObjectivesService.get('puberty', 'corporality', 2, 3)},
+                    'original-objective': {'S': objective},
                 }
             }
         }
     }
 
-    tasks_params = {
-        'TableName': 'tasks',
-        'ReturnValues': 'NONE',
-        'Item': {
-            'completed': True,
-            'created': ANY,
-            'objective': 'puberty::corporality::2.3',
-            'original-objective': ANY,
-            'personal-objective': 'A new task',
-            'tasks': [{'completed': True, 'description': 'Sub-task 1'},
-                      {'completed': True, 'description': 'Sub-task 2'}],
-            'user': 'user-sub',
-            'score': 80
-        }
-    }
-
-    tasks_response = {
-
+    transaction_params = {
+        'TransactItems': [
+            {
+                'Update': {
+                    'TableName': 'beneficiaries',
+                    'Key': {'user': {'S': 'user-sub'}},
+                    'UpdateExpression': 'SET #attr_target=:val_target ADD '
+                                        '#attr_score.#attr_score_corporality :val_score_corporality, '
+                                        '#attr_score_total :val_score_total, '
+                                        '#attr_n_tasks.#attr_n_tasks_corporality :val_n_tasks_corporality',
+                    'ConditionExpression': '#attr_target.#attr_target_objective = :val_target_objective_condition '
+                                           'AND #attr_target.#attr_target_created = :val_target_created_condition',
+                    'ExpressionAttributeNames': {
+                        '#attr_score': 'score',
+                        '#attr_n_tasks': 'n_tasks',
+                        '#attr_n_tasks_corporality': 'corporality',
+                        '#attr_score_corporality': 'corporality',
+                        '#attr_score_total': 'score-total',
+                        '#attr_target': 'target',
+                        '#attr_target_objective': 'objective',
+                        '#attr_target_created': 'created',
+                    },
+                    'ExpressionAttributeValues': {
+                        ':val_target': {'NULL': True},
+                        ':val_n_tasks_corporality': {'N': '1'},
+                        ':val_score_corporality': {'N': '80'},
+                        ':val_score_total': {'N': '80'},
+                        ':val_target_objective_condition': {'S': 'puberty::corporality::2.3'},
+                        ':val_target_created_condition': {'N': str(now)}
+                    }
+                }
+            },
+            {
+                'Put': {
+                    'TableName': 'tasks',
+                    'Item': {
+                        'completed': {'BOOL': True},
+                        'created': {'N': str(now)},
+                        'objective': {'S': 'puberty::corporality::2.3'},
+                        'original-objective': {'S': objective},
+                        'personal-objective': {'S': 'A new task'},
+                        'tasks': {'L': [{'M': {'completed': {'BOOL': True}, 'description': {'S': 'Sub-task 1'}}},
+                                        {'M': {'completed': {'BOOL': True}, 'description': {'S': 'Sub-task 2'}}}]},
+                        'user': {'S': 'user-sub'},
+                        'score': {'N': '80'}
+                    }
+                }
+            }
+        ],
+        'ClientRequestToken': hashlib.sha1(f'user-sub::puberty::corporality::2.3::{now}'.encode()).hexdigest()[:36]
     }
 
     ddb_stubber.add_response('get_item', get_response, get_params)
-    ddb_stubber.add_response('update_item', beneficiary_update_response, beneficiary_update_params)
-    ddb_stubber.add_response('put_item', tasks_response, tasks_params)
+    ddb_stubber.add_response('transact_write_items', {}, transaction_params)
+    ddb_stubber.add_response('update_item', {}, roster_params(False, 80))
 
-    complete_active_task(HTTPEvent({
+    response = complete_active_task(HTTPEvent({
         "pathParameters": {
             "sub": 'user-sub'
         },
@@ -405,4 +443,7 @@ def test_complete_task(ddb_stubber: Stubber):
             }
         }
     }))
+    task = json.loads(response.as_dict()['body'])['task']
+    assert task['created'] == now
+    assert task['score'] == 80
     ddb_stubber.assert_no_pending_responses()